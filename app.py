@@ -22,4 +22,12 @@ def health_check():
     return jsonify({"status": "healthy"}), 200
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Development server only; production runs under gunicorn (see wsgi.py),
+    # which starts background services in each worker after the fork.
+    # Importing the app never starts them
+    debug = os.getenv("FLASK_DEBUG") == "1"
+    if not debug or os.getenv("WERKZEUG_RUN_MAIN") == "true":
+        # With the reloader, only the child process that serves requests runs them
+        from services.runtime import start_background_services
+        start_background_services()
+    app.run(host='0.0.0.0', port=int(os.getenv("PORT", 5000)), debug=debug, threaded=True)
@@ -0,0 +1,75 @@
+"""
+Measure data-parallel training throughput for 1..N local nodes, and
+optionally kill a node mid-run to exercise shard re-assignment
+
+Usage: python benchmarks/bench_distributed_training.py [rows] [max_nodes] [--kill]
+"""
+import os
+import shutil
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from services.data_service import save_dataset
+from services.distributed_training import LocalNode, train_distributed
+
+
+def make_dataset(rows: int, columns: int = 20) -> str:
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(rows, columns))
+    weights = rng.normal(size=columns)
+    frame = pd.DataFrame(X, columns=[f"x{i}" for i in range(columns)])
+    frame["label"] = (X @ weights + rng.normal(scale=0.5, size=rows) > 0).astype(int)
+    return save_dataset(frame, "bench")
+
+
+def run(dataset_id: str, workdir: str, node_count: int, kill: bool):
+    nodes = [LocalNode(f"bench-node-{i}") for i in range(node_count)]
+    if kill and node_count > 1:
+        # Kill the last node once the first rounds are under way
+        threading.Timer(1.0, nodes[-1].kill).start()
+    params = {
+        "task": "classification",
+        "target": "label",
+        "estimator": "sgd",
+        "params": {"alpha": 0.0001},
+        "distributed": {"rounds": 5, "patience": 0}
+    }
+    try:
+        return train_distributed(dataset_id, "bench", params, os.path.join(workdir, f"model-{node_count}.joblib"), nodes=nodes)
+    finally:
+        for node in nodes:
+            node.close()
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    rows = int(args[0]) if args else 2_000_000
+    max_nodes = int(args[1]) if len(args) > 1 else os.cpu_count() or 1
+    kill = "--kill" in sys.argv
+
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    try:
+        dataset_id = make_dataset(rows)
+        baseline = None
+        node_count = 1
+        while node_count <= max_nodes:
+            result = run(dataset_id, workdir, node_count, kill)
+            seconds = result["timings"]["train_seconds"]
+            baseline = baseline or seconds
+            distributed = result["distributed"]
+            print(
+                f"nodes={node_count:<3} train={seconds:8.3f}s "
+                f"{result['timings']['train_rows_per_second']:>12,} rows/s "
+                f"speed-up={baseline / seconds:5.2f}x accuracy={result['best_score']:.4f} "
+                f"failures={distributed['failures']} reassigned={distributed['reassigned']}"
+            )
+            node_count *= 2
+    finally:
+        shutil.rmtree(workdir)
@@ -0,0 +1,51 @@
+"""
+Compare rows/second of the row-dict and columnar on-chain processing paths
+
+Usage: python benchmarks/bench_process_onchain.py [rows]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.data_service import convert_to_dataframe, process_onchain_columns, process_onchain_data
+
+
+def make_raw_data(rows: int):
+    random.seed(0)
+    raw_data = []
+    for i in range(rows):
+        item = {
+            "timestamp": 1700000000 + i,
+            "type": random.choice(["swap", "liquidity", "transfer"]),
+            "amount": str(random.random() * 1000),
+            "fee": 5000,
+            "success": random.random() > 0.05
+        }
+        if item["type"] == "swap":
+            item.update({"token_in": "SOL", "token_out": "USDC", "price_impact": random.random() / 100})
+        elif item["type"] == "liquidity":
+            item.update({"pool_address": "pool", "token_amount": random.random() * 100})
+        raw_data.append(item)
+    return raw_data
+
+
+def bench(name, fn, raw_data, repeat=3):
+    best = min(_timed(fn, raw_data) for _ in range(repeat))
+    print(f"{name:<40} {best:8.3f}s {len(raw_data) / best:>14,.0f} rows/s")
+
+
+def _timed(fn, raw_data):
+    start = time.perf_counter()
+    fn(raw_data)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    raw_data = make_raw_data(rows)
+    bench("process_onchain_data", process_onchain_data, raw_data)
+    bench("process_onchain_data + DataFrame", lambda d: convert_to_dataframe(process_onchain_data(d)), raw_data)
+    bench("process_onchain_columns", process_onchain_columns, raw_data)
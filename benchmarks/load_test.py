@@ -0,0 +1,139 @@
+"""
+Load-test the API and compare the development server with gunicorn
+
+Starts each server mode on a free port, drives it with concurrent keep-alive
+clients for a fixed duration and prints requests/second and latency.
+
+Usage: python benchmarks/load_test.py [--modes dev,gunicorn] [--path /health]
+                                      [--concurrency 32] [--duration 10]
+       python benchmarks/load_test.py --url http://host:5000/health
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER_COMMANDS = {
+    # What app.py ran before: the Werkzeug server with the debugger and reloader
+    "dev-debug": lambda port: [sys.executable, "-c", f"from app import app; app.run(port={port}, debug=True, use_reloader=False, threaded=False)"],
+    "dev": lambda port: [sys.executable, "app.py"],
+    "gunicorn": lambda port: [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "PORT": str(port), "ZEPHYR_BIND": f"127.0.0.1:{port}"}
+    env.setdefault("ZEPHYR_SESSION_SECRET", "load-test")
+    process = subprocess.Popen(
+        SERVER_COMMANDS[mode](port), cwd=ROOT, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            return process
+        except requests.RequestException:
+            if process.poll() is not None:
+                raise RuntimeError(f"{mode} server exited with code {process.returncode}")
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{mode} server did not become ready")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def run_load(url: str, concurrency: int, duration: float, method: str = "GET", body: bytes = None) -> dict:
+    latencies = [[] for _ in range(concurrency)]
+    errors = [0] * concurrency
+    stop_at = time.perf_counter() + duration
+
+    def client(index: int) -> None:
+        session = requests.Session()
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, data=body, headers={"Content-Type": "application/json"} if body else None, timeout=30)
+                if response.status_code >= 500:
+                    errors[index] += 1
+                    continue
+            except requests.RequestException:
+                errors[index] += 1
+                continue
+            latencies[index].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies = np.array([latency for client_latencies in latencies for latency in client_latencies]) * 1000
+    if not len(all_latencies):
+        all_latencies = np.zeros(1)
+    completed = sum(len(client_latencies) for client_latencies in latencies)
+    return {
+        "requests": completed,
+        "errors": sum(errors),
+        "requests_per_second": completed / elapsed,
+        "p50_ms": float(np.percentile(all_latencies, 50)),
+        "p95_ms": float(np.percentile(all_latencies, 95)),
+        "p99_ms": float(np.percentile(all_latencies, 99))
+    }
+
+
+def report(name: str, result: dict) -> None:
+    print(
+        f"{name:<12} {result['requests_per_second']:>10,.0f} req/s "
+        f"p50={result['p50_ms']:7.2f}ms p95={result['p95_ms']:7.2f}ms p99={result['p99_ms']:7.2f}ms "
+        f"requests={result['requests']} errors={result['errors']}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="dev-debug,gunicorn", help=f"comma-separated, from {list(SERVER_COMMANDS)}")
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--method", default="GET")
+    parser.add_argument("--body", help="JSON request body")
+    parser.add_argument("--url", help="load-test an already running server instead")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+    body = args.body.encode() if args.body else None
+
+    if args.url:
+        report("external", run_load(args.url, args.concurrency, args.duration, args.method, body))
+        sys.exit(0)
+
+    for mode in args.modes.split(","):
+        port = free_port()
+        process = start_server(mode, port)
+        try:
+            # Short warm-up so lazy imports and connection setup are not measured
+            run_load(f"http://127.0.0.1:{port}{args.path}", args.concurrency, 1, args.method, body)
+            report(mode, run_load(f"http://127.0.0.1:{port}{args.path}", args.concurrency, args.duration, args.method, body))
+        finally:
+            stop_server(process)
@@ -0,0 +1,57 @@
+"""
+gunicorn settings for production serving: gunicorn -c gunicorn.conf.py wsgi:app
+
+Workers are processes, each with a pool of threads, so a request blocked on
+Solana, IPFS or Ollama I/O holds one thread rather than a whole worker.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv("ZEPHYR_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("ZEPHYR_WEB_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("ZEPHYR_WEB_THREADS", 8))
+worker_class = "gthread"
+
+# Each web worker also runs a training dispatcher with its own process pool,
+# and each training process can fan out a hyperparameter search. Left at their
+# per-process defaults that is workers x CPUs x CPUs processes, so unless set
+# explicitly the CPUs are split across workers and searches run serially
+os.environ.setdefault("ZEPHYR_TRAINING_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
+os.environ.setdefault("ZEPHYR_SEARCH_WORKERS", "1")
+
+# Import the app once in the parent; workers share its memory copy-on-write
+preload_app = True
+
+# Seconds in-flight requests get to finish after SIGTERM
+graceful_timeout = int(os.getenv("ZEPHYR_GRACEFUL_TIMEOUT", 30))
+timeout = int(os.getenv("ZEPHYR_WORKER_TIMEOUT", 120))
+keepalive = int(os.getenv("ZEPHYR_KEEPALIVE", 5))
+
+# Recycle workers periodically to bound memory growth; 0 disables it
+max_requests = int(os.getenv("ZEPHYR_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.getenv("ZEPHYR_ACCESS_LOG") or None
+errorlog = "-"
+loglevel = os.getenv("ZEPHYR_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    from services.runtime import preload
+    preload()
+
+
+def post_fork(server, worker):
+    from services.runtime import reset_after_fork
+    reset_after_fork()
+
+
+def post_worker_init(worker):
+    # Background threads start here, never in the parent, where forking would drop them
+    from services.runtime import start_background_services
+    start_background_services()
+
+
+def worker_exit(server, worker):
+    from services.runtime import shutdown
+    shutdown()
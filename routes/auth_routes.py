@@ -1,22 +1,97 @@
-from flask import Blueprint, request, jsonify
-from services.wallet_service import verify_wallet_signature
+from flask import Blueprint, g, request, jsonify
+from functools import wraps
+from services.wallet_service import verify_wallet_signature, verify_wallet_signatures
 from services.user_service import create_user, get_user
+from services.session_service import (
+    issue_session, verify_session, SessionError,
+    issue_challenge, verify_challenge, challenge_message, redeem_challenge
+)
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
 
+# Upper bound on wallets per bulk onboarding request
+MAX_BATCH_WALLETS = 10000
+
+def session_from_request():
+    """
+    Claims of a valid "Authorization: Bearer" session token, if present
+    """
+    header = request.headers.get('Authorization', '')
+    if not header.startswith('Bearer '):
+        return None
+    try:
+        return verify_session(header[len('Bearer '):].strip())
+    except SessionError:
+        return None
+
+def require_session(view):
+    """
+    Reject requests without a valid session token; claims are put in g.session
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        claims = session_from_request()
+        if claims is None:
+            return jsonify({"error": "Valid session token required"}), 401
+        g.session = claims
+        return view(*args, **kwargs)
+    return wrapper
+
+@bp.route('/challenge', methods=['POST'])
+def challenge():
+    try:
+        data = request.get_json(silent=True) or {}
+        wallet_address = data.get('wallet_address')
+        wallet_addresses = data.get('wallet_addresses')
+        
+        if isinstance(wallet_address, str) and wallet_address:
+            return jsonify({
+                "status": "success",
+                "challenge": issue_challenge(wallet_address)
+            }), 200
+        
+        if not isinstance(wallet_addresses, list) or not wallet_addresses:
+            return jsonify({"error": "wallet_address or wallet_addresses is required"}), 400
+        if len(wallet_addresses) > MAX_BATCH_WALLETS:
+            return jsonify({"error": f"At most {MAX_BATCH_WALLETS} wallets per request"}), 400
+        if any(not isinstance(address, str) or not address for address in wallet_addresses):
+            return jsonify({"error": "wallet_addresses must be non-empty strings"}), 400
+            
+        return jsonify({
+            "status": "success",
+            "challenges": [issue_challenge(address) for address in wallet_addresses]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @bp.route('/connect-wallet', methods=['POST'])
 def connect_wallet():
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         wallet_address = data.get('wallet_address')
         signature = data.get('signature')
+        nonce = data.get('nonce')
+        
+        # A live session for this wallet stands in for a new signature
+        claims = session_from_request()
+        has_session = claims is not None and claims['sub'] == wallet_address
         
-        if not wallet_address or not signature:
+        if not wallet_address or not (has_session or (signature and nonce)):
             return jsonify({"error": "Missing required parameters"}), 400
             
-        # Verify wallet signature
-        if not verify_wallet_signature(wallet_address, signature):
-            return jsonify({"error": "Invalid signature"}), 401
+        # Verify the wallet signed the challenge issued by /auth/challenge
+        if not has_session:
+            try:
+                challenge = verify_challenge(wallet_address, nonce)
+            except SessionError as e:
+                return jsonify({"error": str(e)}), 401
+            if not verify_wallet_signature(wallet_address, signature, challenge_message(challenge)):
+                return jsonify({"error": "Invalid signature"}), 401
+            try:
+                redeem_challenge(challenge)
+            except SessionError as e:
+                return jsonify({"error": str(e)}), 401
             
         # Get or create user
         user = get_user(wallet_address)
@@ -25,7 +100,8 @@ def connect_wallet():
             
         return jsonify({
             "status": "success",
-            "user": user
+            "user": user,
+            "session": issue_session(wallet_address)
         }), 200
         
     except Exception as e:
@@ -35,6 +111,9 @@ def connect_wallet():
 def get_user_profile():
     try:
         wallet_address = request.args.get('wallet_address')
+        if not wallet_address:
+            claims = session_from_request()
+            wallet_address = claims['sub'] if claims else None
         if not wallet_address:
             return jsonify({"error": "Wallet address is required"}), 400
             
@@ -49,3 +128,73 @@ def get_user_profile():
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@bp.route('/connect-wallets', methods=['POST'])
+def connect_wallets():
+    try:
+        data = request.get_json(silent=True) or {}
+        wallets = data.get('wallets')
+        
+        if not isinstance(wallets, list) or not wallets:
+            return jsonify({"error": "Missing required parameters"}), 400
+        if len(wallets) > MAX_BATCH_WALLETS:
+            return jsonify({"error": f"At most {MAX_BATCH_WALLETS} wallets per request"}), 400
+        if any(
+            not isinstance(item, dict)
+            or not all(isinstance(item.get(field), str) and item[field] for field in ('wallet_address', 'signature', 'nonce'))
+            for item in wallets
+        ):
+            return jsonify({"error": "Each wallet needs wallet_address, signature and nonce"}), 400
+        
+        errors = {}
+        challenges = {}
+        for index, item in enumerate(wallets):
+            try:
+                challenges[index] = verify_challenge(item['wallet_address'], item['nonce'])
+            except SessionError as e:
+                errors[index] = str(e)
+        
+        checked = sorted(challenges)
+        verified = verify_wallet_signatures([
+            (wallets[index]['wallet_address'], wallets[index]['signature'], challenge_message(challenges[index]))
+            for index in checked
+        ])
+        for index, valid in zip(checked, verified):
+            if not valid:
+                errors[index] = "Invalid signature"
+                continue
+            try:
+                redeem_challenge(challenges[index])
+            except SessionError as e:
+                errors[index] = str(e)
+        
+        results = []
+        for index, item in enumerate(wallets):
+            wallet_address = item['wallet_address']
+            if index in errors:
+                results.append({"wallet_address": wallet_address, "status": "error", "error": errors[index]})
+                continue
+            user = get_user(wallet_address) or create_user(wallet_address)
+            results.append({
+                "wallet_address": wallet_address,
+                "status": "success",
+                "user": user,
+                "session": issue_session(wallet_address)
+            })
+            
+        return jsonify({
+            "status": "success",
+            "results": results,
+            "failed": len(errors)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/session', methods=['GET'])
+@require_session
+def get_session():
+    return jsonify({
+        "status": "success",
+        "session": g.session
+    }), 200
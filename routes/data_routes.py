@@ -1,6 +1,14 @@
-from flask import Blueprint, request, jsonify
-from services.data_service import process_onchain_data, upload_to_ipfs
-from services.solana_service import get_defi_data
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from typing import Dict, Iterator, Optional
+import base64
+import json
+from services.data_service import (
+    process_onchain_data, upload_stream_to_ipfs, create_upload_session,
+    get_upload_session, upload_part, complete_upload
+)
+from services.feature_service import build_features
+from services.ingestion_service import get_ingestion_service
+from services.solana_service import get_account_cache_stats, get_cache_stats, get_defi_data, get_solana_service, iter_defi_data
 
 bp = Blueprint('data', __name__, url_prefix='/data')
 
@@ -17,22 +25,185 @@ def upload_data():
             return jsonify({"error": "User ID is required"}), 400
             
         # Upload file to IPFS
-        ipfs_hash = upload_to_ipfs(file)
+        result = upload_stream_to_ipfs(file.stream, file.filename or "upload")
         
         return jsonify({
             "status": "success",
-            "ipfs_hash": ipfs_hash
+            **result
         }), 200
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@bp.route('/upload/stream', methods=['POST'])
+def upload_data_stream():
+    try:
+        user_id = request.args.get('user_id')
+        filename = request.args.get('filename', 'upload')
+        
+        if not user_id:
+            return jsonify({"error": "User ID is required"}), 400
+        
+        # The raw request body is forwarded to IPFS as it is read
+        result = upload_stream_to_ipfs(request.stream, filename)
+        
+        return jsonify({
+            "status": "success",
+            **result
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/upload/sessions', methods=['POST'])
+def create_upload():
+    try:
+        data = request.get_json()
+        user_id = data.get('user_id')
+        filename = data.get('filename', 'upload')
+        total_size = data.get('total_size')
+        
+        if not user_id or not total_size:
+            return jsonify({"error": "Missing required parameters"}), 400
+        
+        kwargs = {"part_size": int(data['part_size'])} if data.get('part_size') else {}
+        session = create_upload_session(user_id, filename, int(total_size), **kwargs)
+        
+        return jsonify({
+            "status": "success",
+            "upload": session
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/upload/sessions/<upload_id>', methods=['GET'])
+def get_upload(upload_id):
+    try:
+        session = get_upload_session(upload_id)
+        if not session:
+            return jsonify({"error": "Upload not found"}), 404
+        
+        return jsonify({
+            "status": "success",
+            "upload": session
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/upload/sessions/<upload_id>/parts/<int:part_number>', methods=['PUT'])
+def put_upload_part(upload_id, part_number):
+    try:
+        result = upload_part(upload_id, part_number, request.stream, request.content_length)
+        
+        return jsonify({
+            "status": "success",
+            **result
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/upload/sessions/<upload_id>/complete', methods=['POST'])
+def complete_upload_session(upload_id):
+    try:
+        result = complete_upload(upload_id)
+        
+        return jsonify({
+            "status": "success",
+            **result
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def encode_cursor(signature: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"before": signature}).encode()).decode()
+
+def decode_cursor(cursor: Optional[str]) -> Optional[str]:
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))["before"]
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def iter_onchain_records(data_type: str, start_time: str, end_time: str, before: Optional[str], limit: Optional[int]) -> Iterator[Dict]:
+    """
+    Yield processed records, ending with a page marker carrying the continuation cursor
+    """
+    count = 0
+    last_signature = None
+    exhausted = True
+    
+    for raw_batch in iter_defi_data(data_type, start_time, end_time, before):
+        if not raw_batch:
+            continue
+        if limit is not None and count >= limit:
+            # A page that ended exactly on the limit only gets a cursor
+            # once this look-ahead batch shows more rows exist
+            exhausted = False
+            break
+        if limit is not None and count + len(raw_batch) > limit:
+            raw_batch = raw_batch[:limit - count]
+            exhausted = False
+        
+        for record in process_onchain_data(raw_batch):
+            yield record
+        
+        count += len(raw_batch)
+        if raw_batch:
+            last_signature = raw_batch[-1].get("signature", last_signature)
+        if not exhausted:
+            break
+    
+    yield {
+        "count": count,
+        "next_cursor": encode_cursor(last_signature) if not exhausted and last_signature else None
+    }
+
+def stream_ndjson(records: Iterator[Dict]) -> Iterator[str]:
+    try:
+        for record in records:
+            yield json.dumps(record) + "\n"
+    except Exception as e:
+        yield json.dumps({"error": str(e)}) + "\n"
+
 @bp.route('/onchain-data', methods=['GET'])
 def get_onchain_data():
     try:
         data_type = request.args.get('type', 'transactions')
         start_time = request.args.get('start_time')
         end_time = request.args.get('end_time')
+        cursor = request.args.get('cursor')
+        limit = request.args.get('limit', type=int)
+        if limit is not None and limit < 1:
+            return jsonify({"error": "limit must be a positive integer"}), 400
+        
+        if cursor or limit is not None or request.args.get('format') == 'ndjson':
+            before = decode_cursor(cursor)
+            records = iter_onchain_records(data_type, start_time, end_time, before, limit)
+            
+            if request.args.get('format') == 'ndjson':
+                return Response(
+                    stream_with_context(stream_ndjson(records)),
+                    mimetype='application/x-ndjson'
+                )
+            
+            processed_data = list(records)
+            page = processed_data.pop()
+            return jsonify({
+                "status": "success",
+                "data": processed_data,
+                "next_cursor": page["next_cursor"]
+            }), 200
         
         # Get data from Solana blockchain
         raw_data = get_defi_data(data_type, start_time, end_time)
@@ -45,5 +216,105 @@ def get_onchain_data():
             "data": processed_data
         }), 200
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    try:
+        return jsonify({
+            "status": "success",
+            "transactions": get_cache_stats(),
+            "accounts": get_account_cache_stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# Upper bound on wallets per balance lookup
+MAX_WALLETS = 10000
+
+@bp.route('/wallets', methods=['POST'])
+def wallet_balances():
+    try:
+        data = request.get_json()
+        wallets = data.get('wallets')
+        
+        if not isinstance(wallets, list) or not wallets:
+            return jsonify({"error": "Missing required parameters"}), 400
+        if len(wallets) > MAX_WALLETS:
+            return jsonify({"error": f"At most {MAX_WALLETS} wallets per request"}), 400
+            
+        service = get_solana_service()
+        balances = service.get_balances(wallets)
+        result = {"status": "success", "balances": balances}
+        if data.get('include_token_accounts'):
+            result["token_accounts"] = service.get_token_accounts_batch(wallets)
+            
+        return jsonify(result), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/ingestion', methods=['GET'])
+def ingestion_status():
+    try:
+        return jsonify({
+            "status": "success",
+            "ingestion": get_ingestion_service().status()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/ingestion/run', methods=['POST'])
+def run_ingestion():
+    try:
+        return jsonify({
+            "status": "success",
+            "ingestion": get_ingestion_service().run_once()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/liquidity', methods=['GET'])
+def liquidity_snapshot():
+    try:
+        since = request.args.get('since', 0, type=int)
+        return jsonify({
+            "status": "success",
+            **get_solana_service().get_liquidity_snapshot(since)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/features', methods=['POST'])
+def features():
+    try:
+        data = request.get_json()
+        dataset_id = data.get('dataset_id')
+        user_id = data.get('user_id')
+        spec = data.get('features')
+        
+        if not dataset_id or not user_id or not spec:
+            return jsonify({"error": "Missing required parameters"}), 400
+            
+        return jsonify({
+            "status": "success",
+            "features": build_features(dataset_id, user_id, spec)
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
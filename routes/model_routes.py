@@ -1,6 +1,10 @@
-from flask import Blueprint, request, jsonify
-from services.model_service import train_model, deploy_model, evaluate_model
-from services.ollama_service import deploy_to_ollama
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+import json
+from services.model_service import (
+    train_model, deploy_model, evaluate_model, get_training_job, cancel_training_job
+)
+from services.ollama_service import deploy_to_ollama, predict_batch, predict_stream, list_models, get_ollama_service
+from services.serving_service import get_model_server
 
 bp = Blueprint('model', __name__, url_prefix='/model')
 
@@ -11,15 +15,47 @@ def train():
         dataset_id = data.get('dataset_id')
         model_params = data.get('model_params', {})
         user_id = data.get('user_id')
+        priority = int(data.get('priority', 0))
         
         if not all([dataset_id, user_id]):
             return jsonify({"error": "Missing required parameters"}), 400
             
-        training_job = train_model(dataset_id, model_params, user_id)
+        training_job = train_model(dataset_id, model_params, user_id, priority)
         
         return jsonify({
             "status": "success",
-            "job_id": training_job.id
+            "job_id": training_job.id,
+            "job_status": training_job.status
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    try:
+        job = get_training_job(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+            
+        return jsonify({
+            "status": "success",
+            "job": job
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    try:
+        job = cancel_training_job(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+            
+        return jsonify({
+            "status": "success",
+            "job": job
         }), 200
         
     except Exception as e:
@@ -54,11 +90,13 @@ def evaluate():
         data = request.get_json()
         model_id = data.get('model_id')
         test_data = data.get('test_data')
+        dataset_id = data.get('dataset_id')
         
-        if not all([model_id, test_data]):
+        if not model_id or not (test_data or dataset_id):
             return jsonify({"error": "Missing required parameters"}), 400
             
-        evaluation = evaluate_model(model_id, test_data)
+        kwargs = {"batch_size": int(data['batch_size'])} if data.get('batch_size') else {}
+        evaluation = evaluate_model(model_id, test_data, dataset_id, data.get('user_id'), **kwargs)
         
         return jsonify({
             "status": "success",
@@ -67,3 +105,144 @@ def evaluate():
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/predict-batch', methods=['POST'])
+def predict_many():
+    try:
+        data = request.get_json()
+        model_name = data.get('model_name')
+        inputs = data.get('inputs')
+        max_concurrency = data.get('max_concurrency')
+        
+        if not model_name or not isinstance(inputs, list):
+            return jsonify({"error": "Missing required parameters"}), 400
+            
+        results = predict_batch(model_name, inputs, int(max_concurrency) if max_concurrency else None)
+        
+        return jsonify({
+            "status": "success",
+            "results": results,
+            "failed": sum(1 for result in results if result["status"] == "error")
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def stream_sse(events):
+    try:
+        for event in events:
+            yield f"data: {json.dumps(event)}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+@bp.route('/predict-stream', methods=['POST'])
+def predict_streaming():
+    try:
+        data = request.get_json()
+        model_name = data.get('model_name')
+        input_data = data.get('input_data')
+        
+        if not model_name or input_data is None:
+            return jsonify({"error": "Missing required parameters"}), 400
+            
+        return Response(
+            stream_with_context(stream_sse(predict_stream(model_name, input_data))),
+            mimetype='text/event-stream',
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/stream-stats', methods=['GET'])
+def stream_stats():
+    return jsonify({
+        "status": "success",
+        "stats": get_ollama_service().stream_stats()
+    }), 200
+
+
+@bp.route('/prediction-cache-stats', methods=['GET'])
+def prediction_cache_stats():
+    service = get_ollama_service()
+    return jsonify({
+        "status": "success",
+        "mode": service.cache_mode,
+        "stats": service.prediction_cache.stats()
+    }), 200
+
+
+@bp.route('/deployments', methods=['GET'])
+def deployments():
+    try:
+        return jsonify({
+            "status": "success",
+            "deployments": get_ollama_service().deployments.stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/models', methods=['GET'])
+def models():
+    try:
+        return jsonify({
+            "status": "success",
+            "models": list_models(),
+            "registry": get_ollama_service().registry.stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/predict', methods=['POST'])
+def predict():
+    try:
+        server = get_model_server()
+        if request.mimetype == 'application/octet-stream':
+            # Raw row-major matrix; model_id and dtype travel in the query string
+            model_id = request.args.get('model_id')
+            if not model_id:
+                return jsonify({"error": "Model ID is required"}), 400
+            result = server.predict_bytes(model_id, request.get_data(), request.args.get('dtype', 'float64'))
+        else:
+            data = request.get_json()
+            model_id = data.get('model_id')
+            inputs = data.get('inputs')
+            
+            if not model_id or inputs is None:
+                return jsonify({"error": "Missing required parameters"}), 400
+            result = server.predict_records(model_id, inputs)
+        
+        predictions = result["predictions"]
+        if request.accept_mimetypes.best == 'application/octet-stream' and predictions.dtype.kind in "biuf":
+            return Response(
+                predictions.astype("<f8", copy=False).tobytes(),
+                mimetype='application/octet-stream',
+                headers={"X-Model-Version": result["version"]}
+            )
+        
+        return jsonify({
+            "status": "success",
+            "model_id": model_id,
+            "version": result["version"],
+            "predictions": predictions.tolist()
+        }), 200
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@bp.route('/serving-stats', methods=['GET'])
+def serving_stats():
+    return jsonify({
+        "status": "success",
+        "stats": get_model_server().stats()
+    }), 200
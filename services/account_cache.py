@@ -0,0 +1,121 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+import os
+import threading
+import time
+
+ACCOUNT_CACHE_TTL = float(os.getenv("ZEPHYR_ACCOUNT_CACHE_TTL", 10))
+ACCOUNT_CACHE_ENTRIES = int(os.getenv("ZEPHYR_ACCOUNT_CACHE_ENTRIES", 100000))
+
+
+class _Pending:
+    """
+    A load in progress that other readers of the same key can wait for
+    """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class AccountCache:
+    """
+    Short-lived cache of on-chain account lookups. Concurrent requests for
+    the same key share a single load, and misses are loaded together so
+    callers can resolve them with one batched RPC call
+    """
+
+    def __init__(self, ttl: float = ACCOUNT_CACHE_TTL, max_entries: int = ACCOUNT_CACHE_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._pending: Dict[Hashable, _Pending] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.loads = 0
+
+    def get_many(self, keys: Iterable[Hashable], loader: Callable[[list], Dict[Hashable, Any]]) -> Dict[Hashable, Any]:
+        """
+        Return values for keys, calling loader once with the keys that are
+        neither cached nor already being loaded by another caller
+        """
+        results = {}
+        waiting = {}
+        owned = {}
+        now = time.monotonic()
+
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    results[key] = entry[1]
+                    self.hits += 1
+                elif key in self._pending:
+                    waiting[key] = self._pending[key]
+                    self.coalesced += 1
+                else:
+                    owned[key] = self._pending[key] = _Pending()
+                    self.misses += 1
+
+        if owned:
+            self._load(owned, loader)
+            for key, pending in owned.items():
+                if pending.error is not None:
+                    raise pending.error
+                results[key] = pending.value
+
+        for key, pending in waiting.items():
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            results[key] = pending.value
+
+        return results
+
+    def _load(self, owned: Dict[Hashable, _Pending], loader: Callable[[list], Dict[Hashable, Any]]) -> None:
+        try:
+            values = loader(list(owned))
+            error = None
+        except Exception as e:
+            values = {}
+            error = e
+
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self.loads += 1
+            for key, pending in owned.items():
+                del self._pending[key]
+                if error is not None:
+                    # Failures are handed to waiters but never cached
+                    pending.error = error
+                    continue
+                pending.value = values.get(key)
+                self._entries[key] = (expires_at, pending.value)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        for pending in owned.values():
+            pending.event.set()
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+                "loads": self.loads
+            }
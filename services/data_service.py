@@ -1,43 +1,346 @@
 import ipfshttpclient
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Any
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple, Union
+import hashlib
 import json
 import os
+import queue
+import threading
+import time
+import uuid
+from services.dataset_store import append_partition, iter_partitions, lock_dataset, read_dataset, read_manifest, write_dataset
+from services.ipfs_cache import IPFSContentCache
+from services.storage_service import get_storage
+
+IPFS_ADDRESS = os.getenv("ZEPHYR_IPFS_ADDRESS", "/ip4/127.0.0.1/tcp/5001")
+IPFS_POOL_SIZE = int(os.getenv("ZEPHYR_IPFS_POOL_SIZE", 8))
+IPFS_POOL_TIMEOUT = float(os.getenv("ZEPHYR_IPFS_POOL_TIMEOUT", 30))
+
+# Idle sessions older than this are health-checked before reuse
+IPFS_HEALTH_CHECK_INTERVAL = float(os.getenv("ZEPHYR_IPFS_HEALTH_CHECK_INTERVAL", 30))
+
+# Multi-part uploads are assembled in the IPFS node's MFS before pinning
+UPLOAD_MFS_ROOT = "/zephyr-uploads"
+UPLOAD_PART_SIZE = int(os.getenv("ZEPHYR_UPLOAD_PART_SIZE", 64 * 1024 * 1024))
+# Bytes copied per read/write call when completed parts are joined
+UPLOAD_ASSEMBLY_CHUNK_SIZE = int(os.getenv("ZEPHYR_UPLOAD_ASSEMBLY_CHUNK_SIZE", 4 * 1024 * 1024))
+
+# Datasets are stored column by column under data/datasets/<user_id>/<dataset_id>/
+DATASETS_DIR = "data/datasets"
+DATASET_COMPRESSION = os.getenv("ZEPHYR_DATASET_COMPRESSION", "0") == "1"
 
 # Initialize IPFS client
 def get_ipfs_client():
     try:
-        return ipfshttpclient.connect('/ip4/127.0.0.1/tcp/5001')
+        return ipfshttpclient.connect(IPFS_ADDRESS, session=True)
     except Exception as e:
         print(f"Error connecting to IPFS: {str(e)}")
         return None
 
+class IPFSClientPool:
+    """
+    Thread-safe pool of persistent IPFS client sessions
+    """
+    
+    def __init__(
+        self,
+        size: int = IPFS_POOL_SIZE,
+        timeout: float = IPFS_POOL_TIMEOUT,
+        health_check_interval: float = IPFS_HEALTH_CHECK_INTERVAL
+    ):
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+    
+    def _is_healthy(self, client) -> bool:
+        try:
+            client.id()
+            return True
+        except Exception:
+            return False
+    
+    def _checkout(self):
+        while True:
+            try:
+                client, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if time.monotonic() - last_used < self.health_check_interval or self._is_healthy(client):
+                return client
+            self._discard(client)
+        
+        client = get_ipfs_client()
+        if not client:
+            raise Exception("Failed to connect to IPFS")
+        return client
+    
+    def _discard(self, client) -> None:
+        try:
+            client.close()
+        except Exception:
+            pass
+    
+    @contextmanager
+    def client(self):
+        """
+        Borrow a client session; sessions that fail with a communication
+        error are dropped and replaced on the next checkout
+        """
+        if not self._slots.acquire(timeout=self.timeout):
+            raise Exception("Timed out waiting for an IPFS connection")
+        
+        try:
+            client = self._checkout()
+            try:
+                yield client
+            except ipfshttpclient.exceptions.CommunicationError:
+                self._discard(client)
+                raise
+            except BaseException:
+                self._idle.put((client, time.monotonic()))
+                raise
+            else:
+                self._idle.put((client, time.monotonic()))
+        finally:
+            self._slots.release()
+    
+    def close(self) -> None:
+        while True:
+            try:
+                client, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(client)
+
+_ipfs_pool = None
+_ipfs_pool_lock = threading.Lock()
+
+def get_ipfs_pool() -> IPFSClientPool:
+    """
+    Return the process-wide IPFS client pool
+    """
+    global _ipfs_pool
+    if _ipfs_pool is None:
+        with _ipfs_pool_lock:
+            if _ipfs_pool is None:
+                _ipfs_pool = IPFSClientPool()
+    return _ipfs_pool
+
 def upload_to_ipfs(file) -> str:
     """
     Upload a file to IPFS
     """
-    client = get_ipfs_client()
-    if not client:
-        raise Exception("Failed to connect to IPFS")
-    
-    try:
+    with get_ipfs_pool().client() as client:
         result = client.add(file)
         return result['Hash']
-    finally:
-        client.close()
+
+_ipfs_cache = None
+
+def get_ipfs_cache() -> IPFSContentCache:
+    """
+    Return the process-wide cache of IPFS content
+    """
+    global _ipfs_cache
+    if _ipfs_cache is None:
+        with _ipfs_pool_lock:
+            if _ipfs_cache is None:
+                _ipfs_cache = IPFSContentCache(lambda: get_ipfs_pool().client())
+    return _ipfs_cache
 
 def get_from_ipfs(ipfs_hash: str) -> bytes:
     """
     Get a file from IPFS
     """
-    client = get_ipfs_client()
-    if not client:
-        raise Exception("Failed to connect to IPFS")
+    return get_ipfs_cache().get(ipfs_hash)
+
+def iter_from_ipfs(ipfs_hash: str, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """
+    Stream a file from IPFS in chunks, reading large files from a memory-mapped local copy
+    """
+    return get_ipfs_cache().iter_chunks(ipfs_hash, chunk_size)
+
+class HashingReader:
+    """
+    File-like wrapper that hashes and counts bytes as they are read
+    """
+    
+    def __init__(self, stream, name: str = "upload"):
+        self.stream = stream
+        self.name = name
+        self.size = 0
+        self.sha256 = hashlib.sha256()
+    
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.stream.read(size)
+        self.size += len(chunk)
+        self.sha256.update(chunk)
+        return chunk
+
+def _transfer_stats(reader: HashingReader, started: float) -> Dict:
+    elapsed = max(time.monotonic() - started, 1e-9)
+    return {
+        "size": reader.size,
+        "sha256": reader.sha256.hexdigest(),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_bytes_per_second": round(reader.size / elapsed)
+    }
+
+def upload_stream_to_ipfs(stream, filename: str = "upload") -> Dict:
+    """
+    Upload a stream to IPFS chunk by chunk, without buffering it
+    """
+    reader = HashingReader(stream, filename)
+    started = time.monotonic()
+    
+    with get_ipfs_pool().client() as client:
+        result = client.add(reader)
+    
+    return {"ipfs_hash": result['Hash'], **_transfer_stats(reader, started)}
+
+def create_upload_session(user_id: str, filename: str, total_size: int, part_size: int = UPLOAD_PART_SIZE) -> Dict:
+    """
+    Start a resumable multi-part upload
+    """
+    if total_size <= 0 or part_size <= 0:
+        raise ValueError("total_size and part_size must be positive")
+    
+    upload_id = str(uuid.uuid4())
+    session = {
+        "id": upload_id,
+        "user_id": user_id,
+        "filename": filename,
+        "total_size": total_size,
+        "part_size": part_size,
+        "part_count": -(-total_size // part_size),
+        "parts": {},
+        "status": "open",
+        "mfs_path": f"{UPLOAD_MFS_ROOT}/{upload_id}",
+        "created_at": str(datetime.now())
+    }
+    
+    with get_ipfs_pool().client() as client:
+        client.files.mkdir(session["mfs_path"], parents=True)
+    
+    get_storage().put("uploads", upload_id, session)
+    return session
+
+def get_upload_session(upload_id: str) -> Optional[Dict]:
+    """
+    Get a multi-part upload, including the parts received so far
+    """
+    return get_storage().get("uploads", upload_id)
+
+def _part_path(session: Dict, part_number: int) -> str:
+    return f"{session['mfs_path']}/part-{part_number:05d}"
+
+def _require_open(session: Dict) -> None:
+    if session["status"] != "open":
+        raise ValueError(f"Upload {session['id']} is {session['status']}")
+
+def upload_part(upload_id: str, part_number: int, stream, size: Optional[int] = None) -> Dict:
+    """
+    Stream one part of a multi-part upload into its own MFS file; parts may
+    arrive in any order and be retried. size is the declared body length,
+    when the client sent one
+    """
+    session = get_upload_session(upload_id)
+    if session is None:
+        raise ValueError(f"Upload {upload_id} not found")
+    _require_open(session)
+    if not 0 <= part_number < session["part_count"]:
+        raise ValueError(f"Part number must be between 0 and {session['part_count'] - 1}")
+    
+    offset = part_number * session["part_size"]
+    expected_size = min(session["part_size"], session["total_size"] - offset)
+    if size is not None and size != expected_size:
+        raise ValueError(f"Part {part_number} must be {expected_size} bytes, got {size}")
+    
+    part_path = _part_path(session, part_number)
+    reader = HashingReader(stream, f"part-{part_number}")
+    started = time.monotonic()
+    
+    with get_ipfs_pool().client() as client:
+        client.files.write(part_path, reader, create=True, truncate=True, count=expected_size)
+        if reader.size != expected_size:
+            # Bodies without a declared length can only be checked once read
+            client.files.rm(part_path)
+            raise ValueError(f"Part {part_number} must be {expected_size} bytes, got {reader.size}")
     
+    part = _transfer_stats(reader, started)
+    
+    def add_part(record: Dict) -> None:
+        _require_open(record)
+        record["parts"][str(part_number)] = {"size": part["size"], "sha256": part["sha256"]}
+    
+    session = get_storage().update("uploads", upload_id, add_part)
+    return {"upload_id": upload_id, "part_number": part_number, "received_parts": len(session["parts"]), **part}
+
+def complete_upload(upload_id: str) -> Dict:
+    """
+    Join the parts of a multi-part upload in order, pin the result and
+    return its CID with the SHA-256 of the whole file
+    """
+    session = get_upload_session(upload_id)
+    if session is None:
+        raise ValueError(f"Upload {upload_id} not found")
+    _require_open(session)
+    
+    missing = [n for n in range(session["part_count"]) if str(n) not in session["parts"]]
+    if missing:
+        raise ValueError(f"Upload {upload_id} is missing parts {missing}")
+    
+    def claim(record: Dict) -> None:
+        # Only one completion may assemble the file
+        _require_open(record)
+        record["status"] = "assembling"
+    
+    get_storage().update("uploads", upload_id, claim)
+    
+    file_path = f"{session['mfs_path']}/file"
+    sha256 = hashlib.sha256()
     try:
-        return client.cat(ipfs_hash)
-    finally:
-        client.close()
+        with get_ipfs_pool().client() as client:
+            offset = 0
+            for part_number in range(session["part_count"]):
+                part_path = _part_path(session, part_number)
+                part_size = session["parts"][str(part_number)]["size"]
+                for start in range(0, part_size, UPLOAD_ASSEMBLY_CHUNK_SIZE):
+                    chunk = client.files.read(part_path, offset=start, count=UPLOAD_ASSEMBLY_CHUNK_SIZE)
+                    sha256.update(chunk)
+                    # Appends only, so no write lands past the end of the file
+                    client.files.write(file_path, chunk, offset=offset, create=True)
+                    offset += len(chunk)
+            if offset != session["total_size"]:
+                raise ValueError(f"Upload {upload_id} assembled to {offset} bytes, expected {session['total_size']}")
+            stat = client.files.stat(file_path)
+            client.pin.add(stat["Hash"])
+            client.files.rm(session["mfs_path"], recursive=True)
+    except Exception:
+        def reopen(record: Dict) -> None:
+            record["status"] = "open"
+        get_storage().update("uploads", upload_id, reopen)
+        raise
+    
+    checksum = sha256.hexdigest()
+    
+    def complete(record: Dict) -> None:
+        record["status"] = "completed"
+        record["ipfs_hash"] = stat["Hash"]
+        record["checksum"] = checksum
+        record["completed_at"] = str(datetime.now())
+    
+    session = get_storage().update("uploads", upload_id, complete)
+    return {
+        "ipfs_hash": stat["Hash"],
+        "size": session["total_size"],
+        "checksum": checksum,
+        "parts": session["part_count"]
+    }
 
 def process_onchain_data(raw_data: List[Dict]) -> List[Dict]:
     """
@@ -71,30 +374,201 @@ def process_onchain_data(raw_data: List[Dict]) -> List[Dict]:
     
     return processed_data
 
-def save_dataset(data: List[Dict], user_id: str) -> str:
+def process_onchain_stream(batches: Iterable[List[Dict]]) -> Iterator[List[Dict]]:
+    """
+    Process batches of raw blockchain data lazily, one batch at a time
+    """
+    for batch in batches:
+        yield process_onchain_data(batch)
+
+# Declarative schema for the columnar path: output column, raw field, dtype,
+# fill value for absent fields and the transaction type a column applies to
+ONCHAIN_SCHEMA = [
+    {"name": "timestamp", "source": "timestamp", "dtype": "Int64"},
+    {"name": "transaction_type", "source": "type", "dtype": "category"},
+    {"name": "amount", "source": "amount", "dtype": "float64", "default": 0.0},
+    {"name": "fee", "source": "fee", "dtype": "float64", "default": 0.0},
+    {"name": "success", "source": "success", "dtype": "bool", "default": True},
+    {"name": "token_in", "source": "token_in", "dtype": "string", "only_for": "swap"},
+    {"name": "token_out", "source": "token_out", "dtype": "string", "only_for": "swap"},
+    {"name": "price_impact", "source": "price_impact", "dtype": "Float64", "default": 0.0, "only_for": "swap"},
+    {"name": "pool_address", "source": "pool_address", "dtype": "string", "only_for": "liquidity"},
+    {"name": "token_amount", "source": "token_amount", "dtype": "Float64", "default": 0.0, "only_for": "liquidity"},
+]
+
+def _extract_column(raw_data: Union[List[Dict], pd.DataFrame], spec: Dict) -> List:
+    # Defaults stand in for absent fields only; an explicit null stays null,
+    # as it does in process_onchain_data
+    source = spec["source"]
+    default = spec.get("default")
+    if isinstance(raw_data, pd.DataFrame):
+        if source not in raw_data.columns:
+            return [default] * len(raw_data)
+        values = raw_data[source].astype(object)
+        return values.where(values.notna(), None).tolist()
+    return [item.get(source, default) for item in raw_data]
+
+def _normalize_column(values: List, spec: Dict) -> Any:
+    dtype = spec["dtype"]
+    
+    if dtype in ("float64", "Float64"):
+        # NumPy parses numeric strings and maps None to NaN in one pass
+        column = np.array(values, dtype=np.float64)
+        return column if dtype == "float64" else pd.array(column, dtype="Float64")
+    
+    if dtype == "bool":
+        # Null is falsy, matching bool() in process_onchain_data
+        return np.array(values, dtype=bool)
+    if dtype is None:
+        return pd.Series(values, dtype=object)
+    return pd.Series(values, dtype=dtype)
+
+def process_onchain_columns(raw_data: Union[List[Dict], pd.DataFrame], schema: List[Dict] = ONCHAIN_SCHEMA) -> pd.DataFrame:
+    """
+    Normalize raw blockchain data straight into typed columns
+    """
+    columns = {}
+    for spec in schema:
+        columns[spec["name"]] = _normalize_column(_extract_column(raw_data, spec), spec)
+    
+    frame = pd.DataFrame(columns)
+    
+    # Type-specific columns are null for rows of any other type
+    for spec in schema:
+        if "only_for" in spec:
+            applies = (frame["transaction_type"] == spec["only_for"]).to_numpy(dtype=bool, na_value=False)
+            frame[spec["name"]] = frame[spec["name"]].where(applies)
+    
+    return frame
+
+def frame_to_records(frame: pd.DataFrame, schema: List[Dict] = ONCHAIN_SCHEMA) -> List[Dict]:
+    """
+    Convert a columnar frame back into the row dicts returned by process_onchain_data
+    """
+    base_columns = [spec["name"] for spec in schema if "only_for" not in spec and spec["name"] in frame.columns]
+    records = [None] * len(frame)
+    types = frame["transaction_type"].astype(object).where(frame["transaction_type"].notna(), None)
+    
+    for transaction_type, positions in types.groupby(types, dropna=False).indices.items():
+        columns = base_columns + [
+            spec["name"] for spec in schema
+            if spec.get("only_for") == transaction_type and spec["name"] in frame.columns
+        ]
+        subset = frame.iloc[positions][columns].astype(object)
+        subset = subset.where(subset.notna(), None)
+        for position, record in zip(positions, subset.to_dict("records")):
+            records[position] = record
+    
+    return records
+
+def _dataset_path(dataset_id: str, user_id: str) -> str:
+    return f"{DATASETS_DIR}/{user_id}/{dataset_id}"
+
+def save_dataset(data: Union[List[Dict], pd.DataFrame], user_id: str, compress: bool = DATASET_COMPRESSION) -> str:
     """
     Save a dataset to local storage and return its ID
     """
     dataset_id = str(uuid.uuid4())
-    dataset_dir = f"data/datasets/{user_id}"
-    os.makedirs(dataset_dir, exist_ok=True)
+    os.makedirs(f"{DATASETS_DIR}/{user_id}", exist_ok=True)
     
-    with open(f"{dataset_dir}/{dataset_id}.json", 'w') as f:
-        json.dump(data, f, indent=2)
+    frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    write_dataset(_dataset_path(dataset_id, user_id), frame, compress)
     
     return dataset_id
 
+def append_to_dataset(
+    dataset_id: str,
+    user_id: str,
+    data: Union[List[Dict], pd.DataFrame],
+    metadata: Optional[Dict] = None,
+    compress: bool = DATASET_COMPRESSION
+) -> Dict:
+    """
+    Append rows to a dataset as a new partition, creating the dataset on first use
+    """
+    path = _dataset_path(dataset_id, user_id)
+    frame = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+    if os.path.isdir(path):
+        return append_partition(path, frame, compress, metadata)
+    
+    os.makedirs(f"{DATASETS_DIR}/{user_id}", exist_ok=True)
+    return write_dataset(path, frame, compress, metadata)
+
+def dataset_lock(dataset_id: str, user_id: str):
+    """
+    Context manager serialising writers of a dataset across processes
+    """
+    return lock_dataset(_dataset_path(dataset_id, user_id))
+
+def get_dataset_manifest(dataset_id: str, user_id: str) -> Optional[Dict]:
+    """
+    Return a dataset's manifest, or None if it does not exist yet
+    """
+    path = _dataset_path(dataset_id, user_id)
+    return read_manifest(path) if os.path.isdir(path) else None
+
+def _convert_json_dataset(dataset_id: str, user_id: str) -> None:
+    """
+    Rewrite a dataset saved in the old JSON format as columnar storage
+    """
+    path = _dataset_path(dataset_id, user_id)
+    json_path = f"{path}.json"
+    with dataset_lock(dataset_id, user_id):
+        # A concurrent first read may have converted it while this one waited
+        if os.path.isdir(path):
+            return
+        if not os.path.exists(json_path):
+            raise ValueError(f"Dataset {dataset_id} not found")
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+        
+        write_dataset(path, pd.DataFrame(data), DATASET_COMPRESSION)
+        try:
+            os.remove(json_path)
+        except FileNotFoundError:
+            pass
+
+def _resolve_dataset(dataset_id: str, user_id: str) -> str:
+    path = _dataset_path(dataset_id, user_id)
+    if not os.path.isdir(path):
+        _convert_json_dataset(dataset_id, user_id)
+    return path
+
+def load_dataset_frame(
+    dataset_id: str,
+    user_id: str,
+    columns: Optional[List[str]] = None,
+    rows: Optional[Tuple[int, int]] = None
+) -> pd.DataFrame:
+    """
+    Load a dataset, or a column/row subset of it, as a DataFrame backed by memory-mapped columns
+    """
+    return read_dataset(_resolve_dataset(dataset_id, user_id), columns, rows)
+
+def iter_dataset_frames(
+    dataset_id: str,
+    user_id: str,
+    columns: Optional[List[str]] = None,
+    batch_size: Optional[int] = None,
+    partitions: Optional[List[int]] = None,
+    rows: Optional[Tuple[int, int]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream a dataset as DataFrames, one partition or batch_size rows at a time
+    """
+    for frame in iter_partitions(_resolve_dataset(dataset_id, user_id), columns, rows, partitions):
+        if batch_size is None:
+            yield frame
+            continue
+        for start in range(0, len(frame), batch_size):
+            yield frame.iloc[start:start + batch_size]
+
 def load_dataset(dataset_id: str, user_id: str) -> List[Dict]:
     """
     Load a dataset from local storage
     """
-    dataset_path = f"data/datasets/{user_id}/{dataset_id}.json"
-    
-    if not os.path.exists(dataset_path):
-        raise ValueError(f"Dataset {dataset_id} not found")
-    
-    with open(dataset_path, 'r') as f:
-        return json.load(f)
+    frame = load_dataset_frame(dataset_id, user_id).astype(object)
+    return frame.where(frame.notna(), None).to_dict("records")
 
 def convert_to_dataframe(data: List[Dict]) -> pd.DataFrame:
     """
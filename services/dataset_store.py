@@ -0,0 +1,275 @@
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import io
+import json
+import os
+import shutil
+import uuid
+import zlib
+import numpy as np
+import pandas as pd
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; locks then only apply within a process
+    fcntl = None
+
+FORMAT_VERSION = "zephyr-columnar-v1"
+MANIFEST_FILE = "manifest.json"
+
+
+def _save_array(path: str, array: np.ndarray, compress: bool) -> str:
+    """
+    Write an array as .npy, or as zlib-compressed .npy.z; returns the file name
+    """
+    if not compress:
+        np.save(path + ".npy", array, allow_pickle=False)
+        return os.path.basename(path) + ".npy"
+
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    with open(path + ".npy.z", "wb") as f:
+        f.write(zlib.compress(buffer.getvalue()))
+    return os.path.basename(path) + ".npy.z"
+
+
+def _load_array(path: str) -> np.ndarray:
+    # Uncompressed columns are memory-mapped, so reads only touch the pages used
+    if path.endswith(".npy.z"):
+        with open(path, "rb") as f:
+            return np.load(io.BytesIO(zlib.decompress(f.read())), allow_pickle=False)
+    return np.load(path, mmap_mode="r", allow_pickle=False)
+
+
+def _is_string_column(values: pd.Series) -> bool:
+    if isinstance(values.dtype, (pd.CategoricalDtype, pd.StringDtype)):
+        return True
+    if values.dtype != object:
+        return False
+    return all(isinstance(value, str) for value in values.dropna())
+
+
+def _write_column(directory: str, name: str, values: pd.Series, compress: bool) -> Dict:
+    """
+    Encode one column; strings are dictionary-encoded, nullable numbers keep a mask
+    """
+    base = os.path.join(directory, name)
+
+    if _is_string_column(values):
+        categorical = values.astype("category") if not isinstance(values.dtype, pd.CategoricalDtype) else values
+        codes = categorical.cat.codes.to_numpy().astype(np.int32)
+        categories = categorical.cat.categories
+        encoding = {"encoding": "dictionary", "codes": _save_array(base + ".codes", codes, compress)}
+        if isinstance(categories.dtype, np.dtype) and categories.dtype.kind in "biufmM":
+            # Non-string categories keep their type in a small array of their own
+            encoding["dictionary_values"] = _save_array(base + ".dictionary", categories.to_numpy(), False)
+        else:
+            encoding["dictionary"] = [str(category) for category in categories]
+        if categorical.cat.ordered:
+            encoding["ordered"] = True
+        return encoding
+
+    if isinstance(values.dtype, pd.api.extensions.ExtensionDtype) and getattr(values.dtype, "numpy_dtype", None) is not None:
+        # Nullable extension arrays (Int64, Float64, boolean): values plus a missing-value mask
+        numpy_dtype = np.dtype(values.dtype.numpy_dtype)
+        return {
+            "encoding": "masked",
+            "dtype": str(values.dtype),
+            "values": _save_array(base, values.to_numpy(dtype=numpy_dtype, na_value=numpy_dtype.type(0)), compress),
+            "mask": _save_array(base + ".mask", values.isna().to_numpy(), compress)
+        }
+
+    if values.dtype.kind in "biufmM":
+        encoding = {"encoding": "plain"}
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            # Stored as UTC instants; the zone is reapplied on read
+            encoding["timezone"] = str(values.dtype.tz)
+            values = values.dt.tz_convert(None)
+        array = values.to_numpy()
+        encoding["dtype"] = str(array.dtype)
+        if values.dtype.kind in "mM":
+            array = array.view(np.int64)
+        encoding["values"] = _save_array(base, array, compress)
+        return encoding
+
+    # Anything else (mixed or nested values) falls back to JSON
+    file_name = name + ".json"
+    with open(os.path.join(directory, file_name), "w") as f:
+        json.dump([None if _is_null(value) else value for value in values.tolist()], f, default=str)
+    return {"encoding": "json", "values": file_name}
+
+
+def _is_null(value) -> bool:
+    try:
+        return bool(pd.isna(value))
+    except (TypeError, ValueError):
+        return False
+
+
+def _read_column(directory: str, spec: Dict, start: int, stop: int):
+    encoding = spec["encoding"]
+
+    if encoding == "dictionary":
+        codes = np.asarray(_load_array(os.path.join(directory, spec["codes"]))[start:stop])
+        if "dictionary_values" in spec:
+            categories = np.asarray(_load_array(os.path.join(directory, spec["dictionary_values"])))
+        else:
+            categories = spec["dictionary"]
+        return pd.Categorical.from_codes(codes, categories, ordered=spec.get("ordered", False))
+
+    if encoding == "masked":
+        values = _load_array(os.path.join(directory, spec["values"]))[start:stop]
+        mask = np.asarray(_load_array(os.path.join(directory, spec["mask"]))[start:stop])
+        array = pd.array(np.asarray(values), dtype=spec["dtype"])
+        array[mask] = pd.NA
+        return array
+
+    if encoding == "plain":
+        values = _load_array(os.path.join(directory, spec["values"]))[start:stop]
+        if spec["dtype"] != str(values.dtype):
+            values = values.view(spec["dtype"])
+        if spec.get("timezone"):
+            return pd.DatetimeIndex(values).tz_localize("UTC").tz_convert(spec["timezone"]).array
+        return values
+
+    with open(os.path.join(directory, spec["values"]), "r") as f:
+        return pd.Series(json.load(f)[start:stop], dtype=object)
+
+
+@contextmanager
+def lock_dataset(path: str):
+    """
+    Hold an exclusive lock on a dataset path across processes while writing it
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(f"{path}.lock", "w") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+def read_manifest(path: str) -> Dict:
+    with open(os.path.join(path, MANIFEST_FILE), "r") as f:
+        return json.load(f)
+
+
+def _write_manifest(path: str, manifest: Dict) -> None:
+    tmp_path = os.path.join(path, f"{MANIFEST_FILE}.{uuid.uuid4().hex}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, MANIFEST_FILE))
+
+
+def write_dataset(path: str, frame: pd.DataFrame, compress: bool = False, metadata: Optional[Dict] = None) -> Dict:
+    """
+    Write a frame as a new single-partition dataset directory
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    os.makedirs(tmp_path)
+    try:
+        manifest = {"format": FORMAT_VERSION, "rows": 0, "partitions": []}
+        _write_partition(tmp_path, manifest, frame, compress, metadata)
+        _write_manifest(tmp_path, manifest)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+    return manifest
+
+
+def append_partition(path: str, frame: pd.DataFrame, compress: bool = False, metadata: Optional[Dict] = None) -> Dict:
+    """
+    Add a frame to an existing dataset as a new partition; the partition
+    only becomes visible once the manifest is replaced
+    """
+    manifest = read_manifest(path)
+    _write_partition(path, manifest, frame, compress, metadata)
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def _write_partition(path: str, manifest: Dict, frame: pd.DataFrame, compress: bool, metadata: Optional[Dict] = None) -> None:
+    name = f"part-{len(manifest['partitions']):05d}"
+    directory = os.path.join(path, name)
+    if os.path.exists(directory):
+        # Left over from an append that failed before its manifest was written
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+
+    columns = {}
+    for position, column in enumerate(frame.columns):
+        # Column names may not be valid file names, so files are numbered
+        spec = _write_column(directory, f"c{position:04d}", frame[column], compress)
+        columns[str(column)] = spec
+
+    partition = {"name": name, "rows": len(frame), "columns": columns}
+    if metadata:
+        partition["metadata"] = metadata
+    manifest["partitions"].append(partition)
+    manifest["rows"] += len(frame)
+
+
+def _empty_column(rows: int):
+    return pd.Series([None] * rows, dtype=object)
+
+
+def iter_partitions(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    rows: Optional[Tuple[int, int]] = None,
+    partitions: Optional[Sequence[int]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Yield the requested columns and row range one partition at a time
+    """
+    manifest = read_manifest(path)
+    start, stop = rows if rows is not None else (0, manifest["rows"])
+    names = list(columns) if columns is not None else _all_columns(manifest)
+
+    offset = 0
+    for index, partition in enumerate(manifest["partitions"]):
+        first, last = offset, offset + partition["rows"]
+        offset = last
+        if partitions is not None and index not in partitions:
+            continue
+        if last <= start or first >= stop:
+            continue
+
+        local_start, local_stop = max(start - first, 0), min(stop, last) - first
+        directory = os.path.join(path, partition["name"])
+        data = {}
+        for name in names:
+            spec = partition["columns"].get(name)
+            data[name] = (
+                _read_column(directory, spec, local_start, local_stop)
+                if spec else _empty_column(local_stop - local_start)
+            )
+        frame = pd.DataFrame(data, copy=False)
+        frame.index = pd.RangeIndex(first + local_start, first + local_stop)
+        yield frame
+
+
+def _all_columns(manifest: Dict) -> List[str]:
+    names = []
+    for partition in manifest["partitions"]:
+        for name in partition["columns"]:
+            if name not in names:
+                names.append(name)
+    return names
+
+
+def read_dataset(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    rows: Optional[Tuple[int, int]] = None
+) -> pd.DataFrame:
+    """
+    Read a dataset into one frame; a single partition is returned without copying
+    """
+    frames = list(iter_partitions(path, columns, rows))
+    if not frames:
+        names = list(columns) if columns is not None else _all_columns(read_manifest(path))
+        return pd.DataFrame({name: pd.Series(dtype=object) for name in names})
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames)
@@ -0,0 +1,482 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import joblib
+import numpy as np
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from services.data_service import get_dataset_manifest, load_dataset_frame
+from services.evaluation_service import build_vocabulary
+from services.feature_service import build_features, feature_names, load_features
+from services.training_service import build_estimator, load_training_data
+
+# Local worker processes started when no nodes are passed in
+DISTRIBUTED_NODES = int(os.getenv("ZEPHYR_DISTRIBUTED_NODES", os.cpu_count() or 1))
+
+# Seconds a node may spend on one task before it is considered failed
+DISTRIBUTED_TASK_TIMEOUT = float(os.getenv("ZEPHYR_DISTRIBUTED_TASK_TIMEOUT", 600))
+
+# Rows read up front to check that the features are numeric
+HEAD_ROWS = 1000
+
+# Attempts per task, across nodes, before the run fails
+DISTRIBUTED_MAX_ATTEMPTS = 3
+
+# Estimators trained with partial_fit whose linear coefficients are averaged
+PARTIAL_FIT_ESTIMATORS = ("sgd",)
+
+# Fitted state merged across nodes, weighted by rows
+AVERAGED_ATTRIBUTES = ("coef_", "intercept_", "_average_coef", "_average_intercept", "_standard_coef", "_standard_intercept")
+
+# Example model_params:
+# {
+#     "task": "classification",
+#     "target": "label",
+#     "features": ["amount", "fee"],
+#     "estimator": "sgd",
+#     "params": {"loss": "log_loss", "alpha": 0.0001},
+#     "distributed": {"nodes": 4, "rounds": 10, "local_epochs": 1, "patience": 2, "tol": 0.0001}
+# }
+
+
+class NodeFailure(Exception):
+    pass
+
+
+def _node_main(conn) -> None:
+    """
+    Worker process loop: run (fn, args) messages until the coordinator goes away
+    """
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        fn, args = message
+        try:
+            conn.send(("ok", fn(*args)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class LocalNode:
+    """
+    A local worker process standing in for a remote training node. Nodes
+    only need call(fn, *args), alive and close(), so a remote node can
+    implement the same interface over the network
+    """
+
+    def __init__(self, name: str, timeout: float = DISTRIBUTED_TASK_TIMEOUT):
+        self.name = name
+        self.timeout = timeout
+        self._conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_node_main, args=(child,), name=name)
+        self.process.start()
+        child.close()
+        self._lock = threading.Lock()
+        self._lost = False
+
+    @property
+    def alive(self) -> bool:
+        return not self._lost and self.process.is_alive()
+
+    def call(self, fn: Callable, *args) -> Any:
+        with self._lock:
+            try:
+                self._conn.send((fn, args))
+                if not self._conn.poll(self.timeout):
+                    self.kill()
+                    raise NodeFailure(f"Node {self.name} timed out")
+                status, value = self._conn.recv()
+            except (EOFError, OSError) as e:
+                # The process may not have been reaped yet, so remember the loss
+                self._lost = True
+                raise NodeFailure(f"Node {self.name} died: {e!r}")
+        if status == "error":
+            raise NodeFailure(f"Node {self.name} failed: {value}")
+        return value
+
+    def kill(self) -> None:
+        self._lost = True
+        self.process.kill()
+
+    def close(self) -> None:
+        try:
+            self._conn.send(None)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+        self._conn.close()
+
+
+_shards = {}
+
+def _shard(source: Dict, shard: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    # Each node reads its row ranges once per run and keeps them for later rounds
+    key = (source["run_id"], shard)
+    if key not in _shards:
+        if any(cached[0] != source["run_id"] for cached in _shards):
+            _shards.clear()
+        X, y, _, _ = load_training_data(source["dataset_id"], source["user_id"], source["model_params"], shard, {})
+        _shards[key] = (X, y)
+    return _shards[key]
+
+
+def describe_shards(shards: Sequence[Tuple[int, int]], source: Dict) -> Dict:
+    """
+    Per-column sums and counts of non-missing values, plus target labels
+    """
+    totals = None
+    labels = set()
+    rows = 0
+    for shard in shards:
+        X, y = _shard(source, shard)
+        rows += len(y)
+        present = ~np.isnan(X)
+        stats = np.stack([present.sum(axis=0), np.nansum(X, axis=0), np.nansum(X * X, axis=0)])
+        totals = stats if totals is None else totals + stats
+        if source["model_params"].get("task", "classification") == "classification":
+            labels.update(np.unique(y).tolist())
+    return {"stats": totals, "labels": sorted(labels), "rows": rows}
+
+
+def _scaled(source: Dict, shard: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    X, y = _shard(source, shard)
+    X = (X - source["mean"]) / source["scale"]
+    # Missing values land on the column mean
+    X[np.isnan(X)] = 0.0
+    return X, y
+
+
+def train_shards(shards: Sequence[Tuple[int, int]], source: Dict, model, epochs: int, seed: int) -> Dict:
+    """
+    Score the incoming global model on the shards, then continue training
+    it with partial_fit for the given number of local epochs
+    """
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    if "random_state" in model.get_params():
+        # SGD also shuffles with its own generator, which would otherwise
+        # depend on the node process; seeding it per task makes the result
+        # the same whichever node runs the task
+        model.set_params(random_state=seed)
+    fitted = hasattr(model, "coef_")
+    score_sum = 0.0
+    rows = 0
+    for epoch in range(epochs):
+        for shard in shards:
+            X, y = _scaled(source, shard)
+            if not len(y):
+                continue
+            if epoch == 0:
+                rows += len(y)
+                if fitted:
+                    score_sum += model.score(X, y) * len(y)
+            order = rng.permutation(len(y))
+            if source.get("classes") is not None:
+                model.partial_fit(X[order], y[order], classes=source["classes"])
+            else:
+                model.partial_fit(X[order], y[order])
+    return {
+        "model": model,
+        "rows": rows,
+        "score_sum": score_sum if fitted else None,
+        "seconds": time.perf_counter() - started
+    }
+
+
+def score_shards(shards: Sequence[Tuple[int, int]], source: Dict, model) -> Dict:
+    score_sum = 0.0
+    rows = 0
+    for shard in shards:
+        X, y = _scaled(source, shard)
+        if len(y):
+            score_sum += model.score(X, y) * len(y)
+            rows += len(y)
+    return {"rows": rows, "score_sum": score_sum}
+
+
+class TrainingCoordinator:
+    """
+    Data-parallel training across nodes by parameter averaging. The dataset
+    is split into row-range shards that stay with the same node between
+    rounds; every round each node continues the global model on its shards
+    with partial_fit and the coordinator averages the results, weighted by
+    rows. Work of a node that dies, times out or errors is re-queued for the
+    remaining nodes
+    """
+
+    def __init__(
+        self,
+        nodes: Optional[List] = None,
+        node_count: int = DISTRIBUTED_NODES,
+        max_attempts: int = DISTRIBUTED_MAX_ATTEMPTS
+    ):
+        self._own_nodes = nodes is None
+        self.nodes = nodes if nodes is not None else [LocalNode(f"training-node-{i}") for i in range(max(1, node_count))]
+        self.max_attempts = max_attempts
+        self.failures = 0
+        self.reassigned = 0
+        self.node_stats = {node.name: {"tasks": 0, "rows": 0, "seconds": 0.0, "failures": 0} for node in self.nodes}
+
+    def close(self) -> None:
+        if self._own_nodes:
+            for node in self.nodes:
+                node.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def run_round(self, fn: Callable, args: Tuple, assignments: List[List[Tuple[int, int]]]) -> List[Dict]:
+        """
+        Run fn(shards, *args) once per assignment. Assignment i is
+        first offered to node i; failed work goes to whichever node is free
+        """
+        condition = threading.Condition()
+        queue = [{"shards": shards, "node": i % len(self.nodes), "attempts": 0} for i, shards in enumerate(assignments) if shards]
+        outstanding = len(queue)
+        results = []
+        errors = []
+
+        def take(index: int) -> Optional[Dict]:
+            for task in queue:
+                preferred = task["node"]
+                if preferred == index or preferred is None or not self.nodes[preferred].alive:
+                    queue.remove(task)
+                    return task
+            return None
+
+        def serve(index: int) -> None:
+            nonlocal outstanding
+            node = self.nodes[index]
+            stats = self.node_stats[node.name]
+            while True:
+                with condition:
+                    task = None
+                    while not errors and outstanding and node.alive:
+                        task = take(index)
+                        if task is not None:
+                            break
+                        condition.wait(1.0)
+                    if task is None:
+                        return
+
+                try:
+                    result = node.call(fn, task["shards"], *args)
+                except NodeFailure as e:
+                    print(f"Error on training node: {str(e)}")
+                    with condition:
+                        self.failures += 1
+                        stats["failures"] += 1
+                        task["attempts"] += 1
+                        task["node"] = None
+                        if task["attempts"] >= self.max_attempts:
+                            errors.append(str(e))
+                        else:
+                            self.reassigned += 1
+                            queue.append(task)
+                        condition.notify_all()
+                    continue
+
+                with condition:
+                    results.append(result)
+                    outstanding -= 1
+                    stats["tasks"] += 1
+                    stats["rows"] += result.get("rows", 0)
+                    stats["seconds"] = round(stats["seconds"] + result.get("seconds", 0.0), 4)
+                    condition.notify_all()
+
+        threads = [threading.Thread(target=serve, args=(i,), daemon=True) for i, node in enumerate(self.nodes) if node.alive]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors:
+            raise RuntimeError(f"Distributed training task failed {self.max_attempts} times: {errors[0]}")
+        if outstanding:
+            raise RuntimeError("All training nodes failed")
+        return results
+
+
+def shard_ranges(rows: int, shards: int) -> List[Tuple[int, int]]:
+    bounds = np.linspace(0, rows, max(1, min(shards, rows)) + 1).astype(int)
+    return [(int(bounds[i]), int(bounds[i + 1])) for i in range(len(bounds) - 1)]
+
+
+def average_models(results: List[Dict]):
+    """
+    Row-weighted average of the fitted state of the node models
+    """
+    results = [result for result in results if result["rows"]]
+    if not results:
+        raise ValueError("No training rows were processed")
+    weights = np.array([result["rows"] for result in results], dtype=np.float64)
+    weights /= weights.sum()
+
+    model = results[0]["model"]
+    for name in AVERAGED_ATTRIBUTES:
+        if getattr(model, name, None) is not None:
+            setattr(model, name, sum(w * np.asarray(getattr(r["model"], name)) for w, r in zip(weights, results)))
+    if hasattr(model, "t_"):
+        model.t_ = float(sum(w * r["model"].t_ for w, r in zip(weights, results)))
+    return model
+
+
+def _weighted_score(results: List[Dict]) -> Optional[float]:
+    scored = [result for result in results if result.get("score_sum") is not None]
+    rows = sum(result["rows"] for result in scored)
+    return sum(result["score_sum"] for result in scored) / rows if rows else None
+
+
+def train_distributed(
+    dataset_id: str,
+    user_id: str,
+    model_params: Dict,
+    artifact_path: str,
+    report_progress: Callable = lambda progress, message=None: None,
+    nodes: Optional[List] = None
+) -> Dict:
+    """
+    Train a partial_fit estimator across nodes and persist the merged model
+    to artifact_path, as train_estimator does for single-process training
+    """
+    task = model_params.get("task", "classification")
+    estimator_name = model_params.get("estimator", "sgd")
+    if estimator_name not in PARTIAL_FIT_ESTIMATORS:
+        raise ValueError(f"Distributed training supports {PARTIAL_FIT_ESTIMATORS}, not {estimator_name}")
+    target = model_params.get("target")
+    if not target:
+        raise ValueError("model_params.target is required")
+    config = model_params.get("distributed") or {}
+    rounds = int(config.get("rounds", 10))
+    local_epochs = int(config.get("local_epochs", 1))
+    patience = int(config.get("patience", 2))
+    tol = float(config.get("tol", 1e-4))
+    random_state = int(model_params.get("random_state", 0))
+    model = build_estimator(estimator_name, task, model_params.get("params")).named_steps["model"]
+
+    started = time.perf_counter()
+    report_progress(0.0, "sharding")
+
+    # Resolve features and build cached feature partitions once, not on every node
+    feature_spec = model_params.get("feature_spec")
+    if feature_spec:
+        features = feature_names(feature_spec)
+        total_rows = build_features(dataset_id, user_id, feature_spec)["rows"]
+        head = load_features(dataset_id, user_id, feature_spec, None, (0, min(total_rows, HEAD_ROWS)))
+    else:
+        manifest = get_dataset_manifest(dataset_id, user_id)
+        if manifest is None:
+            load_dataset_frame(dataset_id, user_id, None, (0, 0))
+            manifest = get_dataset_manifest(dataset_id, user_id)
+        total_rows = manifest["rows"]
+        head = load_dataset_frame(dataset_id, user_id, None, (0, min(total_rows, HEAD_ROWS)))
+        features = model_params.get("features") or [column for column in head.columns if column != target]
+    # Shards cannot agree on category codes, so only numeric features are supported
+    categorical = list(build_vocabulary(head, features))
+    if categorical:
+        raise ValueError(f"Distributed training needs numeric features; {categorical} are not")
+
+    source = {
+        "run_id": uuid.uuid4().hex,
+        "dataset_id": dataset_id,
+        "user_id": user_id,
+        "model_params": {**model_params, "features": features}
+    }
+
+    coordinator = TrainingCoordinator(nodes, int(config.get("nodes", DISTRIBUTED_NODES)))
+    try:
+        shards = shard_ranges(total_rows, int(config.get("shards", len(coordinator.nodes))))
+        assignments = [shards[i::len(coordinator.nodes)] for i in range(len(coordinator.nodes))]
+
+        described = coordinator.run_round(describe_shards, (source,), assignments)
+        count, total, total_squared = sum(result["stats"] for result in described)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.where(count > 0, total / count, 0.0)
+            std = np.sqrt(np.maximum(np.where(count > 0, total_squared / count, 0.0) - mean ** 2, 0.0))
+        scale = np.where(std > 0, std, 1.0)
+        source.update(mean=mean, scale=scale)
+        if task == "classification":
+            source["classes"] = np.array(sorted({label for result in described for label in result["labels"]}))
+
+        history = []
+        best = None
+        since_best = 0
+        for round_index in range(rounds):
+            round_started = time.perf_counter()
+            results = coordinator.run_round(train_shards, (source, model, local_epochs, random_state + round_index), assignments)
+            model = average_models(results)
+            # Nodes score the incoming model, i.e. the previous round's average
+            score = _weighted_score(results)
+            rows = sum(result["rows"] for result in results)
+            seconds = time.perf_counter() - round_started
+            history.append({
+                "round": round_index,
+                "rows": rows,
+                "seconds": round(seconds, 4),
+                "rows_per_second": round(rows * local_epochs / seconds) if seconds > 0 else None,
+                "previous_round_score": score
+            })
+            report_progress(0.95 * (round_index + 1) / rounds, f"round {round_index + 1}/{rounds}")
+
+            if score is not None:
+                if best is None or score > best + tol:
+                    best = score
+                    since_best = 0
+                else:
+                    since_best += 1
+                    if patience and since_best >= patience:
+                        break
+
+        scored = coordinator.run_round(score_shards, (source, model), assignments)
+        final_score = _weighted_score(scored)
+    finally:
+        coordinator.close()
+
+    # Fold the standardisation into the coefficients so the artifact takes raw features
+    coef = np.asarray(model.coef_) / scale
+    model.coef_ = coef
+    model.intercept_ = np.asarray(model.intercept_) - coef @ mean
+    estimator = Pipeline([("impute", SimpleImputer().fit(mean[None, :])), ("model", model)])
+
+    os.makedirs(os.path.dirname(artifact_path), exist_ok=True)
+    tmp_path = f"{artifact_path}.tmp"
+    joblib.dump(estimator, tmp_path)
+    os.replace(tmp_path, artifact_path)
+
+    train_seconds = sum(entry["seconds"] for entry in history)
+    trained_rows = sum(entry["rows"] for entry in history) * local_epochs
+    return {
+        "task": task,
+        "target": target,
+        "features": features,
+        "estimator": estimator_name,
+        "artifact": artifact_path,
+        "best_params": model_params.get("params") or {},
+        "best_score": final_score,
+        "rows": sum(result["rows"] for result in described),
+        "distributed": {
+            "nodes": len(coordinator.nodes),
+            "shards": len(shards),
+            "rounds": history,
+            "failures": coordinator.failures,
+            "reassigned": coordinator.reassigned,
+            "node_stats": coordinator.node_stats
+        },
+        "timings": {
+            "train_seconds": round(train_seconds, 4),
+            "train_rows_per_second": round(trained_rows / train_seconds) if train_seconds > 0 else None,
+            "total_seconds": round(time.perf_counter() - started, 4)
+        }
+    }
@@ -0,0 +1,222 @@
+from typing import Dict, Iterable, List, Optional
+import time
+import numpy as np
+import pandas as pd
+
+EVALUATION_BATCH_SIZE = 50000
+
+
+def _float_values(values: pd.Series) -> Optional[np.ndarray]:
+    """
+    Column as float64 with NaN for missing values, or None if any present
+    value is not a number
+    """
+    if pd.api.types.is_numeric_dtype(values.dtype):
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(object)
+    numeric = pd.to_numeric(values, errors="coerce")
+    if numeric.isna().sum() > values.isna().sum():
+        return None
+    return numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def numeric_values(values: pd.Series, name: str) -> np.ndarray:
+    """
+    Column as float64 with NaN for missing values; non-numeric values are rejected
+    """
+    result = _float_values(values)
+    if result is None:
+        raise ValueError(f"Column '{name}' has non-numeric values")
+    return result
+
+
+def build_vocabulary(frame: pd.DataFrame, features: List[str]) -> Dict[str, List[str]]:
+    """
+    Sorted category values of each non-numeric feature column. Models keep
+    the vocabulary they were trained with, so a category gets the same code
+    in every dataset and request they see
+    """
+    vocabulary = {}
+    for feature in features:
+        if feature in frame.columns and _float_values(frame[feature]) is None:
+            vocabulary[feature] = sorted(set(frame[feature].dropna().astype(str)))
+    return vocabulary
+
+
+def to_feature_matrix(frame: pd.DataFrame, features: List[str], vocabulary: Optional[Dict[str, List[str]]] = None) -> np.ndarray:
+    """
+    Convert feature columns to a float64 matrix, with NaN for missing values.
+    Features in the vocabulary become the position of their value in it,
+    with NaN for values it does not contain; other features must be numeric
+    """
+    vocabulary = vocabulary or {}
+    columns = []
+    for feature in features:
+        if feature not in frame.columns:
+            columns.append(np.full(len(frame), np.nan))
+        elif feature in vocabulary:
+            values = frame[feature]
+            codes = pd.Index(vocabulary[feature]).get_indexer(values.astype(str))
+            columns.append(np.where(values.notna().to_numpy() & (codes >= 0), codes, np.nan))
+        else:
+            columns.append(numeric_values(frame[feature], feature))
+    if not columns:
+        return np.empty((len(frame), 0))
+    return np.column_stack(columns)
+
+
+class ClassificationMetrics:
+    """
+    Streaming confusion matrix; labels are discovered as batches arrive
+    """
+
+    def __init__(self, labels: Optional[Iterable] = None):
+        self.labels = []
+        self._index = {}
+        self.matrix = np.zeros((0, 0), dtype=np.int64)
+        for label in labels if labels is not None else []:
+            self._label_index(label.item() if hasattr(label, "item") else label)
+
+    def _label_index(self, label) -> int:
+        if label not in self._index:
+            self._index[label] = len(self.labels)
+            self.labels.append(label)
+            size = len(self.labels)
+            grown = np.zeros((size, size), dtype=np.int64)
+            grown[:size - 1, :size - 1] = self.matrix
+            self.matrix = grown
+        return self._index[label]
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray) -> None:
+        # Only the distinct labels of a batch go through Python; rows stay vectorized
+        uniques, inverse = np.unique(np.concatenate([y_true, y_pred]), return_inverse=True)
+        mapping = np.array([self._label_index(label.item() if hasattr(label, "item") else label) for label in uniques])
+        codes = mapping[inverse]
+        true_codes, pred_codes = codes[:len(y_true)], codes[len(y_true):]
+        size = len(self.labels)
+        self.matrix += np.bincount(true_codes * size + pred_codes, minlength=size * size).reshape(size, size)
+
+    def result(self) -> Dict:
+        total = self.matrix.sum()
+        correct = np.trace(self.matrix)
+        support = self.matrix.sum(axis=1)
+        predicted = self.matrix.sum(axis=0)
+        true_positive = np.diag(self.matrix)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(predicted > 0, true_positive / predicted, 0.0)
+            recall = np.where(support > 0, true_positive / support, 0.0)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+
+        weights = support / total if total else np.zeros_like(support, dtype=np.float64)
+        return {
+            "accuracy": float(correct / total) if total else 0.0,
+            "precision": float(np.dot(weights, precision)),
+            "recall": float(np.dot(weights, recall)),
+            "f1_score": float(np.dot(weights, f1)),
+            "average": "weighted",
+            "labels": [label if isinstance(label, (str, int, float, bool)) else str(label) for label in self.labels],
+            "confusion_matrix": self.matrix.tolist()
+        }
+
+
+class RegressionMetrics:
+    """
+    Streaming error sums for regression metrics. The target's variance is
+    kept as a running mean and sum of squared deviations, merged batch by
+    batch (Chan et al.), so R^2 stays accurate for targets with a large offset
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum_squared_error = 0.0
+        self.sum_absolute_error = 0.0
+        self.mean_true = 0.0
+        self.m2_true = 0.0
+
+    def update(self, y_true: np.ndarray, y_pred: np.ndarray) -> None:
+        y_true = y_true.astype(np.float64)
+        if not len(y_true):
+            return
+        error = y_true - y_pred.astype(np.float64)
+        self.sum_squared_error += float(np.dot(error, error))
+        self.sum_absolute_error += float(np.abs(error).sum())
+
+        batch_count = len(y_true)
+        batch_mean = float(y_true.mean())
+        deviation = y_true - batch_mean
+        batch_m2 = float(np.dot(deviation, deviation))
+        total = self.count + batch_count
+        delta = batch_mean - self.mean_true
+        self.mean_true += delta * batch_count / total
+        self.m2_true += batch_m2 + delta * delta * self.count * batch_count / total
+        self.count = total
+
+    def result(self) -> Dict:
+        if not self.count:
+            return {"mse": 0.0, "rmse": 0.0, "mae": 0.0, "r2": 0.0}
+        mse = self.sum_squared_error / self.count
+        return {
+            "mse": mse,
+            "rmse": float(np.sqrt(mse)),
+            "mae": self.sum_absolute_error / self.count,
+            "r2": 1.0 - self.sum_squared_error / self.m2_true if self.m2_true > 0 else 0.0
+        }
+
+
+def evaluate_batches(
+    estimator,
+    batches: Iterable[pd.DataFrame],
+    features: List[str],
+    target: str,
+    task: str = "classification"
+) -> Dict:
+    """
+    Run an estimator over batches of test data and accumulate quality and speed metrics
+    """
+    if task == "classification":
+        metrics = ClassificationMetrics(getattr(estimator, "classes_", None))
+    else:
+        metrics = RegressionMetrics()
+
+    # Category codes of the training data, saved on the artifact by train_estimator
+    vocabulary = getattr(estimator, "feature_vocabulary_", None)
+    latencies = []
+    rows = 0
+    started = time.perf_counter()
+
+    for batch in batches:
+        if target not in batch.columns:
+            raise ValueError(f"Test data is missing target column '{target}'")
+        batch = batch[batch[target].notna()]
+        if batch.empty:
+            continue
+
+        X = to_feature_matrix(batch, features, vocabulary)
+        y_true = batch[target].to_numpy()
+
+        batch_started = time.perf_counter()
+        y_pred = np.asarray(estimator.predict(X))
+        latencies.append(time.perf_counter() - batch_started)
+
+        metrics.update(y_true, y_pred)
+        rows += len(batch)
+
+    elapsed = time.perf_counter() - started
+    predict_time = sum(latencies)
+    latency_ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+
+    return {
+        **metrics.result(),
+        "task": task,
+        "rows": rows,
+        "batches": len(latencies),
+        "elapsed_seconds": round(elapsed, 4),
+        "rows_per_second": round(rows / predict_time) if predict_time > 0 else None,
+        "batch_latency_ms": {
+            "p50": round(float(np.percentile(latency_ms, 50)), 3),
+            "p95": round(float(np.percentile(latency_ms, 95)), 3),
+            "max": round(float(latency_ms.max()), 3)
+        }
+    }
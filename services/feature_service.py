@@ -0,0 +1,328 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import hashlib
+import json
+import os
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from services.data_service import get_dataset_manifest, iter_dataset_frames, load_dataset_frame
+from services.dataset_store import append_partition, iter_partitions, lock_dataset, read_manifest, write_dataset
+from services.evaluation_service import numeric_values
+
+FEATURES_DIR = "data/features"
+
+ROLLING_AGGREGATES = ("sum", "mean", "min", "max", "std", "count")
+TIME_PARTS = ("hour", "weekday", "day")
+
+# Example spec:
+# [
+#     {"name": "amount", "op": "column", "column": "amount"},
+#     {"name": "fee_ratio", "op": "ratio", "numerator": "fee", "denominator": "amount"},
+#     {"name": "amount_sum_100", "op": "rolling", "column": "amount", "window": 100, "agg": "sum"},
+#     {"name": "fee_mean_1h", "op": "rolling", "column": "fee", "window": 3600, "time_column": "timestamp"},
+#     {"name": "token_in_volume_1d", "op": "rolling", "column": "amount", "window": 86400,
+#      "time_column": "timestamp", "by": "token_in", "agg": "sum"},
+#     {"name": "hour", "op": "time_part", "column": "timestamp", "part": "hour"},
+# ]
+
+
+def validate_feature_spec(spec: List[Dict]) -> None:
+    if not isinstance(spec, list) or not spec:
+        raise ValueError("Feature spec must be a non-empty list")
+
+    names = set()
+    for feature in spec:
+        name = feature.get("name")
+        op = feature.get("op")
+        if not name or name in names:
+            raise ValueError(f"Feature names must be present and unique: {name!r}")
+        names.add(name)
+
+        if op in ("column", "time_part") and not feature.get("column"):
+            raise ValueError(f"Feature {name} needs a column")
+        elif op == "ratio" and not (feature.get("numerator") and feature.get("denominator")):
+            raise ValueError(f"Feature {name} needs a numerator and a denominator")
+        elif op == "rolling":
+            if not feature.get("column") or not feature.get("window") or feature["window"] <= 0:
+                raise ValueError(f"Feature {name} needs a column and a positive window")
+            if feature.get("agg", "mean") not in ROLLING_AGGREGATES:
+                raise ValueError(f"Feature {name} has unsupported aggregate {feature.get('agg')}")
+        elif op not in ("column", "time_part", "ratio", "rolling"):
+            raise ValueError(f"Feature {name} has unsupported op {op}")
+
+        if op == "time_part" and feature.get("part") not in TIME_PARTS:
+            raise ValueError(f"Feature {name} needs part to be one of {TIME_PARTS}")
+
+
+def feature_spec_hash(spec: List[Dict]) -> str:
+    canonical = json.dumps(spec, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+
+def feature_names(spec: List[Dict]) -> List[str]:
+    return [feature["name"] for feature in spec]
+
+
+def _source_columns(spec: List[Dict]) -> List[str]:
+    columns = []
+    for feature in spec:
+        for key in ("column", "numerator", "denominator", "time_column", "by"):
+            if feature.get(key) and feature[key] not in columns:
+                columns.append(feature[key])
+    return columns
+
+
+def _numeric(frame: pd.DataFrame, column: str) -> np.ndarray:
+    # Category codes differ between frames, so source columns must be numbers
+    return numeric_values(frame[column], column)
+
+
+def _rolling(frame: pd.DataFrame, feature: Dict) -> np.ndarray:
+    """
+    Row-count or time-based rolling aggregate, optionally per group
+    """
+    work = pd.DataFrame({"v": _numeric(frame, feature["column"])})
+    window = feature["window"]
+    on = None
+
+    if feature.get("time_column"):
+        times = _numeric(frame, feature["time_column"])
+        work["t"] = pd.to_datetime(times, unit="s")
+        window = pd.Timedelta(seconds=window)
+        on = "t"
+        # Time windows need ordered timestamps; rows without one get no value
+        work = work[~np.isnan(times)]
+        if not work["t"].is_monotonic_increasing:
+            work = work.iloc[np.argsort(work["t"].to_numpy(), kind="stable")]
+    else:
+        window = int(window)
+
+    agg = feature.get("agg", "mean")
+    if feature.get("by"):
+        work["g"] = frame[feature["by"]].to_numpy()[work.index]
+        grouped = work.groupby("g", sort=False, dropna=False, observed=True)
+        # Aggregating the whole frame keeps row positions in the result index;
+        # selecting "v" first would index it by timestamp instead
+        rolled = getattr(grouped.rolling(window, min_periods=1, on=on), agg)()["v"].droplevel(0)
+    else:
+        rolled = getattr(work.rolling(window, min_periods=1, on=on)["v"], agg)()
+
+    return rolled.reindex(pd.RangeIndex(len(frame))).to_numpy(dtype=np.float64)
+
+
+def compute_features(frame: pd.DataFrame, spec: List[Dict]) -> pd.DataFrame:
+    """
+    Evaluate a feature spec over a frame; rows keep the frame's order
+    """
+    index = frame.index
+    frame = frame.reset_index(drop=True)
+    columns = {}
+
+    for feature in spec:
+        op = feature["op"]
+        if op == "column":
+            values = frame[feature["column"]]
+            # Numeric and categorical columns pass through without a copy
+            columns[feature["name"]] = values.to_numpy() if values.dtype.kind in "biuf" else values.array
+        elif op == "ratio":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                ratio = _numeric(frame, feature["numerator"]) / _numeric(frame, feature["denominator"])
+            ratio[~np.isfinite(ratio)] = np.nan
+            columns[feature["name"]] = ratio
+        elif op == "rolling":
+            columns[feature["name"]] = _rolling(frame, feature)
+        elif op == "time_part":
+            times = pd.to_datetime(_numeric(frame, feature["column"]), unit="s")
+            part = {"hour": times.hour, "weekday": times.weekday, "day": times.day}[feature["part"]]
+            columns[feature["name"]] = np.asarray(part, dtype=np.float64)
+
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def _context_requirements(spec: List[Dict]) -> Tuple[int, float, bool]:
+    """
+    History a new partition needs: trailing rows, trailing seconds, and
+    whether some grouped row window needs each group's own trailing rows
+    """
+    rows = 0
+    seconds = 0.0
+    per_group = False
+    for feature in spec:
+        if feature["op"] != "rolling":
+            continue
+        if feature.get("time_column"):
+            seconds = max(seconds, float(feature["window"]))
+        elif feature.get("by"):
+            per_group = True
+        else:
+            rows = max(rows, int(feature["window"]) - 1)
+    return rows, seconds, per_group
+
+
+def _context(
+    dataset_id: str,
+    user_id: str,
+    done: int,
+    first: pd.DataFrame,
+    spec: List[Dict],
+    columns: List[str]
+) -> Optional[pd.DataFrame]:
+    """
+    Read back just enough earlier rows for the rolling features of a new
+    partition to match a full recomputation
+    """
+    rows, seconds, per_group = _context_requirements(spec)
+    if done == 0 or (rows == 0 and seconds == 0 and not per_group):
+        return None
+
+    time_columns = [feature["time_column"] for feature in spec if feature["op"] == "rolling" and feature.get("time_column")]
+    start_time = None
+    if seconds:
+        first_times = np.concatenate([_numeric(first, column) for column in time_columns])
+        start_time = np.nanmin(first_times) - seconds if np.isfinite(first_times).any() else None
+
+    frames = []
+    total = 0
+    for partition in range(done - 1, -1, -1):
+        frame = next(iter_dataset_frames(dataset_id, user_id, columns, partitions=[partition]), None)
+        if frame is None:
+            continue
+        frames.append(frame)
+        total += len(frame)
+        if per_group:
+            # Any group's last rows may sit arbitrarily far back
+            continue
+        covered_time = start_time is None or all(
+            np.nanmin(_numeric(frame, column), initial=np.inf) <= start_time for column in time_columns
+        )
+        if total >= rows and covered_time:
+            break
+
+    if not frames:
+        return None
+    history = pd.concat(frames[::-1])
+
+    # Union of per-rule suffixes; within every group this is still a suffix
+    keep = np.zeros(len(history), dtype=bool)
+    if rows:
+        keep[-rows:] = True
+    if start_time is not None:
+        for column in time_columns:
+            keep |= _numeric(history, column) >= start_time
+    for feature in spec:
+        if feature["op"] == "rolling" and feature.get("by") and not feature.get("time_column"):
+            tail = history.reset_index(drop=True).groupby(feature["by"], sort=False, dropna=False, observed=True).tail(int(feature["window"]) - 1)
+            keep[tail.index.to_numpy()] = True
+    return history[keep]
+
+
+def _features_path(dataset_id: str, user_id: str, spec_hash: str) -> str:
+    return f"{FEATURES_DIR}/{user_id}/{dataset_id}/{spec_hash}"
+
+
+def build_features(dataset_id: str, user_id: str, spec: List[Dict]) -> Dict:
+    """
+    Bring the cached feature matrix of a dataset up to date, computing
+    only the source partitions it has not seen yet
+    """
+    validate_feature_spec(spec)
+    spec_hash = feature_spec_hash(spec)
+    path = _features_path(dataset_id, user_id, spec_hash)
+    columns = _source_columns(spec)
+    started = time.perf_counter()
+
+    source = get_dataset_manifest(dataset_id, user_id)
+    if source is None:
+        # Converts a dataset still stored in the legacy JSON format, or raises
+        load_dataset_frame(dataset_id, user_id, columns[:1], (0, 0))
+        source = get_dataset_manifest(dataset_id, user_id)
+
+    with lock_dataset(path):
+        cached = read_manifest(path) if os.path.isdir(path) else None
+        done = len(cached["partitions"]) if cached else 0
+
+        # The cache only holds while the source partitions it covers are unchanged
+        stale = done > len(source["partitions"]) or any(
+            entry.get("metadata", {}).get("source") != {"name": partition["name"], "rows": partition["rows"]}
+            for entry, partition in zip(cached["partitions"] if cached else [], source["partitions"])
+        )
+        if stale:
+            shutil.rmtree(path)
+            done = 0
+
+        computed = 0
+        for index in range(done, len(source["partitions"])):
+            partition = source["partitions"][index]
+            frame = next(iter_dataset_frames(dataset_id, user_id, columns, partitions=[index]))
+            history = _context(dataset_id, user_id, index, frame, spec, columns)
+
+            if history is not None and len(history):
+                features = compute_features(pd.concat([history, frame]), spec).iloc[len(history):]
+            else:
+                features = compute_features(frame, spec)
+
+            metadata = {"source": {"name": partition["name"], "rows": partition["rows"]}}
+            if os.path.isdir(path):
+                append_partition(path, features, metadata=metadata)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                write_dataset(path, features, metadata=metadata)
+            computed += 1
+
+    return {
+        "dataset_id": dataset_id,
+        "spec_hash": spec_hash,
+        "features": feature_names(spec),
+        "rows": source["rows"],
+        "partitions": len(source["partitions"]),
+        "computed_partitions": computed,
+        "cached": computed == 0,
+        "elapsed_seconds": round(time.perf_counter() - started, 4)
+    }
+
+
+def iter_feature_frames(
+    dataset_id: str,
+    user_id: str,
+    spec: List[Dict],
+    source_columns: Optional[List[str]] = None,
+    batch_size: Optional[int] = None,
+    rows: Optional[Tuple[int, int]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream the feature matrix one partition or batch_size rows at a time,
+    joined with source columns such as the training target
+    """
+    build_features(dataset_id, user_id, spec)
+    path = _features_path(dataset_id, user_id, feature_spec_hash(spec))
+
+    sources = iter_dataset_frames(dataset_id, user_id, source_columns, rows=rows) if source_columns else None
+    for features in iter_partitions(path, feature_names(spec), rows):
+        if sources is not None:
+            # Feature partitions line up with source partitions row for row
+            source = next(sources)
+            for column in source_columns:
+                if column not in features.columns:
+                    features[column] = source[column].array
+        if batch_size is None:
+            yield features
+            continue
+        for start in range(0, len(features), batch_size):
+            yield features.iloc[start:start + batch_size]
+
+
+def load_features(
+    dataset_id: str,
+    user_id: str,
+    spec: List[Dict],
+    source_columns: Optional[List[str]] = None,
+    rows: Optional[Tuple[int, int]] = None
+) -> pd.DataFrame:
+    """
+    Load the feature matrix, or a row range of it, computing or extending it if needed
+    """
+    frames = list(iter_feature_frames(dataset_id, user_id, spec, source_columns, rows=rows))
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames) if frames else pd.DataFrame(columns=feature_names(spec) + (source_columns or []))
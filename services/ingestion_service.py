@@ -0,0 +1,215 @@
+from typing import Dict, Iterator, List, Optional, Tuple
+import datetime
+import os
+import threading
+import time
+
+from services.data_service import append_to_dataset, dataset_lock, get_dataset_manifest, process_onchain_columns
+from services.solana_service import PROGRAM_ID, get_solana_service
+from services.storage_service import get_storage
+
+# Owner of the datasets written by ingestion, as passed to load_dataset
+INGESTION_USER_ID = os.getenv("ZEPHYR_INGESTION_USER", "ingestion")
+INGESTION_BATCH_SIZE = int(os.getenv("ZEPHYR_INGESTION_BATCH_SIZE", 500))
+INGESTION_INTERVAL = float(os.getenv("ZEPHYR_INGESTION_INTERVAL", 30))
+
+# How far back, in seconds, the first run reaches when there is no checkpoint
+INGESTION_LOOKBACK = float(os.getenv("ZEPHYR_INGESTION_LOOKBACK", 86400))
+
+
+class IngestionError(Exception):
+    pass
+
+
+class IngestionService:
+    """
+    Follows a program's signatures from a checkpoint and appends new
+    transactions to a partitioned dataset, one micro-batch per partition.
+
+    The checkpoint is stored in the metadata of the partition that holds the
+    batch, so a batch and its checkpoint become visible in the same manifest
+    write and a crashed run can neither skip nor duplicate rows. The source
+    must provide get_signatures_since(until, start_timestamp, before), a
+    newest-first iterator, and get_transactions(signatures), returning None
+    for failed fetches, as SolanaService does
+    """
+
+    def __init__(
+        self,
+        source=None,
+        program: str = PROGRAM_ID,
+        user_id: str = INGESTION_USER_ID,
+        batch_size: int = INGESTION_BATCH_SIZE,
+        interval: float = INGESTION_INTERVAL,
+        lookback: float = INGESTION_LOOKBACK
+    ):
+        self.source = source if source is not None else get_solana_service()
+        self.program = program
+        self.user_id = user_id
+        self.dataset_id = f"onchain-{program}"
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.lookback = lookback
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def checkpoint(self) -> Optional[Dict]:
+        """
+        The newest signature already ingested, or None before the first batch
+        """
+        manifest = get_dataset_manifest(self.dataset_id, self.user_id)
+        for partition in reversed(manifest["partitions"] if manifest else []):
+            checkpoint = partition.get("metadata", {}).get("checkpoint")
+            if checkpoint:
+                return checkpoint
+        return None
+
+    def _signatures(self, checkpoint: Optional[Dict], start_timestamp: float, before: Optional[str] = None) -> Iterator[Dict]:
+        if checkpoint:
+            return self.source.get_signatures_since(until=checkpoint["signature"], before=before)
+        return self.source.get_signatures_since(start_timestamp=start_timestamp, before=before)
+
+    def _batch_cursors(self, checkpoint: Optional[Dict], start_timestamp: float) -> List[Optional[str]]:
+        """
+        Walk the backlog newest first and keep, per batch_size signatures, the
+        signature just newer than the batch (None for the newest batch). Only
+        these cursors are held, so a long backlog is never loaded at once
+        """
+        cursors = []
+        previous = None
+        for count, sig in enumerate(self._signatures(checkpoint, start_timestamp)):
+            if count % self.batch_size == 0:
+                cursors.append(previous)
+            previous = sig["signature"]
+        return cursors
+
+    def _fetch_batch(self, batch: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Fetch a batch's transactions, retrying failed ones once. Returns the
+        longest prefix of the batch that was fully fetched and its records
+        """
+        signatures = [sig["signature"] for sig in batch]
+        records = self.source.get_transactions(signatures)
+        missing = [i for i, record in enumerate(records) if record is None]
+        if missing:
+            for i, record in zip(missing, self.source.get_transactions([signatures[i] for i in missing])):
+                records[i] = record
+
+        fetched = next((i for i, record in enumerate(records) if record is None), len(records))
+        return batch[:fetched], records[:fetched]
+
+    def run_once(self) -> Dict:
+        """
+        Ingest everything newer than the checkpoint, oldest first. A
+        transaction that cannot be fetched stops the run just before it, so
+        the next run resumes there instead of skipping it
+        """
+        # The dataset lock serialises runs across processes, e.g. app workers
+        with self._lock, dataset_lock(self.dataset_id, self.user_id):
+            started = time.perf_counter()
+            start_timestamp = time.time() - self.lookback
+            checkpoint = self.checkpoint()
+
+            rows = 0
+            batches = 0
+            signatures = 0
+            for cursor in reversed(self._batch_cursors(checkpoint, start_timestamp)):
+                # Bounded above by the cursor and below by the advancing checkpoint
+                batch = list(self._signatures(checkpoint, start_timestamp, before=cursor))
+                batch.reverse()
+                if not batch:
+                    continue
+
+                complete, records = self._fetch_batch(batch)
+                if complete:
+                    frame = process_onchain_columns(records)
+                    last = complete[-1]
+                    checkpoint = {"signature": last["signature"], "slot": last.get("slot"), "blockTime": last.get("blockTime")}
+                    append_to_dataset(self.dataset_id, self.user_id, frame, {"checkpoint": checkpoint, "signatures": len(complete)})
+                    rows += len(frame)
+                    batches += 1
+                    signatures += len(complete)
+
+                if len(complete) < len(batch):
+                    failed = batch[len(complete)]["signature"]
+                    self._record_status({"signatures": signatures, "rows": rows, "batches": batches}, f"Could not fetch transaction {failed}")
+                    raise IngestionError(f"Could not fetch transaction {failed}; ingestion will resume from it")
+
+            return self._record_status({
+                "signatures": signatures,
+                "rows": rows,
+                "batches": batches,
+                "elapsed_seconds": round(time.perf_counter() - started, 3)
+            })
+
+    def _record_status(self, last_run: Dict, error: Optional[str] = None) -> Dict:
+        manifest = get_dataset_manifest(self.dataset_id, self.user_id)
+        status = {
+            "program": self.program,
+            "dataset_id": self.dataset_id,
+            "user_id": self.user_id,
+            "checkpoint": self.checkpoint(),
+            "total_rows": manifest["rows"] if manifest else 0,
+            "partitions": len(manifest["partitions"]) if manifest else 0,
+            "last_run": {**last_run, "finished_at": str(datetime.datetime.now())},
+            "error": error
+        }
+        get_storage().put("ingestion", self.dataset_id, status)
+        return status
+
+    def status(self) -> Dict:
+        status = get_storage().get("ingestion", self.dataset_id) or {
+            "program": self.program,
+            "dataset_id": self.dataset_id,
+            "user_id": self.user_id,
+            "checkpoint": self.checkpoint()
+        }
+        status["running"] = self._thread is not None and self._thread.is_alive()
+        return status
+
+    def run_forever(self) -> None:
+        """
+        Ingest every interval until stop() is called
+        """
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except IngestionError as e:
+                # Status was recorded with the partial progress of the run
+                print(f"Error ingesting on-chain data: {str(e)}")
+            except Exception as e:
+                print(f"Error ingesting on-chain data: {str(e)}")
+                self._record_status({}, str(e))
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="onchain-ingestion", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+_ingestion_service = None
+_ingestion_service_lock = threading.Lock()
+
+def get_ingestion_service() -> IngestionService:
+    """
+    Return the shared IngestionService for the configured program
+    """
+    global _ingestion_service
+    if _ingestion_service is None:
+        with _ingestion_service_lock:
+            if _ingestion_service is None:
+                _ingestion_service = IngestionService()
+    return _ingestion_service
+
+
+if __name__ == '__main__':
+    # Standalone daemon: python -m services.ingestion_service
+    get_ingestion_service().run_forever()
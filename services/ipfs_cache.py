@@ -0,0 +1,232 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, Optional
+import hashlib
+import mmap
+import os
+import threading
+import uuid
+
+IPFS_CACHE_DIR = os.getenv("ZEPHYR_IPFS_CACHE_DIR", "data/cache/ipfs")
+IPFS_MEMORY_CACHE_BYTES = int(os.getenv("ZEPHYR_IPFS_MEMORY_CACHE_BYTES", 256 * 1024 ** 2))
+IPFS_DISK_CACHE_BYTES = int(os.getenv("ZEPHYR_IPFS_DISK_CACHE_BYTES", 10 * 1024 ** 3))
+
+# Objects up to this size are kept in memory, larger ones on disk
+IPFS_SMALL_OBJECT_BYTES = int(os.getenv("ZEPHYR_IPFS_SMALL_OBJECT_BYTES", 4 * 1024 ** 2))
+
+# Range size used when downloading large objects to disk
+IPFS_DOWNLOAD_CHUNK = 8 * 1024 ** 2
+
+
+class IPFSContentCache:
+    """
+    Two-tier cache of immutable IPFS content: an in-memory LRU for small
+    objects and a memory-mapped on-disk store for large ones
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable,
+        cache_dir: str = IPFS_CACHE_DIR,
+        memory_bytes: int = IPFS_MEMORY_CACHE_BYTES,
+        disk_bytes: int = IPFS_DISK_CACHE_BYTES,
+        small_object_bytes: int = IPFS_SMALL_OBJECT_BYTES
+    ):
+        self.client_factory = client_factory
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.small_object_bytes = small_object_bytes
+
+        self._lock = threading.RLock()
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._disk = OrderedDict()
+        self._disk_used = 0
+        self._downloads = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        entries = [entry for entry in os.scandir(cache_dir) if entry.is_file() and not entry.name.endswith(".part")]
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            self._disk[entry.name] = entry.stat().st_size
+            self._disk_used += entry.stat().st_size
+
+    def _key(self, ipfs_hash: str) -> str:
+        # Hashed so IPFS paths never turn into filesystem paths
+        return hashlib.sha256(ipfs_hash.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def _remember(self, key: str, data: bytes) -> None:
+        with self._lock:
+            if key in self._memory or len(data) > self.small_object_bytes:
+                return
+            self._memory[key] = data
+            self._memory_used += len(data)
+            while self._memory_used > self.memory_bytes and self._memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_used -= len(evicted)
+
+    def _touch_disk(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._disk:
+                return False
+            self._disk.move_to_end(key)
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        return True
+
+    def _add_disk(self, key: str, size: int) -> None:
+        with self._lock:
+            self._disk[key] = size
+            self._disk_used += size
+            # Unlinking a file that is still mapped is safe on POSIX systems
+            while self._disk_used > self.disk_bytes and len(self._disk) > 1:
+                victim, victim_size = self._disk.popitem(last=False)
+                self._disk_used -= victim_size
+                try:
+                    os.remove(self._path(victim))
+                except OSError:
+                    pass
+
+    def _download(self, ipfs_hash: str, key: str, size: int) -> None:
+        """
+        Fetch a large object to disk in ranges, so it is never fully in memory
+        """
+        tmp_path = f"{self._path(key)}.{uuid.uuid4().hex}.part"
+        try:
+            with self.client_factory() as client, open(tmp_path, "wb") as f:
+                offset = 0
+                while offset < size:
+                    chunk = client.cat(ipfs_hash, offset=offset, length=min(IPFS_DOWNLOAD_CHUNK, size - offset))
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    offset += len(chunk)
+            if offset != size:
+                raise Exception(f"Truncated download of {ipfs_hash}: got {offset} of {size} bytes")
+            os.replace(tmp_path, self._path(key))
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self._add_disk(key, os.path.getsize(self._path(key)))
+
+    def _ensure_on_disk(self, ipfs_hash: str, key: str, size: int) -> None:
+        # Concurrent readers of the same CID share a single download
+        with self._lock:
+            if key in self._disk:
+                return
+            event = self._downloads.get(key)
+            owner = event is None
+            if owner:
+                event = self._downloads[key] = threading.Event()
+
+        if not owner:
+            event.wait()
+            if key not in self._disk:
+                raise Exception(f"Failed to fetch {ipfs_hash} from IPFS")
+            return
+
+        try:
+            self._download(ipfs_hash, key, size)
+        finally:
+            with self._lock:
+                self._downloads.pop(key, None)
+            event.set()
+
+    def _resolve(self, ipfs_hash: str) -> Optional[bytes]:
+        """
+        Make the object available from a cache tier; returns its bytes when
+        it is small enough to live in memory
+        """
+        key = self._key(ipfs_hash)
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return data
+        if self._touch_disk(key):
+            with self._lock:
+                self.disk_hits += 1
+            return None
+
+        with self._lock:
+            self.misses += 1
+        with self.client_factory() as client:
+            size = int(client.files.stat(f"/ipfs/{ipfs_hash}")["Size"])
+            if size <= self.small_object_bytes:
+                data = client.cat(ipfs_hash)
+        if size <= self.small_object_bytes:
+            self._remember(key, data)
+            return data
+
+        self._ensure_on_disk(ipfs_hash, key, size)
+        return None
+
+    def _open(self, ipfs_hash: str):
+        """
+        Open the on-disk copy, fetching it again if it was evicted meanwhile
+        """
+        key = self._key(ipfs_hash)
+        try:
+            return open(self._path(key), "rb")
+        except FileNotFoundError:
+            with self._lock:
+                self._disk_used -= self._disk.pop(key, 0)
+            self._resolve(ipfs_hash)
+            return open(self._path(key), "rb")
+
+    def get(self, ipfs_hash: str) -> bytes:
+        """
+        Return the whole object as bytes
+        """
+        data = self._resolve(ipfs_hash)
+        if data is not None:
+            return data
+
+        with self._open(ipfs_hash) as f:
+            data = f.read()
+        self._remember(self._key(ipfs_hash), data)
+        return data
+
+    def iter_chunks(self, ipfs_hash: str, chunk_size: int = 1024 ** 2) -> Iterator[bytes]:
+        """
+        Yield the object in chunks without holding large objects in memory
+        """
+        data = self._resolve(ipfs_hash)
+        if data is not None:
+            view = memoryview(data)
+            for offset in range(0, len(data), chunk_size):
+                yield view[offset:offset + chunk_size]
+            return
+
+        with self._open(ipfs_hash) as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            for offset in range(0, size, chunk_size):
+                yield mapped[offset:offset + chunk_size]
+        finally:
+            mapped.close()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_bytes": self._memory_used,
+                "memory_budget": self.memory_bytes,
+                "disk_bytes": self._disk_used,
+                "disk_budget": self.disk_bytes
+            }
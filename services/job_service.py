@@ -0,0 +1,295 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+import os
+import threading
+import time
+from datetime import datetime
+from services.storage_service import get_storage
+
+TRAINING_WORKERS = int(os.getenv("ZEPHYR_TRAINING_WORKERS", os.cpu_count() or 1))
+MAX_JOBS_PER_USER = int(os.getenv("ZEPHYR_MAX_JOBS_PER_USER", 2))
+POLL_INTERVAL = float(os.getenv("ZEPHYR_JOB_POLL_INTERVAL", 1.0))
+# Seconds between checks for jobs left running by a dispatcher process that died
+ORPHAN_CHECK_INTERVAL = float(os.getenv("ZEPHYR_ORPHAN_CHECK_INTERVAL", 30))
+# Times a job goes back to the queue after its worker process died
+MAX_WORKER_CRASHES = int(os.getenv("ZEPHYR_MAX_WORKER_CRASHES", 1))
+
+# Training job records live in the "models" collection, keyed by job id
+JOBS_COLLECTION = "models"
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def report_progress(job_id: str, progress: float, message: Optional[str] = None) -> None:
+    """
+    Record job progress from a worker; raises JobCancelled if cancellation was requested
+    """
+    def set_progress(job: Dict) -> None:
+        job["progress"] = round(min(max(progress, 0.0), 1.0), 4)
+        if message is not None:
+            job["progress_message"] = message
+
+    job = get_storage().update(JOBS_COLLECTION, job_id, set_progress)
+    if job is None or job.get("cancel_requested"):
+        raise JobCancelled(f"Job {job_id} was cancelled")
+
+
+def _run_job(job_id: str) -> Dict:
+    """
+    Worker process entry point
+    """
+    # Imported here to keep model_service -> job_service free of import cycles
+    from services.model_service import run_training
+
+    job = get_storage().get(JOBS_COLLECTION, job_id)
+    if job is None:
+        raise ValueError(f"Job {job_id} not found")
+
+    return run_training(job, lambda progress, message=None: report_progress(job_id, progress, message))
+
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+class TrainingJobQueue:
+    """
+    Persistent priority queue of training jobs executed on a process pool
+    """
+
+    def __init__(
+        self,
+        workers: int = TRAINING_WORKERS,
+        max_jobs_per_user: int = MAX_JOBS_PER_USER,
+        poll_interval: float = POLL_INTERVAL,
+        runner: Callable[[str], Dict] = _run_job
+    ):
+        self.workers = max(1, workers)
+        self.max_jobs_per_user = max(1, max_jobs_per_user)
+        self.poll_interval = poll_interval
+        self.runner = runner
+        self._executor = None
+        self._thread = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._running = {}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._requeue_orphaned()
+            self._stopping.clear()
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            self._thread = threading.Thread(target=self._dispatch_loop, name="training-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._thread is None:
+                return
+            self._stopping.set()
+            self._wakeup.set()
+            thread, self._thread = self._thread, None
+        thread.join()
+        self._executor.shutdown(wait=wait)
+        self._executor = None
+
+    def submit(self, job: Dict) -> Dict:
+        """
+        Persist a pending job and wake the dispatcher
+        """
+        job["status"] = "pending"
+        job.setdefault("priority", 0)
+        job.setdefault("progress", 0.0)
+        get_storage().put(JOBS_COLLECTION, job["id"], job)
+
+        self.start()
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return get_storage().get(JOBS_COLLECTION, job_id)
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """
+        Cancel a pending job immediately, or ask a running job to stop at its next progress report
+        """
+        def request_cancel(job: Dict) -> None:
+            if job["status"] == "pending":
+                job["status"] = "cancelled"
+                job["completed_at"] = str(datetime.now())
+            elif job["status"] == "training":
+                job["cancel_requested"] = True
+
+        return get_storage().update(JOBS_COLLECTION, job_id, request_cancel)
+
+    def _requeue_orphaned(self) -> None:
+        # Jobs whose dispatcher process died mid-run go back to the queue
+        storage = get_storage()
+
+        def requeue(job: Dict) -> None:
+            # Re-checked inside the transaction: the job may have finished or
+            # been claimed by a live dispatcher since it was listed
+            if job["status"] == "training" and not _pid_alive(job.get("dispatcher_pid")):
+                job.update(status="pending", progress=0.0)
+
+        for job in storage.find(JOBS_COLLECTION, status="training"):
+            if not _pid_alive(job.get("dispatcher_pid")):
+                storage.update(JOBS_COLLECTION, job["id"], requeue)
+
+    def _dispatch_loop(self) -> None:
+        orphans_checked = time.monotonic()
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            if time.monotonic() - orphans_checked > ORPHAN_CHECK_INTERVAL:
+                self._requeue_orphaned()
+                orphans_checked = time.monotonic()
+
+            while not self._stopping.is_set():
+                with self._lock:
+                    if len(self._running) >= self.workers:
+                        break
+                job = self._claim_next()
+                if job is None:
+                    break
+                executor = self._executor
+                try:
+                    future = executor.submit(self.runner, job["id"])
+                except BrokenProcessPool:
+                    # The pool broke before its done callbacks ran; the job never started
+                    self._replace_executor(executor)
+                    self._release(job["id"])
+                    continue
+                except Exception as e:
+                    self._finish(job["id"], error=str(e))
+                    continue
+                with self._lock:
+                    self._running[job["id"]] = job["user_id"]
+                future.add_done_callback(
+                    lambda f, job_id=job["id"], executor=executor: self._on_done(job_id, f, executor)
+                )
+
+    def _replace_executor(self, broken: ProcessPoolExecutor) -> None:
+        """
+        Swap a pool whose worker process died (e.g. killed for memory) for a fresh one
+        """
+        with self._lock:
+            if self._executor is not broken or self._stopping.is_set():
+                return
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        broken.shutdown(wait=False)
+
+    def _pending_jobs(self) -> List[Dict]:
+        jobs = get_storage().find(JOBS_COLLECTION, status="pending")
+        return sorted(jobs, key=lambda job: (-job.get("priority", 0), job["created_at"]))
+
+    def _claim_next(self) -> Optional[Dict]:
+        storage = get_storage()
+        for job in self._pending_jobs():
+            claimed = []
+
+            def claim(record: Dict) -> None:
+                # Runs inside the update's transaction, so the per-user count
+                # and the claim cannot interleave with another dispatcher's
+                if record["status"] != "pending":
+                    return
+                training = storage.find(JOBS_COLLECTION, status="training", user_id=record["user_id"])
+                if len(training) >= self.max_jobs_per_user:
+                    return
+                record["status"] = "training"
+                record["started_at"] = str(datetime.now())
+                record["dispatcher_pid"] = os.getpid()
+                claimed.append(True)
+
+            record = storage.update(JOBS_COLLECTION, job["id"], claim)
+            if claimed:
+                return record
+        return None
+
+    def _release(self, job_id: str, crashed: bool = False) -> None:
+        """
+        Put a claimed job back in the queue, or fail it once its worker has
+        died more than MAX_WORKER_CRASHES times
+        """
+        def release(job: Dict) -> None:
+            if job.get("cancel_requested"):
+                job["status"] = "cancelled"
+                job["completed_at"] = str(datetime.now())
+                return
+            if crashed:
+                job["worker_crashes"] = job.get("worker_crashes", 0) + 1
+                if job["worker_crashes"] > MAX_WORKER_CRASHES:
+                    job["status"] = "failed"
+                    job["error"] = "Training worker process died"
+                    job["completed_at"] = str(datetime.now())
+                    return
+            job["status"] = "pending"
+            job["progress"] = 0.0
+
+        with self._lock:
+            self._running.pop(job_id, None)
+        get_storage().update(JOBS_COLLECTION, job_id, release)
+
+    def _on_done(self, job_id: str, future: Future, executor: Optional[ProcessPoolExecutor] = None) -> None:
+        with self._lock:
+            self._running.pop(job_id, None)
+        try:
+            result = future.result()
+        except JobCancelled:
+            self._finish(job_id, status="cancelled")
+        except BrokenProcessPool:
+            # Every job on the pool fails this way, not only the one whose worker died
+            self._replace_executor(executor)
+            self._release(job_id, crashed=True)
+        except Exception as e:
+            self._finish(job_id, error=str(e))
+        else:
+            self._finish(job_id, result=result)
+        self._wakeup.set()
+
+    def _finish(self, job_id: str, status: Optional[str] = None, result: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        def complete(job: Dict) -> None:
+            if error is not None:
+                job["status"] = "failed"
+                job["error"] = error
+            elif status is not None:
+                job["status"] = status
+            else:
+                job["status"] = "completed"
+                job["progress"] = 1.0
+                job.update(result or {})
+            job["completed_at"] = str(datetime.now())
+
+        with self._lock:
+            self._running.pop(job_id, None)
+        get_storage().update(JOBS_COLLECTION, job_id, complete)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> TrainingJobQueue:
+    """
+    Return the process-wide training job queue
+    """
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = TrainingJobQueue()
+    return _queue
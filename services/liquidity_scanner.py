@@ -0,0 +1,284 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+import base64
+import os
+import threading
+import time
+import base58
+import numpy as np
+
+# SPL Token Swap program; its pools share the 324-byte SwapV1 layout
+LIQUIDITY_PROGRAM_ID = os.getenv("ZEPHYR_LIQUIDITY_PROGRAM_ID", "SwapsVeCiPHMUAtzQWZw7RjsKjgCjhwU55QGu4U1Szw")
+
+# Seconds between full pool discovery scans and between reserve refreshes
+LIQUIDITY_DISCOVERY_INTERVAL = float(os.getenv("ZEPHYR_LIQUIDITY_DISCOVERY_INTERVAL", 3600))
+LIQUIDITY_REFRESH_INTERVAL = float(os.getenv("ZEPHYR_LIQUIDITY_REFRESH_INTERVAL", 10))
+
+# Decoding moves to worker processes above this many accounts
+LIQUIDITY_PARALLEL_THRESHOLD = int(os.getenv("ZEPHYR_LIQUIDITY_PARALLEL_THRESHOLD", 20000))
+LIQUIDITY_WORKERS = int(os.getenv("ZEPHYR_LIQUIDITY_WORKERS", os.cpu_count() or 1))
+DECODE_CHUNK = 5000
+
+PUBKEY = "V32"
+
+SWAP_LAYOUT = np.dtype([
+    ("version", "u1"),
+    ("is_initialized", "u1"),
+    ("bump_seed", "u1"),
+    ("token_program_id", PUBKEY),
+    ("token_a", PUBKEY),
+    ("token_b", PUBKEY),
+    ("pool_mint", PUBKEY),
+    ("token_a_mint", PUBKEY),
+    ("token_b_mint", PUBKEY),
+    ("pool_fee_account", PUBKEY),
+    ("trade_fee_numerator", "<u8"),
+    ("trade_fee_denominator", "<u8"),
+    ("owner_trade_fee_numerator", "<u8"),
+    ("owner_trade_fee_denominator", "<u8"),
+    ("owner_withdraw_fee_numerator", "<u8"),
+    ("owner_withdraw_fee_denominator", "<u8"),
+    ("host_fee_numerator", "<u8"),
+    ("host_fee_denominator", "<u8"),
+    ("curve_type", "u1"),
+    ("curve_parameters", PUBKEY),
+])
+assert SWAP_LAYOUT.itemsize == 324
+
+# Token accounts hold their u64 amount at this offset
+TOKEN_AMOUNT_OFFSET = 64
+
+
+def _b58(value) -> str:
+    return base58.b58encode(bytes(value)).decode()
+
+
+def decode_pool_accounts(encoded: Sequence[str]) -> Tuple[bytes, List[str]]:
+    """
+    Decode base64 pool accounts into packed SWAP_LAYOUT rows and the
+    base58 addresses of each pool's two token vaults. Rows of the wrong
+    size are zero-filled so positions stay aligned
+    """
+    size = SWAP_LAYOUT.itemsize
+    raw = bytearray(size * len(encoded))
+    for i, data in enumerate(encoded):
+        account = base64.b64decode(data)
+        if len(account) == size:
+            raw[i * size:(i + 1) * size] = account
+
+    pools = np.frombuffer(bytes(raw), dtype=SWAP_LAYOUT)
+    vaults = [None] * (2 * len(pools))
+    vaults[0::2] = [_b58(key) for key in pools["token_a"]]
+    vaults[1::2] = [_b58(key) for key in pools["token_b"]]
+    return bytes(raw), vaults
+
+
+def decode_token_amounts(accounts: Sequence[Optional[Dict]]) -> np.ndarray:
+    """
+    Decode the 8-byte amount slices returned for token accounts; missing accounts are 0
+    """
+    raw = b"".join(
+        base64.b64decode(account["data"][0]) if account else bytes(8)
+        for account in accounts
+    )
+    return np.frombuffer(raw, dtype="<u8").copy() if raw else np.zeros(0, dtype=np.uint64)
+
+
+_decode_pool = None
+_decode_pool_lock = threading.Lock()
+
+def _get_decode_pool() -> ProcessPoolExecutor:
+    global _decode_pool
+    if _decode_pool is None:
+        with _decode_pool_lock:
+            if _decode_pool is None:
+                _decode_pool = ProcessPoolExecutor(max_workers=LIQUIDITY_WORKERS)
+    return _decode_pool
+
+
+class LiquidityScanner:
+    """
+    Snapshot of liquidity pool state held as NumPy arrays. Pools are
+    discovered with getProgramAccounts, only new or changed rows are
+    replaced, and reserves are refreshed by reading just the amount of
+    each vault account with getMultipleAccounts
+    """
+
+    def __init__(
+        self,
+        rpc,
+        program_id: str = LIQUIDITY_PROGRAM_ID,
+        parallel_threshold: int = LIQUIDITY_PARALLEL_THRESHOLD
+    ):
+        self.rpc = rpc
+        self.program_id = program_id
+        self.parallel_threshold = parallel_threshold
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self.addresses: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.pools = np.zeros(0, dtype=SWAP_LAYOUT)
+        self.vaults: List[str] = []
+        self.reserves = np.zeros((0, 2), dtype=np.uint64)
+        # Snapshot version in which each pool last changed
+        self.updated = np.zeros(0, dtype=np.int64)
+        self.version = 0
+        self.discovered_at = 0.0
+        self.refreshed_at = 0.0
+
+    def _decode(self, encoded: List[str]) -> Tuple[np.ndarray, List[str]]:
+        if len(encoded) < self.parallel_threshold:
+            raw, vaults = decode_pool_accounts(encoded)
+            return np.frombuffer(raw, dtype=SWAP_LAYOUT).copy(), vaults
+
+        chunks = [encoded[i:i + DECODE_CHUNK] for i in range(0, len(encoded), DECODE_CHUNK)]
+        raw = []
+        vaults = []
+        for chunk_raw, chunk_vaults in _get_decode_pool().map(decode_pool_accounts, chunks):
+            raw.append(chunk_raw)
+            vaults.extend(chunk_vaults)
+        return np.frombuffer(b"".join(raw), dtype=SWAP_LAYOUT).copy(), vaults
+
+    def discover(self, filters: Optional[List[Dict]] = None) -> Dict:
+        """
+        Scan pools of the program and merge them into the snapshot. Extra
+        memcmp filters narrow the scan (e.g. pools of one mint); pools
+        outside a filtered scan are kept, and only a full scan removes
+        pools that no longer exist
+        """
+        accounts = self.rpc.get_program_accounts(
+            self.program_id,
+            [{"dataSize": SWAP_LAYOUT.itemsize}] + (filters or [])
+        )
+        addresses = [account["pubkey"] for account in accounts]
+        pools, vaults = self._decode([account["account"]["data"][0] for account in accounts])
+        initialized = pools["is_initialized"] == 1
+
+        with self._lock:
+            self.version += 1
+            old_index = self._index
+            positions = np.array([old_index.get(address, -1) for address in addresses], dtype=np.int64)
+            known = positions >= 0
+
+            # Compare whole rows as raw bytes to find pools whose state changed
+            changed = ~known
+            if known.any():
+                previous = self.pools[positions[known]].view("V324")
+                changed[known] = pools[known].view("V324") != previous
+
+            reserves = np.zeros((len(addresses), 2), dtype=np.uint64)
+            updated = np.full(len(addresses), self.version, dtype=np.int64)
+            reserves[known] = self.reserves[positions[known]]
+            updated[known & ~changed] = self.updated[positions[known & ~changed]]
+
+            keep = initialized
+            if filters:
+                scanned = set(addresses)
+                retained = np.array([i for i, address in enumerate(self.addresses) if address not in scanned], dtype=np.int64)
+            else:
+                retained = np.zeros(0, dtype=np.int64)
+            removed = len(old_index) - len(retained) - int((known & keep).sum())
+            self.addresses = [self.addresses[i] for i in retained] + [address for address, k in zip(addresses, keep) if k]
+            self._index = {address: i for i, address in enumerate(self.addresses)}
+            self.vaults = [self.vaults[2 * i + side] for i in retained for side in (0, 1)] + [
+                vault for i, vault in enumerate(vaults) if keep[i // 2]
+            ]
+            self.pools = np.concatenate([self.pools[retained], pools[keep]])
+            self.reserves = np.concatenate([self.reserves[retained], reserves[keep]])
+            self.updated = np.concatenate([self.updated[retained], updated[keep]])
+            if not filters:
+                self.discovered_at = time.time()
+
+            return {
+                "pools": len(self.addresses),
+                "new": int((~known & keep).sum()),
+                "changed": int((known & changed & keep).sum()),
+                "removed": removed,
+                "version": self.version
+            }
+
+    def refresh_reserves(self) -> Dict:
+        """
+        Re-read vault balances and mark pools whose reserves moved
+        """
+        with self._lock:
+            vaults = list(self.vaults)
+            addresses = list(self.addresses)
+
+        accounts = self.rpc.get_multiple_accounts(
+            vaults,
+            {"encoding": "base64", "dataSlice": {"offset": TOKEN_AMOUNT_OFFSET, "length": 8}}
+        )
+        reserves = decode_token_amounts(accounts).reshape(-1, 2)
+
+        with self._lock:
+            if addresses != self.addresses:
+                # A discovery scan replaced the snapshot meanwhile
+                return {"changed": 0, "version": self.version}
+            changed = (reserves != self.reserves).any(axis=1)
+            if changed.any():
+                self.version += 1
+                self.updated[changed] = self.version
+            self.reserves = reserves
+            self.refreshed_at = time.time()
+            return {"changed": int(changed.sum()), "version": self.version}
+
+    def refresh(self, force: bool = False) -> Dict:
+        """
+        Rediscover pools when the last scan is old, then refresh reserves
+        unless they were refreshed recently
+        """
+        with self._refresh_lock:
+            result = {}
+            now = time.time()
+            if force or now - self.discovered_at > LIQUIDITY_DISCOVERY_INTERVAL:
+                result["discovery"] = self.discover()
+            if force or "discovery" in result or now - self.refreshed_at > LIQUIDITY_REFRESH_INTERVAL:
+                result["reserves"] = self.refresh_reserves()
+            return result
+
+    def snapshot(self, since: int = 0) -> List[Dict]:
+        """
+        Pool records, limited to pools changed after snapshot version since
+        """
+        with self._lock:
+            rows = np.flatnonzero(self.updated > since)
+            pools = self.pools[rows]
+            reserves = self.reserves[rows]
+            updated = self.updated[rows]
+            addresses = [self.addresses[i] for i in rows]
+            timestamp = int(self.refreshed_at or self.discovered_at)
+
+        denominators = pools["trade_fee_denominator"].astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fee_bps = np.where(denominators > 0, pools["trade_fee_numerator"] / denominators * 10000, 0.0)
+
+        records = []
+        for i, address in enumerate(addresses):
+            records.append({
+                "timestamp": timestamp,
+                "type": "liquidity",
+                "pool_address": address,
+                "token_a_mint": _b58(pools[i]["token_a_mint"]),
+                "token_b_mint": _b58(pools[i]["token_b_mint"]),
+                "pool_mint": _b58(pools[i]["pool_mint"]),
+                "reserve_a": int(reserves[i, 0]),
+                "reserve_b": int(reserves[i, 1]),
+                "token_amount": float(reserves[i, 0]),
+                "trade_fee_bps": float(fee_bps[i]),
+                "curve_type": int(pools[i]["curve_type"]),
+                "version": int(updated[i])
+            })
+        return records
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "program_id": self.program_id,
+                "pools": len(self.addresses),
+                "version": self.version,
+                "snapshot_bytes": int(self.pools.nbytes + self.reserves.nbytes + self.updated.nbytes),
+                "discovered_at": self.discovered_at or None,
+                "refreshed_at": self.refreshed_at or None
+            }
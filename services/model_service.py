@@ -1,21 +1,34 @@
 from typing import Dict, List, Optional
-import json
 import os
 import uuid
 from datetime import datetime
+import joblib
+import pandas as pd
+from services.storage_service import get_storage
+from services.job_service import get_job_queue
+from services.data_service import iter_dataset_frames
+from services.evaluation_service import EVALUATION_BATCH_SIZE, evaluate_batches
+from services.feature_service import feature_names, iter_feature_frames
+from services.training_service import train_estimator
+from services.distributed_training import train_distributed
 
-MODELS_FILE = "data/models.json"
+# Trained estimators are persisted as models/<model_id>/model.joblib
+MODEL_ARTIFACT_DIR = "models"
 
 class ModelTrainingJob:
-    def __init__(self, dataset_id: str, model_params: Dict, user_id: str):
+    def __init__(self, dataset_id: str, model_params: Dict, user_id: str, priority: int = 0):
         self.id = str(uuid.uuid4())
         self.dataset_id = dataset_id
         self.model_params = model_params
         self.user_id = user_id
+        self.priority = priority
         self.status = "pending"
+        self.progress = 0.0
         self.created_at = str(datetime.now())
+        self.started_at = None
         self.completed_at = None
         self.model_id = None
+        self.error = None
         
     def to_dict(self) -> Dict:
         return {
@@ -23,85 +36,145 @@ class ModelTrainingJob:
             "dataset_id": self.dataset_id,
             "model_params": self.model_params,
             "user_id": self.user_id,
+            "priority": self.priority,
             "status": self.status,
+            "progress": self.progress,
             "created_at": self.created_at,
+            "started_at": self.started_at,
             "completed_at": self.completed_at,
-            "model_id": self.model_id
+            "model_id": self.model_id,
+            "error": self.error
         }
 
 def load_models() -> Dict:
     """
-    Load models from the JSON file
+    Load all models from storage
     """
-    if not os.path.exists(MODELS_FILE):
-        os.makedirs(os.path.dirname(MODELS_FILE), exist_ok=True)
-        return {}
-    
-    try:
-        with open(MODELS_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return {}
+    return get_storage().all("models")
 
 def save_models(models: Dict) -> None:
     """
-    Save models to the JSON file
+    Save models to storage
     """
-    os.makedirs(os.path.dirname(MODELS_FILE), exist_ok=True)
-    with open(MODELS_FILE, 'w') as f:
-        json.dump(models, f, indent=2)
+    storage = get_storage()
+    for model_id, model in models.items():
+        storage.put("models", model_id, model)
 
-def train_model(dataset_id: str, model_params: Dict, user_id: str) -> ModelTrainingJob:
+def train_model(dataset_id: str, model_params: Dict, user_id: str, priority: int = 0) -> ModelTrainingJob:
     """
-    Start a model training job
+    Queue a model training job
     """
-    job = ModelTrainingJob(dataset_id, model_params, user_id)
+    job = ModelTrainingJob(dataset_id, model_params, user_id, priority)
+    get_job_queue().submit(job.to_dict())
     
-    # In a production environment, this would be handled by a task queue
-    # For now, we'll just simulate the training process
-    job.status = "training"
+    return job
+
+def run_training(job: Dict, report_progress) -> Dict:
+    """
+    Execute a training job inside a queue worker process
+    """
+    report_progress(0.0, "starting")
     
-    models = load_models()
-    models[job.id] = job.to_dict()
-    save_models(models)
+    # The job record doubles as the model; the result is merged into it
+    train = train_distributed if job["model_params"].get("distributed") else train_estimator
+    result = train(
+        job["dataset_id"],
+        job["user_id"],
+        job["model_params"],
+        model_artifact_path(job["id"]),
+        report_progress
+    )
+    report_progress(1.0, "finished")
     
-    return job
+    return {"model_id": job["id"], **result}
+
+def get_training_job(job_id: str) -> Optional[Dict]:
+    """
+    Get the current state of a training job
+    """
+    return get_job_queue().get(job_id)
+
+def cancel_training_job(job_id: str) -> Optional[Dict]:
+    """
+    Cancel a pending or running training job
+    """
+    return get_job_queue().cancel(job_id)
 
 def deploy_model(model_id: str, deployment_type: str) -> Dict:
     """
     Deploy a trained model
     """
-    models = load_models()
+    serve_locally = deployment_type != "ollama"
+    if serve_locally and not os.path.exists(model_artifact_path(model_id)):
+        raise ValueError(f"Model {model_id} has no trained artifact")
     
-    if model_id not in models:
-        raise ValueError(f"Model {model_id} not found")
+    def set_deployment(model: Dict) -> None:
+        model["deployment"] = {
+            "type": deployment_type,
+            "status": "deployed",
+            "deployed_at": str(datetime.now())
+        }
+    
+    model = get_storage().update("models", model_id, set_deployment)
     
-    model = models[model_id]
+    if model is None:
+        raise ValueError(f"Model {model_id} not found")
     
-    # Update deployment status
-    model["deployment"] = {
-        "type": deployment_type,
-        "status": "deployed",
-        "deployed_at": str(datetime.now())
-    }
+    if serve_locally:
+        # Imported here to keep model_service -> serving_service free of import cycles
+        from services.serving_service import get_model_server
+        
+        # Swaps the new version in; other workers pick it up on their next refresh
+        get_model_server().deploy(model_id)
     
-    save_models(models)
     return model
 
-def evaluate_model(model_id: str, test_data: List) -> Dict:
+def model_artifact_path(model_id: str) -> str:
+    return f"{MODEL_ARTIFACT_DIR}/{model_id}/model.joblib"
+
+def load_model_artifact(model_id: str):
     """
-    Evaluate a model's performance
+    Load a trained estimator, memory-mapping its arrays
     """
-    models = load_models()
-    
-    if model_id not in models:
+    path = model_artifact_path(model_id)
+    if not os.path.exists(path):
+        raise ValueError(f"Model {model_id} has no trained artifact")
+    return joblib.load(path, mmap_mode="r")
+
+def evaluate_model(
+    model_id: str,
+    test_data: Optional[List] = None,
+    dataset_id: Optional[str] = None,
+    user_id: Optional[str] = None,
+    batch_size: int = EVALUATION_BATCH_SIZE
+) -> Dict:
+    """
+    Evaluate a model's performance on inline test data or a stored dataset
+    """
+    model = get_storage().get("models", model_id)
+    if model is None:
         raise ValueError(f"Model {model_id} not found")
     
-    # In a production environment, this would perform actual model evaluation
-    # For now, we'll return dummy metrics
-    return {
-        "accuracy": 0.95,
-        "precision": 0.94,
-        "recall": 0.93,
-        "f1_score": 0.94
-    }
+    estimator = load_model_artifact(model_id)
+    target = model.get("target") or model["model_params"].get("target")
+    if not target:
+        raise ValueError(f"Model {model_id} has no target column")
+    feature_spec = model["model_params"].get("feature_spec")
+    features = model.get("features") or model["model_params"].get("features") or (feature_names(feature_spec) if feature_spec else None)
+    task = model.get("task") or model["model_params"].get("task", "classification")
+    if not features:
+        raise ValueError(f"Model {model_id} has no feature list")
+    
+    if dataset_id and feature_spec:
+        # Cached feature matrices are reused, so only new partitions are computed
+        batches = iter_feature_frames(dataset_id, user_id or model["user_id"], feature_spec, [target], batch_size)
+    elif dataset_id:
+        columns = features + [target]
+        batches = iter_dataset_frames(dataset_id, user_id or model["user_id"], columns, batch_size)
+    elif test_data:
+        frame = pd.DataFrame(test_data)
+        batches = (frame.iloc[start:start + batch_size] for start in range(0, len(frame), batch_size))
+    else:
+        raise ValueError("Either test_data or dataset_id is required")
+    
+    return evaluate_batches(estimator, batches, features, target, task)
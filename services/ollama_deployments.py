@@ -0,0 +1,349 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import os
+import threading
+import time
+from services.storage_service import get_storage
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; every process then maintains deployments
+    fcntl = None
+
+# Total bytes zephyr_* models may keep loaded in Ollama; 0 means unlimited
+OLLAMA_MEMORY_BUDGET = int(os.getenv("ZEPHYR_OLLAMA_MEMORY_BUDGET", 0))
+
+# Keep-alive, in seconds, for models with steady, occasional and no recent traffic
+OLLAMA_HOT_KEEP_ALIVE = int(os.getenv("ZEPHYR_OLLAMA_HOT_KEEP_ALIVE", 3600))
+OLLAMA_WARM_KEEP_ALIVE = int(os.getenv("ZEPHYR_OLLAMA_WARM_KEEP_ALIVE", 600))
+OLLAMA_COLD_KEEP_ALIVE = int(os.getenv("ZEPHYR_OLLAMA_COLD_KEEP_ALIVE", 120))
+
+# Requests per minute over the traffic window above which a model is hot
+OLLAMA_HOT_RATE = float(os.getenv("ZEPHYR_OLLAMA_HOT_RATE", 1.0))
+OLLAMA_TRAFFIC_WINDOW = 900
+
+# Request counts are shared between worker processes through storage, in
+# per-minute buckets; each process adds its own counts every flush interval
+OLLAMA_TRAFFIC_BUCKET = 60
+OLLAMA_TRAFFIC_FLUSH_INTERVAL = float(os.getenv("ZEPHYR_OLLAMA_TRAFFIC_FLUSH_INTERVAL", 5))
+TRAFFIC_COLLECTION = "ollama_traffic"
+
+# Seconds between residency checks by the maintenance thread
+OLLAMA_MANAGER_INTERVAL = float(os.getenv("ZEPHYR_OLLAMA_MANAGER_INTERVAL", 30))
+
+# Only the process holding this lock re-warms and evicts models
+OLLAMA_MANAGER_LOCK = os.getenv("ZEPHYR_OLLAMA_MANAGER_LOCK", "data/ollama_deployments.lock")
+
+MODEL_PREFIX = "zephyr_"
+
+
+class DeploymentManager:
+    """
+    Keeps deployed zephyr_* models loaded in Ollama: preloads them after a
+    deploy, sizes keep-alive by recent traffic, re-warms hot models after
+    Ollama unloads them, and unloads the coldest ones over the memory budget.
+    Traffic is pooled across worker processes, and re-warming and eviction
+    run in one elected process at a time
+    """
+
+    def __init__(
+        self,
+        service,
+        memory_budget: int = OLLAMA_MEMORY_BUDGET,
+        interval: float = OLLAMA_MANAGER_INTERVAL,
+        flush_interval: float = OLLAMA_TRAFFIC_FLUSH_INTERVAL,
+        lock_path: str = OLLAMA_MANAGER_LOCK
+    ):
+        self.service = service
+        self.memory_budget = memory_budget
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self.lock_path = lock_path
+
+        self._lock = threading.Lock()
+        # model -> {bucket: count} not yet added to storage
+        self._pending: Dict[str, Dict[int, int]] = {}
+        self._flushed_at = time.monotonic()
+        # model -> (loaded at, {bucket: count}) read from storage
+        self._shared: Dict[str, Any] = {}
+        self._resident: Dict[str, Dict[str, Any]] = {}
+        self._resident_checked = 0.0
+        self._sizes: Dict[str, int] = {}
+        self._warming = set()
+        self._leader_handle = None
+        self._thread = None
+        self._stop = threading.Event()
+        # Preloads wait on model loading, so they do not take prediction threads
+        self._preload_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ollama-preload")
+        self.preloads = 0
+        self.unloads = 0
+
+    def _name(self, model_name: str) -> str:
+        return f"{MODEL_PREFIX}{model_name}"
+
+    def _oldest_bucket(self) -> int:
+        return int(time.time() // OLLAMA_TRAFFIC_BUCKET) - OLLAMA_TRAFFIC_WINDOW // OLLAMA_TRAFFIC_BUCKET
+
+    def record_request(self, model_name: str) -> None:
+        bucket = int(time.time() // OLLAMA_TRAFFIC_BUCKET)
+        with self._lock:
+            counts = self._pending.setdefault(model_name, {})
+            counts[bucket] = counts.get(bucket, 0) + 1
+            flush = time.monotonic() - self._flushed_at >= self.flush_interval
+            if flush:
+                self._flushed_at = time.monotonic()
+        if flush:
+            try:
+                self.flush_traffic()
+            except Exception as e:
+                # Traffic only tunes keep-alive; never fail the request over it
+                print(f"Error saving Ollama traffic: {str(e)}")
+
+    def flush_traffic(self) -> None:
+        """
+        Add this process's request counts to the shared totals
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        oldest = self._oldest_bucket()
+        storage = get_storage()
+
+        for model_name, counts in pending.items():
+            def add(record: Dict) -> None:
+                buckets = record["buckets"]
+                for bucket, count in counts.items():
+                    buckets[str(bucket)] = buckets.get(str(bucket), 0) + count
+                for bucket in [bucket for bucket in buckets if int(bucket) <= oldest]:
+                    del buckets[bucket]
+
+            if storage.update(TRAFFIC_COLLECTION, model_name, add) is None:
+                storage.insert(TRAFFIC_COLLECTION, model_name, {"model": model_name, "buckets": {}})
+                storage.update(TRAFFIC_COLLECTION, model_name, add)
+            with self._lock:
+                self._shared.pop(model_name, None)
+
+    def _shared_counts(self, model_name: str) -> Dict[int, int]:
+        with self._lock:
+            cached = self._shared.get(model_name)
+        if cached is not None and time.monotonic() - cached[0] < self.flush_interval:
+            return cached[1]
+
+        record = get_storage().get(TRAFFIC_COLLECTION, model_name)
+        counts = {int(bucket): count for bucket, count in (record or {}).get("buckets", {}).items()}
+        with self._lock:
+            self._shared[model_name] = (time.monotonic(), counts)
+        return counts
+
+    def _models(self) -> List[str]:
+        with self._lock:
+            pending = list(self._pending)
+        return sorted(set(get_storage().all(TRAFFIC_COLLECTION)) | set(pending))
+
+    def request_rate(self, model_name: str) -> float:
+        """
+        Requests per minute over the traffic window, across all processes
+        """
+        oldest = self._oldest_bucket()
+        shared = self._shared_counts(model_name)
+        with self._lock:
+            pending = dict(self._pending.get(model_name, {}))
+        requests = sum(count for bucket, count in shared.items() if bucket > oldest)
+        requests += sum(count for bucket, count in pending.items() if bucket > oldest)
+        return requests * 60.0 / OLLAMA_TRAFFIC_WINDOW
+
+    def is_leader(self) -> bool:
+        """
+        Whether this process maintains deployments; the first process to
+        lock the manager lock file keeps it until it stops or exits, and
+        another process takes over on its next maintenance run
+        """
+        if fcntl is None:
+            return True
+        with self._lock:
+            if self._leader_handle is not None:
+                return True
+            os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+            handle = open(self.lock_path, "w")
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                return False
+            self._leader_handle = handle
+            return True
+
+    def keep_alive(self, model_name: str) -> int:
+        rate = self.request_rate(model_name)
+        if rate >= OLLAMA_HOT_RATE:
+            return OLLAMA_HOT_KEEP_ALIVE
+        if rate > 0:
+            return OLLAMA_WARM_KEEP_ALIVE
+        return OLLAMA_COLD_KEEP_ALIVE
+
+    def _load(self, model_name: str, keep_alive: int) -> None:
+        # A generate request without a prompt only loads (or, with
+        # keep_alive 0, unloads) the model
+        response = self.service.session.post(
+            f"{self.service.base_url}/api/generate",
+            json={"model": self._name(model_name), "keep_alive": keep_alive, "stream": False}
+        )
+        if response.status_code != 200:
+            raise Exception(f"Failed to load model: {response.text}")
+
+    def preload(self, model_name: str) -> None:
+        """
+        Load a model into memory ahead of its first request
+        """
+        with self._lock:
+            if model_name in self._warming:
+                return
+            self._warming.add(model_name)
+        try:
+            # A fresh deployment stays loaded at least as long as a warm model
+            self._load(model_name, max(self.keep_alive(model_name), OLLAMA_WARM_KEEP_ALIVE))
+            with self._lock:
+                self.preloads += 1
+                self._resident_checked = 0.0
+            if self.is_leader():
+                self.enforce_budget(protect=model_name)
+        finally:
+            with self._lock:
+                self._warming.discard(model_name)
+
+    def preload_async(self, model_name: str) -> None:
+        def run():
+            try:
+                self.preload(model_name)
+            except Exception as e:
+                print(f"Error preloading {model_name}: {str(e)}")
+
+        self._preload_executor.submit(run)
+
+    def unload(self, model_name: str) -> None:
+        self._load(model_name, 0)
+        with self._lock:
+            self.unloads += 1
+            self._resident.pop(model_name, None)
+
+    def resident(self, max_age: float = 5.0) -> Dict[str, Dict[str, Any]]:
+        """
+        zephyr_* models currently loaded in Ollama, from /api/ps
+        """
+        with self._lock:
+            if time.monotonic() - self._resident_checked < max_age:
+                return dict(self._resident)
+
+        response = self.service.session.get(f"{self.service.base_url}/api/ps")
+        if response.status_code != 200:
+            raise Exception(f"Failed to list loaded models: {response.text}")
+
+        resident = {}
+        for model in response.json().get("models", []):
+            name = model.get("name", "").split(":")[0]
+            if name.startswith(MODEL_PREFIX):
+                resident[name[len(MODEL_PREFIX):]] = {
+                    "size": model.get("size", 0),
+                    "size_vram": model.get("size_vram", 0),
+                    "expires_at": model.get("expires_at")
+                }
+
+        with self._lock:
+            self._resident = resident
+            self._resident_checked = time.monotonic()
+            self._sizes.update((name, model["size"]) for name, model in resident.items())
+        return dict(resident)
+
+    def enforce_budget(self, protect: Optional[str] = None) -> List[str]:
+        """
+        Unload the least used models until resident models fit the budget
+        """
+        if not self.memory_budget:
+            return []
+
+        resident = self.resident(max_age=0)
+        used = sum(model["size"] for model in resident.values())
+        candidates = sorted(
+            (name for name in resident if name != protect),
+            key=self.request_rate
+        )
+
+        evicted = []
+        for name in candidates:
+            if used <= self.memory_budget:
+                break
+            self.unload(name)
+            used -= resident[name]["size"]
+            evicted.append(name)
+        return evicted
+
+    def maintain(self) -> None:
+        """
+        Re-warm hot models that Ollama unloaded while they fit the budget,
+        then apply the budget
+        """
+        resident = self.resident(max_age=0)
+        used = sum(model["size"] for model in resident.values())
+        hot = [name for name in self._models() if self.request_rate(name) >= OLLAMA_HOT_RATE]
+
+        for name in sorted(hot, key=self.request_rate, reverse=True):
+            if name in resident:
+                continue
+            size = self._sizes.get(name, 0)
+            if self.memory_budget and used + size > self.memory_budget:
+                continue
+            self.preload(name)
+            used += size
+        self.enforce_budget()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush_traffic()
+                if self.is_leader():
+                    self.maintain()
+            except Exception as e:
+                print(f"Error maintaining Ollama deployments: {str(e)}")
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="ollama-deployments", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._preload_executor.shutdown(wait=False)
+        try:
+            self.flush_traffic()
+        except Exception as e:
+            print(f"Error saving Ollama traffic: {str(e)}")
+        with self._lock:
+            handle, self._leader_handle = self._leader_handle, None
+        if handle is not None:
+            # Closing the file releases the lock for another process
+            handle.close()
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            resident = self.resident()
+        except Exception:
+            resident = {}
+        models = set(self._models()) | set(resident)
+        return {
+            "leader": self._leader_handle is not None,
+            "memory_budget": self.memory_budget,
+            "memory_used": sum(model["size"] for model in resident.values()),
+            "preloads": self.preloads,
+            "unloads": self.unloads,
+            "models": {
+                name: {
+                    "resident": name in resident,
+                    "requests_per_minute": round(self.request_rate(name), 3),
+                    "keep_alive": self.keep_alive(name),
+                    **resident.get(name, {})
+                }
+                for name in sorted(models)
+            }
+        }
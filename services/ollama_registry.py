@@ -0,0 +1,140 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import threading
+import time
+
+# Seconds before the cached Ollama tag list is refreshed in the background
+OLLAMA_TAGS_TTL = float(os.getenv("ZEPHYR_OLLAMA_TAGS_TTL", 60))
+
+MODEL_DIR = "models"
+
+
+def full_model_name(name: str) -> str:
+    """
+    Ollama treats a name without a tag as name:latest
+    """
+    return name if ":" in name.rsplit("/", 1)[-1] else f"{name}:latest"
+
+
+class OllamaModelRegistry:
+    """
+    In-process cache of Ollama's model tags and of parsed model configs.
+    Stale tags are served while a single background refresh runs; configs
+    are only re-read when a caller asks for revalidation and the file changed
+    """
+
+    def __init__(self, service, ttl: float = OLLAMA_TAGS_TTL, model_dir: str = MODEL_DIR):
+        self.service = service
+        self.ttl = ttl
+        self.model_dir = model_dir
+
+        self._lock = threading.Lock()
+        # Full model name ("name:tag") -> tag entry from /api/tags
+        self._tags: Optional[Dict[str, Dict[str, Any]]] = None
+        self._tags_loaded = 0.0
+        self._refreshing = False
+        # model id -> ((mtime_ns, size), config)
+        self._configs: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        self.refreshes = 0
+        # Background refreshes get their own thread, apart from prediction traffic
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ollama-registry")
+
+    def _fetch_tags(self) -> Dict[str, Dict[str, Any]]:
+        response = self.service.session.get(f"{self.service.base_url}/api/tags")
+        if response.status_code != 200:
+            raise Exception(f"Failed to list models: {response.text}")
+        return {full_model_name(model['name']): model for model in response.json().get('models', [])}
+
+    def refresh(self) -> Dict[str, Dict[str, Any]]:
+        tags = self._fetch_tags()
+        with self._lock:
+            self._tags = tags
+            self._tags_loaded = time.monotonic()
+            self.refreshes += 1
+        return tags
+
+    def _refresh_in_background(self) -> None:
+        def run():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing Ollama models: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        self._executor.submit(run)
+
+    def tags(self) -> Dict[str, Dict[str, Any]]:
+        """
+        All models known to Ollama, keyed by full name with the tag
+        """
+        with self._lock:
+            tags = self._tags
+            stale = time.monotonic() - self._tags_loaded > self.ttl
+            start_refresh = tags is not None and stale and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+
+        if tags is None:
+            return self.refresh()
+        if start_refresh:
+            self._refresh_in_background()
+        return tags
+
+    def list_models(self) -> List[str]:
+        return [model['name'] for name, model in self.tags().items() if name.startswith('zephyr_')]
+
+    def get_model(self, model_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Tag entry of a deployed model; model_id may carry a tag, else :latest is meant
+        """
+        return self.tags().get(full_model_name(f"zephyr_{model_id}"))
+
+    def config(self, model_id: str, revalidate: bool = False) -> Dict[str, Any]:
+        """
+        Parsed config of a model; with revalidate, the file is checked and
+        re-read only if it changed
+        """
+        cached = self._configs.get(model_id)
+        if cached is not None and not revalidate:
+            return cached[1]
+
+        config_path = os.path.join(self.model_dir, model_id, "config.json")
+        try:
+            stat = os.stat(config_path)
+        except FileNotFoundError:
+            self._configs.pop(model_id, None)
+            raise ValueError(f"Model configuration not found for {model_id}")
+
+        version = (stat.st_mtime_ns, stat.st_size)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+        self._configs[model_id] = (version, config)
+        return config
+
+    def invalidate(self, model_id: Optional[str] = None) -> None:
+        """
+        Forget a model's config (or all configs) and mark the tags stale
+        """
+        with self._lock:
+            if model_id is None:
+                self._configs.clear()
+            else:
+                self._configs.pop(model_id, None)
+            self._tags_loaded = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "models": len(self._tags) if self._tags is not None else None,
+                "configs": len(self._configs),
+                "tags_age_seconds": round(time.monotonic() - self._tags_loaded, 1) if self._tags is not None else None,
+                "ttl_seconds": self.ttl,
+                "refreshes": self.refreshes
+            }
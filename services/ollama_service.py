@@ -1,31 +1,91 @@
 import requests
+from requests.adapters import HTTPAdapter
+import datetime
 import json
-from typing import Dict, Any, Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+import hashlib
 import os
+from services.ollama_deployments import DeploymentManager
+from services.ollama_registry import OllamaModelRegistry
+from services.prediction_cache import PredictionCache, PREDICTION_CACHE_MODE, input_hash
+
+OLLAMA_URL = os.getenv("ZEPHYR_OLLAMA_URL", "http://localhost:11434")
+
+# Upper bound on concurrent generate requests; match OLLAMA_NUM_PARALLEL on the server
+OLLAMA_MAX_CONCURRENCY = int(os.getenv("ZEPHYR_OLLAMA_MAX_CONCURRENCY", 4))
+
+# Number of recent streamed requests kept for latency statistics
+STREAM_METRICS_WINDOW = 1000
+
+# Seconds before a model's cache namespace is checked against its deployed
+# Modelfile, which a deploy in another worker process may have replaced
+OLLAMA_NAMESPACE_REFRESH_INTERVAL = float(os.getenv("ZEPHYR_OLLAMA_NAMESPACE_REFRESH_INTERVAL", 5))
+
+def _modelfile_temperature(modelfile: str) -> float:
+    """
+    Sampling temperature set by a Modelfile; Ollama applies the last one given
+    """
+    temperature = 0.8
+    for line in modelfile.splitlines():
+        parts = line.split()
+        if len(parts) == 3 and parts[0] == "PARAMETER" and parts[1] == "temperature":
+            try:
+                temperature = float(parts[2])
+            except ValueError:
+                pass
+    return temperature
 
 class OllamaService:
-    def __init__(self):
-        self.base_url = "http://localhost:11434"
+    def __init__(
+        self,
+        base_url: str = OLLAMA_URL,
+        max_concurrency: int = OLLAMA_MAX_CONCURRENCY,
+        namespace_refresh_interval: float = OLLAMA_NAMESPACE_REFRESH_INTERVAL
+    ):
+        self.base_url = base_url
+        self.max_concurrency = max(1, max_concurrency)
+        
+        # Keep-alive connections shared by all requests to Ollama
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="ollama")
+        self._stream_metrics = deque(maxlen=STREAM_METRICS_WINDOW)
+        
+        self.prediction_cache = PredictionCache()
+        self.cache_mode = PREDICTION_CACHE_MODE
+        # model name -> (checked at, deployed Modelfile version, Modelfile
+        # hash or None when results must not be cached)
+        self._cache_namespaces = {}
+        self.namespace_refresh_interval = namespace_refresh_interval
+        
+        self.deployments = DeploymentManager(self)
+        self.registry = OllamaModelRegistry(self)
         
     def deploy_to_ollama(self, model_id: str) -> Dict[str, Any]:
         """
         Deploy a model to Ollama
         """
         try:
-            # Load model configuration
-            model_config = self._load_model_config(model_id)
+            # Load model configuration, re-reading it if it changed on disk
+            model_config = self.registry.config(model_id, revalidate=True)
             
             # Create Modelfile
             modelfile_content = self._create_modelfile(model_config)
             
             # Save Modelfile
-            modelfile_path = f"models/{model_id}/Modelfile"
+            modelfile_path = self._modelfile_path(model_id)
             os.makedirs(os.path.dirname(modelfile_path), exist_ok=True)
             with open(modelfile_path, 'w') as f:
                 f.write(modelfile_content)
             
             # Create model in Ollama
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/api/create",
                 json={
                     "name": f"zephyr_{model_id}",
@@ -36,10 +96,25 @@ class OllamaService:
             if response.status_code != 200:
                 raise Exception(f"Failed to create model: {response.text}")
             
+            # Results of the previous deployment are no longer valid
+            self.prediction_cache.invalidate_model(model_id)
+            self._cache_namespaces.pop(model_id, None)
+            
+            # The new tag must be listed right away
+            try:
+                self.registry.refresh()
+            except Exception as e:
+                print(f"Error refreshing Ollama models: {str(e)}")
+                self.registry.invalidate()
+            
+            # Load the model now so its first prediction does not pay for it
+            self.deployments.preload_async(model_id)
+            
             return {
                 "status": "success",
                 "model_name": f"zephyr_{model_id}",
-                "deployment_time": str(datetime.datetime.now())
+                "deployment_time": str(datetime.datetime.now()),
+                "preloading": True
             }
             
         except Exception as e:
@@ -53,12 +128,10 @@ class OllamaService:
         """
         Load model configuration from storage
         """
-        config_path = f"models/{model_id}/config.json"
-        if not os.path.exists(config_path):
-            raise ValueError(f"Model configuration not found for {model_id}")
-            
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        return self.registry.config(model_id)
+    
+    def _modelfile_path(self, model_id: str) -> str:
+        return f"models/{model_id}/Modelfile"
     
     def _create_modelfile(self, config: Dict[str, Any]) -> str:
         """
@@ -77,40 +150,248 @@ PARAMETER top_k {config.get('top_k', 40)}
             
         return modelfile.strip()
     
+    def _generate(self, model_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json={
+                "model": f"zephyr_{model_name}",
+                "prompt": json.dumps(input_data),
+                "stream": False,
+                "keep_alive": self.deployments.keep_alive(model_name)
+            }
+        )
+        
+        if response.status_code != 200:
+            raise Exception(f"Prediction failed: {response.text}")
+            
+        return response.json()
+    
+    def _deployed_modelfile(self, model_name: str) -> Tuple[Optional[Tuple[int, int]], Optional[str]]:
+        """
+        Version and content of the Modelfile Ollama was last given for a
+        model, or (None, None) if it was not deployed by us
+        """
+        path = self._modelfile_path(model_name)
+        try:
+            stat = os.stat(path)
+            with open(path, 'r') as f:
+                return (stat.st_mtime_ns, stat.st_size), f.read()
+        except FileNotFoundError:
+            return None, None
+    
+    def _cache_namespace(self, model_name: str) -> Optional[str]:
+        """
+        Hash of the model's deployed Modelfile, or None if its results
+        should not be cached under the current cache mode. Memoised, and
+        re-checked every namespace_refresh_interval seconds so a redeploy
+        by another worker process is picked up
+        """
+        if self.cache_mode == "off":
+            return None
+        
+        now = time.monotonic()
+        memo = self._cache_namespaces.get(model_name)
+        if memo is not None and now - memo[0] < self.namespace_refresh_interval:
+            return memo[2]
+        
+        version, modelfile = self._deployed_modelfile(model_name)
+        if memo is not None and memo[1] == version:
+            self._cache_namespaces[model_name] = (now, version, memo[2])
+            return memo[2]
+        if memo is not None:
+            # Redeployed elsewhere; results of the previous version are no longer valid
+            self.prediction_cache.invalidate_model(model_name)
+        
+        namespace = None
+        if modelfile is not None:
+            deterministic = _modelfile_temperature(modelfile) == 0
+            if self.cache_mode == "always" or deterministic:
+                namespace = hashlib.sha256(modelfile.encode()).hexdigest()
+        
+        self._cache_namespaces[model_name] = (now, version, namespace)
+        return namespace
+    
+    def _cached_generate(self, model_name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Cache hits count as traffic too, so keep-alive follows real demand
+        self.deployments.record_request(model_name)
+        namespace = self._cache_namespace(model_name)
+        if namespace is None:
+            return self._generate(model_name, input_data)
+        
+        key = (model_name, namespace, input_hash(input_data))
+        result = self.prediction_cache.get(key)
+        if result is not None:
+            return result
+        
+        started = time.perf_counter()
+        result = self._generate(model_name, input_data)
+        self.prediction_cache.put(key, result, time.perf_counter() - started)
+        return result
+    
     def predict(self, model_name: str, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
         Make predictions using a deployed model
         """
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": f"zephyr_{model_name}",
-                    "prompt": json.dumps(input_data)
-                }
-            )
-            
-            if response.status_code != 200:
-                raise Exception(f"Prediction failed: {response.text}")
-                
-            return response.json()
+            return self._cached_generate(model_name, input_data)
             
         except Exception as e:
             print(f"Error making prediction: {str(e)}")
             return None
     
-    def list_models(self) -> List[str]:
+    def predict_batch(self, model_name: str, inputs: List[Dict[str, Any]], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        List all deployed models
+        Make predictions for many inputs concurrently; results keep input order
+        and failures are reported per item
+        """
+        limit = min(max_concurrency or self.max_concurrency, self.max_concurrency)
+        semaphore = threading.BoundedSemaphore(limit)
+        
+        def run(index: int, input_data: Dict[str, Any]) -> Dict[str, Any]:
+            with semaphore:
+                try:
+                    return {"index": index, "status": "success", "result": self._cached_generate(model_name, input_data)}
+                except Exception as e:
+                    return {"index": index, "status": "error", "error": str(e)}
+        
+        futures = [self._executor.submit(run, index, input_data) for index, input_data in enumerate(inputs)]
+        return [future.result() for future in futures]
+    
+    def predict_stream(self, model_name: str, input_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
         """
+        Yield tokens as Ollama generates them, then a final event with
+        time-to-first-token and throughput metrics
+        """
+        started = time.perf_counter()
+        first_token_at = None
+        tokens = 0
+        
+        self.deployments.record_request(model_name)
+        response = self.session.post(
+            f"{self.base_url}/api/generate",
+            json={
+                "model": f"zephyr_{model_name}",
+                "prompt": json.dumps(input_data),
+                "stream": True,
+                "keep_alive": self.deployments.keep_alive(model_name)
+            },
+            stream=True
+        )
+        
         try:
-            response = requests.get(f"{self.base_url}/api/tags")
             if response.status_code != 200:
-                raise Exception(f"Failed to list models: {response.text}")
+                raise Exception(f"Prediction failed: {response.text}")
+            
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if "error" in chunk:
+                    raise Exception(f"Prediction failed: {chunk['error']}")
                 
-            models = response.json()
-            return [model['name'] for model in models if model['name'].startswith('zephyr_')]
+                token = chunk.get("response", "")
+                if token:
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                    tokens += 1
+                    yield {"token": token, "done": False}
+                
+                if chunk.get("done"):
+                    metrics = self._stream_summary(chunk, started, first_token_at, tokens)
+                    self._stream_metrics.append(metrics)
+                    yield {"done": True, "metrics": metrics}
+                    return
+        finally:
+            # Closing early (e.g. the client went away) stops generation upstream
+            response.close()
+        
+        raise Exception("Prediction stream ended before completion")
+    
+    def _stream_summary(self, final_chunk: Dict[str, Any], started: float, first_token_at: Optional[float], tokens: int) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - started
+        generating = elapsed - (first_token_at - started) if first_token_at is not None else 0.0
+        
+        # Prefer Ollama's own token count and timing when it reports them
+        eval_count = final_chunk.get("eval_count") or tokens
+        eval_seconds = final_chunk.get("eval_duration", 0) / 1e9 or generating
+        
+        return {
+            "time_to_first_token_ms": round((first_token_at - started) * 1000, 2) if first_token_at is not None else None,
+            "total_time_ms": round(elapsed * 1000, 2),
+            "tokens": eval_count,
+            "tokens_per_second": round(eval_count / eval_seconds, 2) if eval_seconds > 0 else None
+        }
+    
+    def stream_stats(self) -> Dict[str, Any]:
+        """
+        Latency and throughput over recent streamed predictions
+        """
+        metrics = list(self._stream_metrics)
+        ttft = sorted(m["time_to_first_token_ms"] for m in metrics if m["time_to_first_token_ms"] is not None)
+        throughput = [m["tokens_per_second"] for m in metrics if m["tokens_per_second"] is not None]
+        
+        def percentile(values: List[float], q: float) -> Optional[float]:
+            return values[min(len(values) - 1, int(q * len(values)))] if values else None
+        
+        return {
+            "requests": len(metrics),
+            "time_to_first_token_ms": {"p50": percentile(ttft, 0.5), "p95": percentile(ttft, 0.95)},
+            "tokens_per_second": round(sum(throughput) / len(throughput), 2) if throughput else None
+        }
+    
+    def list_models(self) -> List[str]:
+        """
+        List all deployed models
+        """
+        try:
+            return self.registry.list_models()
             
         except Exception as e:
             print(f"Error listing models: {str(e)}")
             return []
+
+
+_ollama_service = None
+_ollama_service_lock = threading.Lock()
+
+def get_ollama_service() -> OllamaService:
+    """
+    Return the shared OllamaService instance
+    """
+    global _ollama_service
+    if _ollama_service is None:
+        with _ollama_service_lock:
+            if _ollama_service is None:
+                _ollama_service = OllamaService()
+                _ollama_service.deployments.start()
+    return _ollama_service
+
+def deploy_to_ollama(model_id: str) -> Dict[str, Any]:
+    """
+    Deploy a model to Ollama
+    """
+    return get_ollama_service().deploy_to_ollama(model_id)
+
+def predict(model_name: str, input_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Make predictions using a deployed model
+    """
+    return get_ollama_service().predict(model_name, input_data)
+
+def predict_batch(model_name: str, inputs: List[Dict[str, Any]], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Make predictions for many inputs concurrently
+    """
+    return get_ollama_service().predict_batch(model_name, inputs, max_concurrency)
+
+def predict_stream(model_name: str, input_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Stream prediction tokens from a deployed model
+    """
+    return get_ollama_service().predict_stream(model_name, input_data)
+
+def list_models() -> List[str]:
+    """
+    List all deployed models
+    """
+    return get_ollama_service().list_models()
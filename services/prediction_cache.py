@@ -0,0 +1,109 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+import hashlib
+import json
+import os
+import threading
+import time
+
+PREDICTION_CACHE_ENTRIES = int(os.getenv("ZEPHYR_PREDICTION_CACHE_ENTRIES", 10000))
+PREDICTION_CACHE_TTL = float(os.getenv("ZEPHYR_PREDICTION_CACHE_TTL", 3600))
+
+# "deterministic" caches only models deployed with temperature 0,
+# "always" caches every model and "off" disables the cache
+PREDICTION_CACHE_MODE = os.getenv("ZEPHYR_PREDICTION_CACHE_MODE", "deterministic")
+
+
+def input_hash(input_data: Any) -> str:
+    """
+    Hash of the canonical JSON form of an input, independent of key order
+    """
+    canonical = json.dumps(input_data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class PredictionCache:
+    """
+    LRU cache of prediction results with a time-to-live, grouped by model
+    so a redeploy can drop every entry of that model
+    """
+
+    def __init__(self, max_entries: int = PREDICTION_CACHE_ENTRIES, ttl: float = PREDICTION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        # key -> (expires_at, generation_seconds, result)
+        self._entries: "OrderedDict[Tuple, Tuple[float, float, Any]]" = OrderedDict()
+        self._by_model: Dict[str, set] = {}
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.seconds_saved = 0.0
+
+    def _drop(self, key: Tuple) -> None:
+        self._entries.pop(key, None)
+        keys = self._by_model.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_model[key[0]]
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, generation_seconds, result = entry
+            if expires_at < time.monotonic():
+                self._drop(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self.seconds_saved += generation_seconds
+            return result
+
+    def put(self, key: Tuple, result: Any, generation_seconds: float) -> None:
+        """
+        Store a result; key[0] must be the model name
+        """
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, generation_seconds, result)
+            self._by_model.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate_model(self, model_name: Hashable) -> int:
+        """
+        Drop all cached results of a model; returns the number removed
+        """
+        with self._lock:
+            keys = list(self._by_model.get(model_name, ()))
+            for key in keys:
+                self._drop(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "latency_saved_seconds": round(self.seconds_saved, 3)
+            }
@@ -0,0 +1,67 @@
+import os
+from services import (
+    data_service, ingestion_service, job_service, liquidity_scanner, ollama_service,
+    serving_service, solana_rpc, solana_service, storage_service
+)
+
+# Process-wide singletons holding sockets, threads or worker pools; a
+# forked worker must build its own instead of using the parent's
+FORK_UNSAFE_SINGLETONS = [
+    (data_service, "_ipfs_pool"),
+    (solana_rpc, "_rpc_client"),
+    (solana_service, "_solana_service"),
+    (ollama_service, "_ollama_service"),
+    (job_service, "_queue"),
+    (serving_service, "_model_server"),
+    (ingestion_service, "_ingestion_service"),
+    (liquidity_scanner, "_decode_pool"),
+]
+
+
+def preload() -> None:
+    """
+    One-time work for the parent process before workers fork: storage
+    schema setup and the legacy JSON migration, so workers neither race on
+    them nor repeat them. Imported modules are shared copy-on-write
+    """
+    storage_service.get_storage()
+
+
+def reset_after_fork() -> None:
+    """
+    Drop clients inherited from the parent; each worker creates its own on first use
+    """
+    for module, name in FORK_UNSAFE_SINGLETONS:
+        setattr(module, name, None)
+
+
+def start_background_services() -> None:
+    # Every worker dispatches training jobs, so queued jobs start without
+    # waiting for a new submission; claims are atomic across workers
+    job_service.get_job_queue().start()
+    # Optional in-process ingestion; runs are serialised across workers
+    if os.getenv("ZEPHYR_INGESTION_ENABLED") == "1":
+        ingestion_service.get_ingestion_service().start()
+
+
+def shutdown() -> None:
+    """
+    Stop background threads and pools this process started. Training jobs
+    it was still running stay marked as training under this process's pid;
+    the dispatcher in another worker, or in the replacement worker, puts
+    them back in the queue once this process has exited
+    """
+    if ingestion_service._ingestion_service is not None:
+        ingestion_service._ingestion_service.stop()
+    if ollama_service._ollama_service is not None:
+        ollama_service._ollama_service.deployments.stop()
+    if serving_service._model_server is not None:
+        serving_service._model_server.close()
+    if job_service._queue is not None:
+        job_service._queue.stop(wait=False)
+    if liquidity_scanner._decode_pool is not None:
+        liquidity_scanner._decode_pool.shutdown(wait=False)
+    if data_service._ipfs_pool is not None:
+        data_service._ipfs_pool.close()
+    if solana_rpc._rpc_client is not None:
+        solana_rpc._rpc_client.close()
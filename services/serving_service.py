@@ -0,0 +1,306 @@
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Union
+import os
+import threading
+import time
+import numpy as np
+import pandas as pd
+from services.evaluation_service import to_feature_matrix
+from services.storage_service import get_storage
+
+# Requests arriving within this many milliseconds of each other share one predict call
+SERVING_MAX_WAIT_MS = float(os.getenv("ZEPHYR_SERVING_MAX_WAIT_MS", 2))
+SERVING_MAX_BATCH_ROWS = int(os.getenv("ZEPHYR_SERVING_MAX_BATCH_ROWS", 4096))
+
+# Seconds between checks of a served model's record for a newer deployment
+SERVING_REFRESH_INTERVAL = float(os.getenv("ZEPHYR_SERVING_REFRESH_INTERVAL", 5))
+SERVING_TIMEOUT = float(os.getenv("ZEPHYR_SERVING_TIMEOUT", 30))
+SERVING_METRICS_WINDOW = 1000
+
+INPUT_DTYPES = {"float64": "<f8", "float32": "<f4"}
+
+
+class BatcherClosed(Exception):
+    pass
+
+
+class MicroBatcher:
+    """
+    Collects concurrent prediction requests for one model and runs them as
+    a single predict call. The first queued request opens a window of
+    max_wait seconds; the batch closes early once it reaches max_rows
+    """
+
+    def __init__(
+        self,
+        predict: Callable[[np.ndarray], np.ndarray],
+        max_wait: float = SERVING_MAX_WAIT_MS / 1000,
+        max_rows: int = SERVING_MAX_BATCH_ROWS,
+        name: str = "micro-batcher"
+    ):
+        self.predict = predict
+        self.max_wait = max_wait
+        self.max_rows = max_rows
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self.batches = 0
+        self.requests = 0
+        self.rows = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, X: np.ndarray) -> Future:
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise BatcherClosed()
+            self._queue.append((X, future))
+            self._condition.notify()
+        return future
+
+    def close(self) -> None:
+        """
+        Stop accepting requests; those already queued are still answered
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+    def _take_batch(self) -> Optional[List]:
+        with self._condition:
+            while not self._queue and not self._closed:
+                self._condition.wait()
+            if not self._queue:
+                return None
+
+            deadline = time.monotonic() + self.max_wait
+            while not self._closed:
+                if sum(len(X) for X, _ in self._queue) >= self.max_rows:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch = [self._queue.popleft()]
+            rows = len(batch[0][0])
+            while self._queue and rows + len(self._queue[0][0]) <= self.max_rows:
+                rows += len(self._queue[0][0])
+                batch.append(self._queue.popleft())
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            batch = [(X, future) for X, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            arrays = [X for X, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                # A lone request is predicted on its own buffer without a copy
+                X = arrays[0] if len(arrays) == 1 else np.concatenate(arrays)
+                predictions = np.asarray(self.predict(X))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for rows, future in zip((len(X) for X in arrays), futures):
+                future.set_result(predictions[offset:offset + rows])
+                offset += rows
+            self.batches += 1
+            self.requests += len(futures)
+            self.rows += offset
+
+
+class ServedModel:
+    """
+    One loaded version of a deployed model and its batcher
+    """
+
+    def __init__(self, model_id: str, record: Dict, estimator):
+        self.model_id = model_id
+        self.version = record["deployment"]["deployed_at"]
+        self.features = record.get("features") or record["model_params"].get("features") or []
+        self.task = record.get("task") or record["model_params"].get("task", "classification")
+        self.estimator = estimator
+        self.vocabulary = getattr(estimator, "feature_vocabulary_", None) or {}
+        self.loaded_at = time.time()
+        self.checked_at = time.monotonic()
+        self.batcher = MicroBatcher(estimator.predict, name=f"serving-{model_id}")
+
+
+class ModelServer:
+    """
+    Process-resident registry of deployed scikit-learn models. Models load
+    on deploy, or lazily on first request in other worker processes, and
+    are swapped for a new version by replacing the registry entry: requests
+    that already hold the old version finish on it while new ones go to
+    the new version
+    """
+
+    def __init__(self, refresh_interval: float = SERVING_REFRESH_INTERVAL, timeout: float = SERVING_TIMEOUT):
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self._models: Dict[str, ServedModel] = {}
+        self._lock = threading.Lock()
+        self._deploy_lock = threading.Lock()
+        self._latencies = deque(maxlen=SERVING_METRICS_WINDOW)
+        self.swaps = 0
+
+    def deploy(self, model_id: str) -> ServedModel:
+        """
+        Load the deployed version of a model and swap it in
+        """
+        # Imported here to keep model_service -> serving_service free of import cycles
+        from services.model_service import load_model_artifact
+
+        with self._deploy_lock:
+            record = get_storage().get("models", model_id)
+            if record is None:
+                raise ValueError(f"Model {model_id} not found")
+            deployment = record.get("deployment")
+            if not deployment or deployment.get("type") == "ollama":
+                raise ValueError(f"Model {model_id} is not deployed for local serving")
+
+            current = self._models.get(model_id)
+            if current is not None and current.version == deployment["deployed_at"]:
+                current.checked_at = time.monotonic()
+                return current
+
+            estimator = load_model_artifact(model_id)
+            features = record.get("features") or record["model_params"].get("features")
+            if features:
+                # Touch the memory-mapped arrays before the first real request
+                estimator.predict(np.zeros((1, len(features))))
+            served = ServedModel(model_id, record, estimator)
+
+            with self._lock:
+                previous = self._models.get(model_id)
+                self._models[model_id] = served
+            if previous is not None:
+                previous.batcher.close()
+                self.swaps += 1
+            return served
+
+    def unload(self, model_id: str) -> None:
+        with self._lock:
+            served = self._models.pop(model_id, None)
+        if served is not None:
+            served.batcher.close()
+
+    def close(self) -> None:
+        for model_id in list(self._models):
+            self.unload(model_id)
+
+    def get(self, model_id: str) -> ServedModel:
+        served = self._models.get(model_id)
+        if served is None or time.monotonic() - served.checked_at > self.refresh_interval:
+            # Picks up deployments made by other worker processes
+            served = self.deploy(model_id)
+        return served
+
+    def predict(self, model_id: str, X: np.ndarray) -> Dict[str, Any]:
+        started = time.perf_counter()
+        while True:
+            served = self.get(model_id)
+            if X.ndim != 2 or X.shape[1] != len(served.features):
+                raise ValueError(f"Model {model_id} expects {len(served.features)} features per row")
+            try:
+                future = served.batcher.submit(X)
+            except BatcherClosed:
+                # Swapped out between lookup and submit; retry on the new version
+                continue
+            predictions = future.result(self.timeout)
+            self._latencies.append(time.perf_counter() - started)
+            return {"model_id": model_id, "version": served.version, "predictions": predictions}
+
+    def predict_records(self, model_id: str, inputs: Union[List, Dict]) -> Dict[str, Any]:
+        """
+        Predict from JSON rows: lists of feature values or objects keyed by feature name
+        """
+        if isinstance(inputs, dict):
+            inputs = [inputs]
+        if not isinstance(inputs, list) or not inputs:
+            raise ValueError("inputs must be a non-empty list")
+        rows_are_objects = [isinstance(row, dict) for row in inputs]
+        if any(rows_are_objects) and not all(rows_are_objects):
+            raise ValueError("inputs must all be lists or all be objects")
+        served = self.get(model_id)
+        if rows_are_objects[0]:
+            X = to_feature_matrix(pd.DataFrame(inputs), served.features, served.vocabulary)
+        elif served.vocabulary:
+            # Category values need the per-column encoding, not a plain float array
+            rows = inputs if isinstance(inputs[0], list) else [inputs]
+            if any(not isinstance(row, list) or len(row) != len(served.features) for row in rows):
+                raise ValueError(f"Model {model_id} expects {len(served.features)} features per row")
+            X = to_feature_matrix(pd.DataFrame(rows, columns=served.features), served.features, served.vocabulary)
+        else:
+            try:
+                X = np.asarray(inputs, dtype=np.float64)
+            except (TypeError, ValueError):
+                # Ragged rows or nested values in a row are client errors
+                raise ValueError("inputs must be rows of numeric feature values")
+            if X.ndim == 1:
+                X = X.reshape(1, -1)
+        return self.predict(model_id, X)
+
+    def predict_bytes(self, model_id: str, body: bytes, dtype: str = "float64") -> Dict[str, Any]:
+        """
+        Predict from a raw little-endian row-major matrix; the array is a
+        view on the request body, not a copy
+        """
+        if dtype not in INPUT_DTYPES:
+            raise ValueError(f"dtype must be one of {list(INPUT_DTYPES)}")
+        n_features = len(self.get(model_id).features)
+        item_size = np.dtype(INPUT_DTYPES[dtype]).itemsize
+        if not body or n_features == 0 or len(body) % (item_size * n_features):
+            raise ValueError(f"Body must hold whole rows of {n_features} {dtype} values")
+        X = np.frombuffer(body, dtype=INPUT_DTYPES[dtype]).reshape(-1, n_features)
+        return self.predict(model_id, X)
+
+    def stats(self) -> Dict[str, Any]:
+        latencies = sorted(self._latencies)
+
+        def percentile(q: float) -> Optional[float]:
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 3) if latencies else None
+
+        with self._lock:
+            models = list(self._models.values())
+        return {
+            "models": {
+                served.model_id: {
+                    "version": served.version,
+                    "features": len(served.features),
+                    "task": served.task,
+                    "requests": served.batcher.requests,
+                    "rows": served.batcher.rows,
+                    "batches": served.batcher.batches,
+                    "mean_batch_requests": round(served.batcher.requests / served.batcher.batches, 2) if served.batcher.batches else None
+                }
+                for served in models
+            },
+            "swaps": self.swaps,
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)}
+        }
+
+
+_model_server = None
+_model_server_lock = threading.Lock()
+
+def get_model_server() -> ModelServer:
+    """
+    Return the process-wide model server
+    """
+    global _model_server
+    if _model_server is None:
+        with _model_server_lock:
+            if _model_server is None:
+                _model_server = ModelServer()
+    return _model_server
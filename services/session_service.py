@@ -0,0 +1,157 @@
+from collections import OrderedDict
+from typing import Any, Dict
+import os
+import secrets
+import threading
+import time
+import uuid
+
+from jose import JWTError, jwt
+
+from services.storage_service import get_storage
+
+# Shared by all workers; a random per-process secret is used when unset,
+# which is only fit for the development server (see require_session_secret)
+SESSION_SECRET = os.getenv("ZEPHYR_SESSION_SECRET") or secrets.token_urlsafe(32)
+SESSION_ALGORITHM = "HS256"
+SESSION_TTL = int(os.getenv("ZEPHYR_SESSION_TTL", 900))
+
+# Seconds a wallet has to sign a login challenge; each challenge works once
+CHALLENGE_TTL = int(os.getenv("ZEPHYR_CHALLENGE_TTL", 300))
+CHALLENGE_AUDIENCE = "zephyr-challenge"
+USED_CHALLENGES_COLLECTION = "used_challenges"
+
+# Validated tokens kept so repeat requests skip JWT decoding
+SESSION_CACHE_SIZE = int(os.getenv("ZEPHYR_SESSION_CACHE_SIZE", 10000))
+
+SESSION_ISSUER = "zephyr"
+
+
+class SessionError(Exception):
+    pass
+
+
+_validated = OrderedDict()
+_validated_lock = threading.Lock()
+_purged_at = 0.0
+
+
+def require_session_secret() -> None:
+    """
+    Refuse to serve without a configured secret: a generated one differs
+    between servers and changes on every restart, logging everyone out
+    """
+    if not os.getenv("ZEPHYR_SESSION_SECRET"):
+        raise RuntimeError("ZEPHYR_SESSION_SECRET must be set in production")
+
+
+def issue_session(wallet_address: str) -> Dict[str, Any]:
+    """
+    Create a short-lived session token for a verified wallet
+    """
+    now = int(time.time())
+    claims = {
+        "sub": wallet_address,
+        "iss": SESSION_ISSUER,
+        "iat": now,
+        "exp": now + SESSION_TTL,
+        "jti": uuid.uuid4().hex
+    }
+    return {
+        "token": jwt.encode(claims, SESSION_SECRET, algorithm=SESSION_ALGORITHM),
+        "expires_at": claims["exp"],
+        "expires_in": SESSION_TTL
+    }
+
+
+def verify_session(token: str) -> Dict[str, Any]:
+    """
+    Return the claims of a valid session token, or raise SessionError
+    """
+    now = time.time()
+    with _validated_lock:
+        claims = _validated.get(token)
+        if claims is not None:
+            if claims["exp"] > now:
+                _validated.move_to_end(token)
+                return claims
+            del _validated[token]
+
+    try:
+        claims = jwt.decode(token, SESSION_SECRET, algorithms=[SESSION_ALGORITHM], issuer=SESSION_ISSUER)
+    except JWTError as e:
+        raise SessionError(str(e))
+
+    with _validated_lock:
+        _validated[token] = claims
+        while len(_validated) > SESSION_CACHE_SIZE:
+            _validated.popitem(last=False)
+    return claims
+
+
+def challenge_message(claims: Dict[str, Any]) -> str:
+    """
+    The text a wallet signs to answer a challenge
+    """
+    return (
+        "Sign in to Zephyr\n"
+        f"Wallet: {claims['sub']}\n"
+        f"Nonce: {claims['jti']}\n"
+        f"Expires at: {claims['exp']}"
+    )
+
+
+def issue_challenge(wallet_address: str) -> Dict[str, Any]:
+    """
+    Create a login challenge: the wallet signs the message and sends it
+    back with the nonce, so a captured signature cannot be replayed
+    """
+    now = int(time.time())
+    claims = {
+        "sub": wallet_address,
+        "iss": SESSION_ISSUER,
+        "aud": CHALLENGE_AUDIENCE,
+        "iat": now,
+        "exp": now + CHALLENGE_TTL,
+        "jti": uuid.uuid4().hex
+    }
+    return {
+        "nonce": jwt.encode(claims, SESSION_SECRET, algorithm=SESSION_ALGORITHM),
+        "message": challenge_message(claims),
+        "expires_at": claims["exp"]
+    }
+
+
+def verify_challenge(wallet_address: str, nonce: str) -> Dict[str, Any]:
+    """
+    Return the claims of an unexpired challenge issued to this wallet, or raise SessionError
+    """
+    try:
+        claims = jwt.decode(
+            nonce, SESSION_SECRET, algorithms=[SESSION_ALGORITHM],
+            issuer=SESSION_ISSUER, audience=CHALLENGE_AUDIENCE
+        )
+    except JWTError as e:
+        raise SessionError(f"Invalid challenge: {e}")
+    if claims["sub"] != wallet_address:
+        raise SessionError("Challenge was issued to another wallet")
+    return claims
+
+
+def redeem_challenge(claims: Dict[str, Any]) -> None:
+    """
+    Mark a challenge as used once its signature has been checked; raises
+    SessionError if it was used before
+    """
+    global _purged_at
+    record = {"wallet_address": claims["sub"], "expires_at": claims["exp"]}
+    # insert returns the record already stored under the nonce, if any
+    if get_storage().insert(USED_CHALLENGES_COLLECTION, claims["jti"], record) is not record:
+        raise SessionError("Challenge was already used")
+
+    # Expired challenges are rejected anyway, so their records can go;
+    # expires_at is indexed, so this only touches the expired rows
+    now = time.time()
+    if now - _purged_at > CHALLENGE_TTL:
+        _purged_at = now
+        get_storage().delete_before(USED_CHALLENGES_COLLECTION, "expires_at", now)
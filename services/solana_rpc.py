@@ -0,0 +1,260 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import math
+import os
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+RPC_URL = os.getenv("ZEPHYR_SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
+RPC_BATCH_SIZE = int(os.getenv("ZEPHYR_RPC_BATCH_SIZE", 25))
+RPC_MAX_CONCURRENCY = int(os.getenv("ZEPHYR_RPC_MAX_CONCURRENCY", 4))
+RPC_MAX_RETRIES = int(os.getenv("ZEPHYR_RPC_MAX_RETRIES", 5))
+RPC_BACKOFF = float(os.getenv("ZEPHYR_RPC_BACKOFF", 0.5))
+RPC_TIMEOUT = float(os.getenv("ZEPHYR_RPC_TIMEOUT", 30))
+
+# getMultipleAccounts accepts at most this many addresses per call
+MULTIPLE_ACCOUNTS_LIMIT = 100
+
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+
+# HTTP statuses and JSON-RPC error codes worth retrying
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+RETRYABLE_CODES = (429, -32005, -32007, -32014)
+
+
+class RPCError(Exception):
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class RateLimited(RPCError):
+    def __init__(self, message: str, retry_after: Optional[float] = None, code: Optional[int] = 429):
+        super().__init__(message, code)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait from a Retry-After header, given as seconds or as an
+    HTTP date; None when absent or unparseable, so the caller backs off
+    """
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+        return max(seconds, 0.0) if math.isfinite(seconds) else None
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class SolanaRPCClient:
+    """
+    JSON-RPC client that fetches in batch requests over a bounded thread pool
+    """
+
+    def __init__(
+        self,
+        url: str = RPC_URL,
+        batch_size: int = RPC_BATCH_SIZE,
+        max_concurrency: int = RPC_MAX_CONCURRENCY,
+        max_retries: int = RPC_MAX_RETRIES,
+        backoff: float = RPC_BACKOFF,
+        timeout: float = RPC_TIMEOUT
+    ):
+        self.url = url
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="solana-rpc")
+        self._ids = iter(range(1, 2 ** 62))
+        self._ids_lock = threading.Lock()
+
+    def _next_id(self) -> int:
+        with self._ids_lock:
+            return next(self._ids)
+
+    def _post(self, payload: Any) -> Any:
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        if response.status_code == 429:
+            raise RateLimited("Rate limited by RPC node", parse_retry_after(response.headers.get("Retry-After")))
+        if response.status_code in RETRYABLE_STATUSES:
+            raise RPCError(f"RPC node returned {response.status_code}", response.status_code)
+        if response.status_code != 200:
+            raise RPCError(f"RPC request failed: {response.text}", response.status_code)
+        return response.json()
+
+    def _with_retries(self, fn, *args) -> Any:
+        attempt = 0
+        while True:
+            try:
+                return fn(*args)
+            except (RPCError, requests.ConnectionError, requests.Timeout) as e:
+                code = getattr(e, "code", None)
+                retryable = not isinstance(e, RPCError) or code in RETRYABLE_STATUSES or code in RETRYABLE_CODES
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = getattr(e, "retry_after", None) or self.backoff * (2 ** attempt) * (1 + random.random())
+                time.sleep(delay)
+                attempt += 1
+
+    def call(self, method: str, params: Optional[List] = None) -> Any:
+        """
+        Make a single JSON-RPC call
+        """
+        result = self.call_batch([(method, params or [])])[0]
+        if isinstance(result, RPCError):
+            raise result
+        return result
+
+    def _send_batch(self, calls: Sequence[Tuple[str, List]]) -> List[Any]:
+        ids = [self._next_id() for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        replies = self._post(payload)
+        if isinstance(replies, dict):
+            # Some nodes answer a whole batch with a single error object
+            error = replies.get("error", {})
+            if error.get("code") in RETRYABLE_CODES:
+                raise RateLimited(error.get("message", "Rate limited"), code=error.get("code"))
+            raise RPCError(error.get("message", "Invalid batch response"), error.get("code"))
+
+        by_id = {reply.get("id"): reply for reply in replies}
+        results = []
+        for request_id in ids:
+            reply = by_id.get(request_id)
+            if reply is None:
+                raise RPCError(f"Missing response for request {request_id}")
+            if "error" in reply:
+                error = reply["error"]
+                if error.get("code") in RETRYABLE_CODES:
+                    raise RateLimited(error.get("message", "Rate limited"), code=error.get("code"))
+                results.append(RPCError(error.get("message", "RPC error"), error.get("code")))
+            else:
+                results.append(reply.get("result"))
+        return results
+
+    def call_batch(self, calls: Sequence[Tuple[str, List]]) -> List[Any]:
+        """
+        Make many JSON-RPC calls; results come back in call order, with an
+        RPCError in place of each call that failed
+        """
+        chunks = [calls[i:i + self.batch_size] for i in range(0, len(calls), self.batch_size)]
+        if len(chunks) == 1:
+            return self._with_retries(self._send_batch, chunks[0])
+
+        results = []
+        for chunk_results in self._executor.map(lambda chunk: self._with_retries(self._send_batch, chunk), chunks):
+            results.extend(chunk_results)
+        return results
+
+    def get_signatures_for_address(
+        self,
+        address: str,
+        before: Optional[str] = None,
+        until: Optional[str] = None,
+        limit: int = 1000
+    ) -> List[Dict]:
+        """
+        Get confirmed signatures for an address, newest first
+        """
+        config = {"limit": limit}
+        if before:
+            config["before"] = before
+        if until:
+            config["until"] = until
+        return self.call("getSignaturesForAddress", [address, config]) or []
+
+    def get_transactions(self, signatures: Sequence[str]) -> List[Optional[Dict]]:
+        """
+        Fetch transactions in signature order; missing or failed ones are None
+        """
+        results = self.call_batch([
+            ("getTransaction", [signature, {"encoding": "json", "maxSupportedTransactionVersion": 0}])
+            for signature in signatures
+        ])
+        return [None if isinstance(result, RPCError) else result for result in results]
+
+    def get_multiple_accounts(self, addresses: Sequence[str], config: Optional[Dict] = None) -> List[Optional[Dict]]:
+        """
+        Fetch accounts in address order, MULTIPLE_ACCOUNTS_LIMIT per call;
+        accounts that do not exist are None
+        """
+        config = config or {"encoding": "base64"}
+        calls = [
+            ("getMultipleAccounts", [list(addresses[i:i + MULTIPLE_ACCOUNTS_LIMIT]), config])
+            for i in range(0, len(addresses), MULTIPLE_ACCOUNTS_LIMIT)
+        ]
+        accounts = []
+        for result in self.call_batch(calls):
+            if isinstance(result, RPCError):
+                raise result
+            accounts.extend(result["value"])
+        return accounts
+
+    def get_program_accounts(self, program_id: str, filters: Optional[List[Dict]] = None, config: Optional[Dict] = None) -> List[Dict]:
+        """
+        Fetch all accounts owned by a program that match the filters
+        (e.g. {"dataSize": n} or {"memcmp": {"offset": n, "bytes": base58}})
+        """
+        config = {"encoding": "base64", **(config or {})}
+        if filters:
+            config["filters"] = filters
+        return self.call("getProgramAccounts", [program_id, config]) or []
+
+    def get_token_accounts_by_owners(self, owners: Sequence[str], program_id: str = TOKEN_PROGRAM_ID) -> List[List[Dict]]:
+        """
+        Fetch the parsed token accounts of many owners, in owner order
+        """
+        results = self.call_batch([
+            ("getTokenAccountsByOwner", [owner, {"programId": program_id}, {"encoding": "jsonParsed"}])
+            for owner in owners
+        ])
+        accounts = []
+        for result in results:
+            if isinstance(result, RPCError):
+                raise result
+            accounts.append(result["value"])
+        return accounts
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+_rpc_client = None
+_rpc_client_lock = threading.Lock()
+
+
+def get_rpc_client() -> SolanaRPCClient:
+    """
+    Return the process-wide RPC client, sharing its connection pool
+    """
+    global _rpc_client
+    if _rpc_client is None:
+        with _rpc_client_lock:
+            if _rpc_client is None:
+                _rpc_client = SolanaRPCClient()
+    return _rpc_client
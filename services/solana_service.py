@@ -1,11 +1,30 @@
-from solana.rpc.api import Client
-from solana.rpc.types import MemcmpOpts
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional
 import datetime
+import os
+import threading
+from services.account_cache import AccountCache
+from services.liquidity_scanner import LiquidityScanner
+from services.solana_rpc import get_rpc_client
+from services.transaction_cache import TransactionCache
+
+# Program whose transactions are collected
+PROGRAM_ID = os.getenv("ZEPHYR_PROGRAM_ID", "YOUR_PROGRAM_ID")
+
+# Maximum page size accepted by getSignaturesForAddress
+SIGNATURE_PAGE_SIZE = 1000
+
+TX_CACHE_ENABLED = os.getenv("ZEPHYR_TX_CACHE", "1") == "1"
+
+def _index_reaches(coverage: Dict, start_timestamp: float) -> bool:
+    reached = coverage.get("reached")
+    return reached is not None and reached <= start_timestamp
 
 class SolanaService:
     def __init__(self):
-        self.client = Client("https://api.mainnet-beta.solana.com")
+        self.rpc = get_rpc_client()
+        self.accounts = AccountCache()
+        self.liquidity = LiquidityScanner(self.rpc)
+        self.cache = TransactionCache() if TX_CACHE_ENABLED else None
         
     def get_defi_data(self, data_type: str, start_time: str, end_time: str) -> List[Dict]:
         """
@@ -22,36 +41,210 @@ class SolanaService:
             print(f"Error fetching Solana data: {str(e)}")
             return []
             
+    def iter_defi_data(
+        self,
+        data_type: str,
+        start_time: str,
+        end_time: str,
+        before: Optional[str] = None,
+        batch_size: int = 100
+    ) -> Iterator[List[Dict]]:
+        """
+        Stream DeFi-related data in batches, newest first
+        """
+        if data_type == "transactions":
+            yield from self._iter_transaction_data(start_time, end_time, before, batch_size)
+        elif data_type == "liquidity":
+            yield self._get_liquidity_data(start_time, end_time)
+        else:
+            raise ValueError(f"Unsupported data type: {data_type}")
+            
     def _get_transaction_data(self, start_time: str, end_time: str) -> List[Dict]:
         """
         Get transaction data from specified time range
         """
+        transactions = []
+        for batch in self._iter_transaction_data(start_time, end_time):
+            transactions.extend(batch)
+                
+        return transactions
+        
+    def _page_signatures(
+        self,
+        before: Optional[str] = None,
+        until: Optional[str] = None,
+        start_timestamp: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """
+        Page through program signatures newest first, stopping at until or start_timestamp
+        """
+        while True:
+            # In production, you would want to filter for specific programs
+            page = self.rpc.get_signatures_for_address(
+                PROGRAM_ID,
+                before=before,
+                until=until,
+                limit=SIGNATURE_PAGE_SIZE
+            )
+            
+            for sig in page:
+                block_time = sig.get("blockTime")
+                if start_timestamp is not None and block_time is not None and block_time < start_timestamp:
+                    return
+                yield sig
+                
+            if len(page) < SIGNATURE_PAGE_SIZE:
+                return
+            before = page[-1]["signature"]
+            
+    def get_signatures_since(
+        self,
+        until: Optional[str] = None,
+        start_timestamp: Optional[float] = None,
+        before: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """
+        Stream program signatures newer than until, or than start_timestamp,
+        newest first, starting below before when given
+        """
+        yield from self._page_signatures(before=before, until=until, start_timestamp=start_timestamp)
+        
+    def get_transactions(self, signatures: List[str]) -> List[Optional[Dict]]:
+        """
+        Fetch and parse transactions in signature order; ones that could not
+        be fetched are None, so callers can tell a gap from an empty batch
+        """
+        fetched = self._fetch_transaction_map(signatures)
+        return [
+            self._parse_transaction(fetched[signature]) if signature in fetched else None
+            for signature in signatures
+        ]
+        
+    def _iter_signatures(self, start_timestamp: float, end_timestamp: float, before: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Yield program signatures from end_timestamp back to start_timestamp
+        """
+        cursor = self.cache.get_signature(PROGRAM_ID, before) if self.cache and before else None
+        if self.cache is not None and not (before and cursor is None):
+            coverage = self._refresh_signature_index(start_timestamp)
+            if coverage is None or _index_reaches(coverage, start_timestamp):
+                yield from self.cache.iter_signatures(PROGRAM_ID, start_timestamp, end_timestamp, cursor)
+                return
+        
+        # No cache, or the window goes back further than the bounded index holds
+        for sig in self._page_signatures(before, start_timestamp=start_timestamp):
+            block_time = sig.get("blockTime")
+            if block_time is None or block_time <= end_timestamp:
+                yield sig
+        
+    def _refresh_signature_index(self, start_timestamp: float) -> Optional[Dict]:
+        """
+        Fetch only the signatures missing from either end of the cached
+        range; "reached" records the time the range is complete back to
+        """
+        coverage = self.cache.get_coverage(PROGRAM_ID)
+        
+        if coverage is None:
+            run = list(self._page_signatures(start_timestamp=start_timestamp))
+            if not run:
+                return None
+            self.cache.add_signatures(PROGRAM_ID, run)
+            coverage = {"newest": run[0], "oldest": run[-1], "reached": start_timestamp}
+        else:
+            newer = list(self._page_signatures(until=coverage["newest"]["signature"]))
+            if newer:
+                self.cache.add_signatures(PROGRAM_ID, newer)
+                coverage["newest"] = newer[0]
+            
+            if not _index_reaches(coverage, start_timestamp):
+                older = list(self._page_signatures(
+                    before=coverage["oldest"]["signature"],
+                    start_timestamp=start_timestamp
+                ))
+                if older:
+                    self.cache.add_signatures(PROGRAM_ID, older, newer=False)
+                    coverage["oldest"] = older[-1]
+                coverage["reached"] = start_timestamp
+        
+        oldest = self.cache.trim_signatures(PROGRAM_ID)
+        if oldest is not None:
+            # The index lost its oldest rows and is only complete back to what is left
+            coverage["oldest"] = oldest
+            coverage["reached"] = oldest["blockTime"]
+        self.cache.set_coverage(PROGRAM_ID, coverage)
+        return coverage
+        
+    def _iter_transaction_data(
+        self,
+        start_time: str,
+        end_time: str,
+        before: Optional[str] = None,
+        batch_size: int = 100
+    ) -> Iterator[List[Dict]]:
+        """
+        Stream parsed transactions from specified time range in batches
+        """
         start_timestamp = datetime.datetime.fromisoformat(start_time).timestamp()
         end_timestamp = datetime.datetime.fromisoformat(end_time).timestamp()
         
-        # Get signatures for address
-        # In production, you would want to filter for specific programs
-        signatures = self.client.get_signatures_for_address(
-            "YOUR_PROGRAM_ID",
-            before=str(int(end_timestamp)),
-            until=str(int(start_timestamp))
-        )
-        
-        transactions = []
-        for sig in signatures.value:
-            tx = self.client.get_transaction(sig.signature)
-            if tx:
-                transactions.append(self._parse_transaction(tx))
+        signatures = []
+        for sig in self._iter_signatures(start_timestamp, end_timestamp, before):
+            signatures.append(sig["signature"])
+            if len(signatures) >= batch_size:
+                yield self._fetch_transactions(signatures)
+                signatures = []
                 
-        return transactions
+        if signatures:
+            yield self._fetch_transactions(signatures)
+            
+    def _fetch_transaction_map(self, signatures: List[str]) -> Dict[str, Dict]:
+        """
+        Raw transactions by signature, fetched concurrently; failed fetches are absent
+        """
+        if self.cache is None:
+            return {
+                signature: tx
+                for signature, tx in zip(signatures, self.rpc.get_transactions(signatures))
+                if tx
+            }
+        
+        cached = self.cache.get_transactions(signatures)
+        missing = [signature for signature in signatures if signature not in cached]
+        if missing:
+            fetched = {
+                signature: tx
+                for signature, tx in zip(missing, self.rpc.get_transactions(missing))
+                if tx
+            }
+            self.cache.put_transactions(fetched)
+            cached.update(fetched)
+        return cached
+        
+    def _fetch_transactions(self, signatures: List[str]) -> List[Dict]:
+        """
+        Fetch and parse transactions concurrently, preserving signature order
+        """
+        fetched = self._fetch_transaction_map(signatures)
+        return [self._parse_transaction(fetched[signature]) for signature in signatures if signature in fetched]
         
     def _get_liquidity_data(self, start_time: str, end_time: str) -> List[Dict]:
         """
         Get liquidity pool data from specified time range
         """
-        # This would typically involve querying specific liquidity pool programs
-        # and parsing their state data
-        return []
+        # Pool state is a point-in-time snapshot, stamped with its refresh time
+        self.liquidity.refresh()
+        return self.liquidity.snapshot()
+        
+    def get_liquidity_snapshot(self, since: int = 0) -> Dict:
+        """
+        Refresh pool state and return pools changed after snapshot version since
+        """
+        refresh = self.liquidity.refresh()
+        return {
+            "version": self.liquidity.version,
+            "refresh": refresh,
+            "pools": self.liquidity.snapshot(since)
+        }
         
     def _parse_transaction(self, transaction: Dict) -> Dict:
         """
@@ -59,7 +252,7 @@ class SolanaService:
         """
         return {
             "signature": transaction.get("transaction", {}).get("signatures", [])[0],
-            "timestamp": transaction.get("block_time"),
+            "timestamp": transaction.get("blockTime", transaction.get("block_time")),
             "success": transaction.get("meta", {}).get("err") is None,
             "fee": transaction.get("meta", {}).get("fee", 0),
             # Add more transaction details as needed
@@ -70,25 +263,104 @@ class SolanaService:
         Get all token accounts for a wallet
         """
         try:
-            accounts = self.client.get_token_accounts_by_owner(
-                wallet_address,
-                MemcmpOpts(offset=0, bytes="TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA")
-            )
-            
-            return [self._parse_token_account(account) for account in accounts.value]
+            return self.get_token_accounts_batch([wallet_address])[wallet_address]
         except Exception as e:
             print(f"Error fetching token accounts: {str(e)}")
             return []
             
+    def get_token_accounts_batch(self, wallet_addresses: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Get token accounts for many wallets; uncached wallets are fetched
+        together in batched RPC requests
+        """
+        def load(keys: List) -> Dict:
+            owners = [key[1] for key in keys]
+            accounts = self.rpc.get_token_accounts_by_owners(owners)
+            return {
+                key: [self._parse_token_account(account) for account in owner_accounts]
+                for key, owner_accounts in zip(keys, accounts)
+            }
+        
+        found = self.accounts.get_many([("tokens", address) for address in wallet_addresses], load)
+        return {key[1]: value for key, value in found.items()}
+        
+    def get_balances(self, wallet_addresses: List[str]) -> Dict[str, float]:
+        """
+        Get SOL balances for many wallets with getMultipleAccounts
+        """
+        def load(keys: List) -> Dict:
+            # A zero-length data slice returns just the lamports
+            accounts = self.rpc.get_multiple_accounts(
+                [key[1] for key in keys],
+                {"encoding": "base64", "dataSlice": {"offset": 0, "length": 0}}
+            )
+            return {
+                key: (account["lamports"] if account else 0) / 1e9  # Convert lamports to SOL
+                for key, account in zip(keys, accounts)
+            }
+        
+        found = self.accounts.get_many([("balance", address) for address in wallet_addresses], load)
+        return {key[1]: value for key, value in found.items()}
+            
     def _parse_token_account(self, account: Dict) -> Dict:
         """
         Parse a raw token account into a structured format
         """
         data = account.get("account", {}).get("data", {})
+        info = data.get("parsed", {}).get("info", data) if isinstance(data, dict) else {}
+        amount = info.get("tokenAmount", {})
         return {
-            "mint": data.get("mint"),
-            "owner": data.get("owner"),
-            "amount": data.get("amount"),
-            "delegate": data.get("delegate"),
-            "state": data.get("state")
+            "address": account.get("pubkey"),
+            "mint": info.get("mint"),
+            "owner": info.get("owner"),
+            "amount": amount.get("amount") if isinstance(amount, dict) else info.get("amount"),
+            "decimals": amount.get("decimals") if isinstance(amount, dict) else None,
+            "delegate": info.get("delegate"),
+            "state": info.get("state")
         }
+
+
+_solana_service = None
+_solana_service_lock = threading.Lock()
+
+def get_solana_service() -> SolanaService:
+    """
+    Return the shared SolanaService instance
+    """
+    global _solana_service
+    if _solana_service is None:
+        with _solana_service_lock:
+            if _solana_service is None:
+                _solana_service = SolanaService()
+    return _solana_service
+
+def get_cache_stats() -> Dict:
+    """
+    Get hit/miss statistics of the transaction cache
+    """
+    cache = get_solana_service().cache
+    return cache.stats() if cache else {"enabled": False}
+
+def get_account_cache_stats() -> Dict:
+    """
+    Get hit/miss statistics of the balance and token-account cache
+    """
+    return get_solana_service().accounts.stats()
+
+def get_defi_data(data_type: str, start_time: str, end_time: str) -> List[Dict]:
+    """
+    Get DeFi-related data from Solana blockchain
+    """
+    return get_solana_service().get_defi_data(data_type, start_time, end_time)
+
+def iter_defi_data(
+    data_type: str,
+    start_time: str,
+    end_time: str,
+    before: Optional[str] = None,
+    batch_size: int = 100
+) -> Iterator[List[Dict]]:
+    """
+    Stream DeFi-related data from Solana blockchain in batches
+    """
+    return get_solana_service().iter_defi_data(data_type, start_time, end_time, before, batch_size)
@@ -0,0 +1,351 @@
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Storage backend selection: "sqlite" (default) or "json"
+STORAGE_BACKEND = os.getenv("ZEPHYR_STORAGE_BACKEND", "sqlite")
+DATABASE_FILE = os.getenv("ZEPHYR_DATABASE_FILE", "data/zephyr.db")
+
+# Legacy JSON files, one per collection
+JSON_FILES = {
+    "users": "data/users.json",
+    "models": "data/models.json",
+}
+
+# Bookkeeping collection of the SQLite backend; the JSON import is marked
+# done here only once it has finished, so an interrupted import is retried
+META_COLLECTION = "_meta"
+JSON_MIGRATION_KEY = "json_migration"
+
+# Record fields promoted to indexed columns, per collection
+INDEXED_FIELDS = {
+    "users": ["wallet_address"],
+    "models": ["user_id", "status"],
+    "uploads": ["user_id", "status"],
+    "used_challenges": ["expires_at"],
+}
+
+
+class StorageBackend(ABC):
+    """
+    Key/value store of JSON records grouped into named collections. Only
+    indexed fields can be queried, whatever the backend
+    """
+
+    indexed_fields: Dict[str, List[str]] = INDEXED_FIELDS
+
+    def _require_indexed(self, collection: str, fields) -> None:
+        unknown = [field for field in fields if field not in self.indexed_fields.get(collection, [])]
+        if unknown:
+            raise ValueError(f"Fields {unknown} are not indexed for {collection}")
+
+    @abstractmethod
+    def get(self, collection: str, key: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, collection: str, key: str, record: Dict) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def insert(self, collection: str, key: str, record: Dict) -> Dict:
+        """
+        Insert a record unless the key exists; return the stored record
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, collection: str, key: str, updater: Callable[[Dict], None]) -> Optional[Dict]:
+        """
+        Atomically apply updater to a record in place; return None if missing
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, collection: str, key: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete_before(self, collection: str, field: str, value) -> int:
+        """
+        Delete records whose field is below value; return how many went
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def find(self, collection: str, **filters) -> List[Dict]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def all(self, collection: str) -> Dict[str, Dict]:
+        raise NotImplementedError
+
+
+class JSONStorageBackend(StorageBackend):
+    """
+    Original behaviour: one JSON file per collection, rewritten on every write
+    """
+
+    def __init__(self, files: Optional[Dict[str, str]] = None, indexed_fields: Optional[Dict[str, List[str]]] = None):
+        self.files = files or JSON_FILES
+        self.indexed_fields = indexed_fields or INDEXED_FIELDS
+        self._lock = threading.RLock()
+
+    def _path(self, collection: str) -> str:
+        return self.files.get(collection, f"data/{collection}.json")
+
+    def all(self, collection: str) -> Dict[str, Dict]:
+        path = self._path(collection)
+        if not os.path.exists(path):
+            return {}
+
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except:
+            return {}
+
+    def _save(self, collection: str, records: Dict[str, Dict]) -> None:
+        path = self._path(collection)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(records, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def get(self, collection: str, key: str) -> Optional[Dict]:
+        return self.all(collection).get(key)
+
+    def put(self, collection: str, key: str, record: Dict) -> None:
+        with self._lock:
+            records = self.all(collection)
+            records[key] = record
+            self._save(collection, records)
+
+    def insert(self, collection: str, key: str, record: Dict) -> Dict:
+        with self._lock:
+            records = self.all(collection)
+            if key in records:
+                return records[key]
+            records[key] = record
+            self._save(collection, records)
+            return record
+
+    def update(self, collection: str, key: str, updater: Callable[[Dict], None]) -> Optional[Dict]:
+        with self._lock:
+            records = self.all(collection)
+            if key not in records:
+                return None
+            updater(records[key])
+            self._save(collection, records)
+            return records[key]
+
+    def delete(self, collection: str, key: str) -> None:
+        with self._lock:
+            records = self.all(collection)
+            if records.pop(key, None) is not None:
+                self._save(collection, records)
+
+    def delete_before(self, collection: str, field: str, value) -> int:
+        self._require_indexed(collection, [field])
+        with self._lock:
+            records = self.all(collection)
+            expired = [key for key, record in records.items() if record.get(field) is not None and record[field] < value]
+            for key in expired:
+                del records[key]
+            if expired:
+                self._save(collection, records)
+            return len(expired)
+
+    def find(self, collection: str, **filters) -> List[Dict]:
+        self._require_indexed(collection, filters)
+        return [
+            record for record in self.all(collection).values()
+            if all(record.get(field) == value for field, value in filters.items())
+        ]
+
+
+class SQLiteStorageBackend(StorageBackend):
+    """
+    SQLite store in WAL mode with one row per record and indexed lookup fields
+    """
+
+    def __init__(self, path: str = DATABASE_FILE, indexed_fields: Optional[Dict[str, List[str]]] = None):
+        self.path = path
+        self.indexed_fields = indexed_fields or INDEXED_FIELDS
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._tables = set()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        for collection in self.indexed_fields:
+            self._ensure_table(collection)
+        if self.get(META_COLLECTION, JSON_MIGRATION_KEY) is None:
+            # Inserts keep existing keys, so re-running after a crash is safe
+            migrated = migrate_from_json(self)
+            self.put(META_COLLECTION, JSON_MIGRATION_KEY, {"completed_at": time.time(), "records": migrated})
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connections are per thread and per process, so forked workers
+        # never reuse a handle inherited from their parent
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _fields(self, collection: str) -> List[str]:
+        return self.indexed_fields.get(collection, [])
+
+    def _ensure_table(self, collection: str) -> None:
+        if collection in self._tables:
+            return
+
+        with self._schema_lock:
+            conn = self._connection()
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {collection} "
+                f"(key TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            existing = {row[1] for row in conn.execute(f"PRAGMA table_info({collection})")}
+            for field in self._fields(collection):
+                if field not in existing:
+                    conn.execute(f"ALTER TABLE {collection} ADD COLUMN {field}")
+                    # Rows written before the field was indexed get it from their record
+                    conn.execute(f"UPDATE {collection} SET {field} = json_extract(data, '$.{field}')")
+                conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_{collection}_{field} "
+                    f"ON {collection} ({field})"
+                )
+            self._tables.add(collection)
+
+    def _row_values(self, collection: str, key: str, record: Dict) -> List:
+        values = [key, json.dumps(record)]
+        values.extend(record.get(field) for field in self._fields(collection))
+        return values
+
+    def _write(self, conn: sqlite3.Connection, collection: str, key: str, record: Dict, verb: str) -> None:
+        columns = ["key", "data"] + self._fields(collection)
+        placeholders = ", ".join("?" for _ in columns)
+        conn.execute(
+            f"{verb} INTO {collection} ({', '.join(columns)}) VALUES ({placeholders})",
+            self._row_values(collection, key, record)
+        )
+
+    def get(self, collection: str, key: str) -> Optional[Dict]:
+        self._ensure_table(collection)
+        row = self._connection().execute(
+            f"SELECT data FROM {collection} WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, collection: str, key: str, record: Dict) -> None:
+        self._ensure_table(collection)
+        self._write(self._connection(), collection, key, record, "INSERT OR REPLACE")
+
+    def insert(self, collection: str, key: str, record: Dict) -> Dict:
+        self._ensure_table(collection)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT data FROM {collection} WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                conn.execute("COMMIT")
+                return json.loads(row[0])
+            self._write(conn, collection, key, record, "INSERT")
+            conn.execute("COMMIT")
+            return record
+        except:
+            conn.execute("ROLLBACK")
+            raise
+
+    def update(self, collection: str, key: str, updater: Callable[[Dict], None]) -> Optional[Dict]:
+        self._ensure_table(collection)
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT data FROM {collection} WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                conn.execute("COMMIT")
+                return None
+            record = json.loads(row[0])
+            updater(record)
+            self._write(conn, collection, key, record, "INSERT OR REPLACE")
+            conn.execute("COMMIT")
+            return record
+        except:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, collection: str, key: str) -> None:
+        self._ensure_table(collection)
+        self._connection().execute(f"DELETE FROM {collection} WHERE key = ?", (key,))
+
+    def delete_before(self, collection: str, field: str, value) -> int:
+        self._ensure_table(collection)
+        self._require_indexed(collection, [field])
+        cursor = self._connection().execute(f"DELETE FROM {collection} WHERE {field} < ?", (value,))
+        return cursor.rowcount
+
+    def find(self, collection: str, **filters) -> List[Dict]:
+        self._ensure_table(collection)
+        self._require_indexed(collection, filters)
+
+        query = f"SELECT data FROM {collection}"
+        if filters:
+            query += " WHERE " + " AND ".join(f"{field} = ?" for field in filters)
+        rows = self._connection().execute(query, list(filters.values()))
+        return [json.loads(row[0]) for row in rows]
+
+    def all(self, collection: str) -> Dict[str, Dict]:
+        self._ensure_table(collection)
+        rows = self._connection().execute(f"SELECT key, data FROM {collection}")
+        return {key: json.loads(data) for key, data in rows}
+
+
+def migrate_from_json(backend: StorageBackend, files: Optional[Dict[str, str]] = None) -> Dict[str, int]:
+    """
+    Copy records from the legacy JSON files into a backend, keeping existing keys
+    """
+    source = JSONStorageBackend(files)
+    migrated = {}
+
+    for collection in source.files:
+        records = source.all(collection)
+        for key, record in records.items():
+            backend.insert(collection, key, record)
+        migrated[collection] = len(records)
+
+    return migrated
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage() -> StorageBackend:
+    """
+    Return the process-wide storage backend
+    """
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if STORAGE_BACKEND == "json":
+                    _storage = JSONStorageBackend()
+                elif STORAGE_BACKEND == "sqlite":
+                    _storage = SQLiteStorageBackend()
+                else:
+                    raise ValueError(f"Unsupported storage backend: {STORAGE_BACKEND}")
+    return _storage
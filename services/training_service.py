@@ -0,0 +1,394 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import importlib
+import math
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.impute import SimpleImputer
+from sklearn.model_selection import ParameterGrid, ParameterSampler
+from sklearn.pipeline import Pipeline
+from services.data_service import load_dataset_frame
+from services.evaluation_service import build_vocabulary, to_feature_matrix
+from services.feature_service import feature_names, load_features
+
+# Processes used for hyperparameter trials of one training job
+SEARCH_WORKERS = int(os.getenv("ZEPHYR_SEARCH_WORKERS", os.cpu_count() or 1))
+
+# Share of rows held out to score trials
+VALIDATION_FRACTION = 0.2
+
+ESTIMATORS = {
+    "classification": {
+        "logistic_regression": "sklearn.linear_model.LogisticRegression",
+        "sgd": "sklearn.linear_model.SGDClassifier",
+        "decision_tree": "sklearn.tree.DecisionTreeClassifier",
+        "random_forest": "sklearn.ensemble.RandomForestClassifier",
+        "extra_trees": "sklearn.ensemble.ExtraTreesClassifier",
+        "gradient_boosting": "sklearn.ensemble.HistGradientBoostingClassifier",
+    },
+    "regression": {
+        "linear_regression": "sklearn.linear_model.LinearRegression",
+        "ridge": "sklearn.linear_model.Ridge",
+        "sgd": "sklearn.linear_model.SGDRegressor",
+        "decision_tree": "sklearn.tree.DecisionTreeRegressor",
+        "random_forest": "sklearn.ensemble.RandomForestRegressor",
+        "extra_trees": "sklearn.ensemble.ExtraTreesRegressor",
+        "gradient_boosting": "sklearn.ensemble.HistGradientBoostingRegressor",
+    },
+}
+
+DEFAULT_ESTIMATORS = {"classification": "random_forest", "regression": "gradient_boosting"}
+
+# Estimators that handle missing values themselves; the others get a median imputer
+NAN_NATIVE = ("gradient_boosting",)
+
+# Example model_params:
+# {
+#     "task": "classification",
+#     "target": "label",
+#     "features": ["amount", "fee"],          # or "feature_spec": [...] (see feature_service)
+#     "estimator": "random_forest",
+#     "params": {"n_estimators": 200},
+#     "search": {
+#         "method": "random",                 # "grid" (ranges need a "step") or "random"
+#         "space": {"max_depth": [4, 8, 16], "min_samples_leaf": {"low": 1, "high": 50, "type": "int"}},
+#         "n_iter": 20,
+#         "patience": 5,                      # stop after this many trials without improvement
+#         "max_seconds": 600
+#     }
+# }
+
+
+def build_estimator(name: str, task: str, params: Optional[Dict] = None) -> Pipeline:
+    """
+    Instantiate a registered estimator; params apply to the estimator step
+    """
+    if task not in ESTIMATORS:
+        raise ValueError(f"Unsupported task {task}")
+    if name not in ESTIMATORS[task]:
+        raise ValueError(f"Unsupported estimator {name} for {task}")
+
+    module, _, cls = ESTIMATORS[task][name].rpartition(".")
+    estimator = getattr(importlib.import_module(module), cls)()
+    estimator.set_params(**(params or {}))
+
+    steps = [] if name in NAN_NATIVE else [("impute", SimpleImputer(strategy="median"))]
+    return Pipeline(steps + [("model", estimator)])
+
+
+def _distribution(spec):
+    """
+    JSON search-space entries: lists are sampled uniformly; {"low", "high"}
+    ranges become uniform, log-uniform ("log": true) or integer ("type": "int")
+    """
+    if not isinstance(spec, dict):
+        return spec
+    low, high = spec["low"], spec["high"]
+    if spec.get("type") == "int":
+        return stats.randint(int(low), int(high) + 1)
+    if spec.get("log"):
+        return stats.loguniform(low, high)
+    return stats.uniform(low, high - low)
+
+
+def _grid_values(name: str, spec) -> List:
+    """
+    Grid search-space entries: lists as given, single values as one-item
+    lists, and {"low", "high", "step"} ranges expanded inclusively
+    """
+    if isinstance(spec, list):
+        return spec
+    if not isinstance(spec, dict):
+        return [spec]
+    if "step" not in spec:
+        raise ValueError(f"Grid search needs a step for the range of {name}, or a list of values")
+    low, high, step = spec["low"], spec["high"], spec["step"]
+    if step <= 0 or high < low:
+        raise ValueError(f"Range of {name} needs low <= high and a positive step")
+    count = int(math.floor((high - low) / step + 1e-9)) + 1
+    values = [low + i * step for i in range(count)]
+    if spec.get("type") == "int":
+        return sorted({int(round(value)) for value in values})
+    return [round(value, 12) for value in values]
+
+
+def search_candidates(params: Dict, search: Optional[Dict], random_state: int) -> List[Dict]:
+    """
+    Expand the search config into the list of parameter sets to try
+    """
+    if not search or not search.get("space"):
+        return [dict(params)]
+
+    method = search.get("method", "grid")
+    space = search["space"]
+    if method == "grid":
+        grid = ParameterGrid({name: _grid_values(name, values) for name, values in space.items()})
+    elif method == "random":
+        grid = ParameterSampler(
+            {name: _distribution(values) for name, values in space.items()},
+            n_iter=int(search.get("n_iter", 10)),
+            random_state=random_state
+        )
+    else:
+        raise ValueError(f"Unsupported search method {method}")
+
+    candidates = []
+    for candidate in grid:
+        # NumPy scalars from the samplers are turned into plain JSON values
+        candidate = {name: value.item() if hasattr(value, "item") else value for name, value in candidate.items()}
+        candidates.append({**params, **candidate})
+    return candidates
+
+
+def load_training_data(
+    dataset_id: str,
+    user_id: str,
+    model_params: Dict,
+    rows: Optional[Tuple[int, int]] = None,
+    vocabulary: Optional[Dict[str, List[str]]] = None
+) -> Tuple[np.ndarray, np.ndarray, List[str], Dict[str, List[str]]]:
+    """
+    Read the feature matrix and target of a dataset, or of a row range of
+    it, as described by model_params. Non-numeric features are encoded
+    against vocabulary, which is built from the rows read when not given
+    """
+    target = model_params.get("target")
+    if not target:
+        raise ValueError("model_params.target is required")
+
+    feature_spec = model_params.get("feature_spec")
+    if feature_spec:
+        features = feature_names(feature_spec)
+        frame = load_features(dataset_id, user_id, feature_spec, [target], rows)
+    else:
+        features = model_params.get("features")
+        frame = load_dataset_frame(dataset_id, user_id, features + [target] if features else None, rows)
+        if not features:
+            features = [column for column in frame.columns if column != target]
+
+    if target not in frame.columns:
+        raise ValueError(f"Dataset {dataset_id} has no target column '{target}'")
+    frame = frame[frame[target].notna()]
+    if frame.empty and rows is None:
+        raise ValueError(f"Dataset {dataset_id} has no labelled rows")
+
+    y = frame[target].to_numpy()
+    if model_params.get("task", "classification") == "regression":
+        y = pd.to_numeric(frame[target], errors="coerce").to_numpy(dtype=np.float64)
+    if vocabulary is None:
+        vocabulary = build_vocabulary(frame, features)
+    return to_feature_matrix(frame, features, vocabulary), y, features, vocabulary
+
+
+def split_validation(X: np.ndarray, y: np.ndarray, fraction: float, random_state: int) -> Tuple:
+    order = np.random.default_rng(random_state).permutation(len(X))
+    n_validation = min(max(1, int(len(X) * fraction)), len(X) - 1) if len(X) > 1 else 0
+    validation, train = order[:n_validation], order[n_validation:]
+    return X[train], y[train], X[validation], y[validation]
+
+
+_trial_data = {}
+
+def _load_trial_data(data_path: str) -> Dict:
+    # Each worker maps the shared arrays once and keeps them for later trials
+    if data_path not in _trial_data:
+        _trial_data.clear()
+        _trial_data[data_path] = joblib.load(data_path, mmap_mode="r")
+    return _trial_data[data_path]
+
+
+def run_trial(data_path: str, estimator_name: str, task: str, params: Dict) -> Dict:
+    """
+    Fit one parameter set on the training split and score it on the
+    validation split (accuracy for classification, R² for regression)
+    """
+    data = _load_trial_data(data_path)
+    started = time.perf_counter()
+    try:
+        estimator = build_estimator(estimator_name, task, params)
+        estimator.fit(data["X_train"], data["y_train"])
+        fit_seconds = time.perf_counter() - started
+        score = float(estimator.score(data["X_val"], data["y_val"])) if len(data["y_val"]) else float("nan")
+    except Exception as e:
+        return {"params": params, "error": str(e), "seconds": round(time.perf_counter() - started, 4)}
+
+    rows = len(data["y_train"])
+    return {
+        "params": params,
+        "score": score,
+        "rows": rows,
+        "fit_seconds": round(fit_seconds, 4),
+        "seconds": round(time.perf_counter() - started, 4),
+        "rows_per_second": round(rows / fit_seconds) if fit_seconds > 0 else None
+    }
+
+
+def _trial_results(
+    data_path: str,
+    estimator_name: str,
+    task: str,
+    candidates: List[Dict],
+    workers: int,
+    should_stop: Callable[[], bool]
+) -> Iterator[Dict]:
+    """
+    Yield trial results as they finish, keeping at most workers trials in
+    flight and launching no more once should_stop() is true
+    """
+    if workers <= 1 or len(candidates) <= 1:
+        for params in candidates:
+            if should_stop():
+                return
+            yield run_trial(data_path, estimator_name, task, params)
+        return
+
+    remaining = iter(candidates)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        try:
+            while True:
+                while len(pending) < workers and not should_stop():
+                    params = next(remaining, None)
+                    if params is None:
+                        break
+                    pending.add(executor.submit(run_trial, data_path, estimator_name, task, params))
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            # Cancellation or an error drops the queued trials; running ones finish
+            for future in pending:
+                future.cancel()
+
+
+def _without_n_jobs(estimator_name: str, task: str, candidates: List[Dict]) -> List[Dict]:
+    # Trials already run one per core, so estimators must not spawn threads of their own
+    if "n_jobs" not in build_estimator(estimator_name, task).named_steps["model"].get_params():
+        return candidates
+    return [{"n_jobs": 1, **params} for params in candidates]
+
+
+def train_estimator(
+    dataset_id: str,
+    user_id: str,
+    model_params: Dict,
+    artifact_path: str,
+    report_progress: Callable = lambda progress, message=None: None
+) -> Dict:
+    """
+    Fit the estimator described by model_params, searching hyperparameters in
+    parallel with early stopping, then refit the best parameters on all rows
+    and persist the result to artifact_path with joblib
+    """
+    task = model_params.get("task", "classification")
+    estimator_name = model_params.get("estimator", DEFAULT_ESTIMATORS.get(task))
+    random_state = int(model_params.get("random_state", 0))
+    search = model_params.get("search") or {}
+    params = dict(model_params.get("params") or {})
+    build_estimator(estimator_name, task, params)
+    # Invalid search spaces fail before the data is read
+    candidates = search_candidates(params, search, random_state)
+
+    started = time.perf_counter()
+    report_progress(0.0, "loading data")
+    X, y, features, vocabulary = load_training_data(dataset_id, user_id, model_params)
+    load_seconds = time.perf_counter() - started
+
+    workers = max(1, min(int(search.get("workers", SEARCH_WORKERS)), len(candidates)))
+    if workers > 1:
+        candidates = _without_n_jobs(estimator_name, task, candidates)
+
+    artifact_dir = os.path.dirname(artifact_path)
+    os.makedirs(artifact_dir, exist_ok=True)
+    data_path = os.path.join(artifact_dir, "search-data.joblib")
+    X_train, y_train, X_val, y_val = split_validation(
+        X, y, float(model_params.get("validation_fraction", VALIDATION_FRACTION)), random_state
+    )
+    # Trial workers memory-map the arrays instead of receiving pickled copies
+    joblib.dump({"X_train": X_train, "y_train": y_train, "X_val": X_val, "y_val": y_val}, data_path)
+
+    patience = int(search.get("patience", 0))
+    min_delta = float(search.get("min_delta", 0.0))
+    max_seconds = search.get("max_seconds")
+    search_started = time.perf_counter()
+    trials = []
+    best = None
+    since_best = 0
+    stopped = None
+
+    def should_stop() -> bool:
+        nonlocal stopped
+        if patience and since_best >= patience:
+            stopped = "early_stopping"
+        elif max_seconds and time.perf_counter() - search_started > float(max_seconds):
+            stopped = "time_budget"
+        return stopped is not None
+
+    try:
+        for trial in _trial_results(data_path, estimator_name, task, candidates, workers, should_stop):
+            trial["trial"] = len(trials)
+            trials.append(trial)
+            score = trial.get("score")
+            if score is not None and not math.isnan(score) and (best is None or score > best["score"] + min_delta):
+                best = trial
+                since_best = 0
+            else:
+                since_best += 1
+            # The last 10% of progress is kept for the final fit
+            report_progress(0.9 * len(trials) / len(candidates), f"trial {len(trials)}/{len(candidates)}")
+    finally:
+        os.remove(data_path)
+
+    if best is None:
+        errors = [trial["error"] for trial in trials if "error" in trial]
+        if errors:
+            raise ValueError(f"All trials failed: {errors[0]}")
+        # Too few rows to hold any out; fall back to the configured params
+        best = {"params": trials[0]["params"] if trials else params, "score": None}
+    search_seconds = time.perf_counter() - search_started
+
+    report_progress(0.9, "fitting best parameters")
+    best_params = {name: value for name, value in best["params"].items() if not (name == "n_jobs" and "n_jobs" not in params)}
+    estimator = build_estimator(estimator_name, task, best_params)
+    fit_started = time.perf_counter()
+    estimator.fit(X, y)
+    fit_seconds = time.perf_counter() - fit_started
+    # Serving and evaluation encode categories with the training vocabulary
+    estimator.feature_vocabulary_ = vocabulary
+
+    # Written uncompressed so evaluation and serving can memory-map the arrays
+    tmp_path = f"{artifact_path}.tmp"
+    joblib.dump(estimator, tmp_path)
+    os.replace(tmp_path, artifact_path)
+
+    return {
+        "task": task,
+        "target": model_params["target"],
+        "features": features,
+        "estimator": estimator_name,
+        "artifact": artifact_path,
+        "best_params": best_params,
+        "best_score": best["score"],
+        "rows": len(y),
+        "trials": sorted(trials, key=lambda trial: trial["trial"]),
+        "search": {
+            "method": search.get("method", "grid") if search.get("space") else None,
+            "candidates": len(candidates),
+            "completed": len(trials),
+            "stopped": stopped,
+            "workers": workers,
+            "seconds": round(search_seconds, 4)
+        },
+        "timings": {
+            "load_seconds": round(load_seconds, 4),
+            "fit_seconds": round(fit_seconds, 4),
+            "fit_rows_per_second": round(len(y) / fit_seconds) if fit_seconds > 0 else None,
+            "total_seconds": round(time.perf_counter() - started, 4)
+        }
+    }
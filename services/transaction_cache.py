@@ -0,0 +1,288 @@
+from typing import Dict, Iterator, List, Optional, Sequence
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+TX_CACHE_FILE = os.getenv("ZEPHYR_TX_CACHE_FILE", "data/cache/transactions.db")
+TX_CACHE_MAX_BYTES = int(os.getenv("ZEPHYR_TX_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# Signatures kept in the index per program; the oldest are dropped beyond it
+TX_SIGNATURE_INDEX_MAX_ROWS = int(os.getenv("ZEPHYR_TX_SIGNATURE_INDEX_MAX_ROWS", 1000000))
+
+# Fraction of the byte budget kept after an eviction pass
+EVICTION_TARGET = 0.9
+
+# SQLite limits the number of bound parameters per statement
+QUERY_CHUNK = 500
+
+
+class TransactionCache:
+    """
+    On-disk cache of immutable transactions keyed by signature, plus a
+    per-program index of the contiguous signature range already fetched.
+    Index rows carry a sequence number in RPC order (newest highest), so
+    reads return signatures in the order getSignaturesForAddress does
+    """
+
+    def __init__(
+        self,
+        path: str = TX_CACHE_FILE,
+        max_bytes: int = TX_CACHE_MAX_BYTES,
+        max_signatures: int = TX_SIGNATURE_INDEX_MAX_ROWS
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_signatures = max_signatures
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.signature_evictions = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connection()
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(signatures)")}
+        if columns and "seq" not in columns:
+            # Indexes written before sequence numbers cannot be ordered; rebuild them
+            conn.executescript("DROP TABLE signatures; DELETE FROM coverage;")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                signature TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_transactions_last_access ON transactions (last_access);
+            CREATE TABLE IF NOT EXISTS signatures (
+                program TEXT NOT NULL,
+                signature TEXT NOT NULL,
+                slot INTEGER,
+                block_time INTEGER,
+                seq INTEGER NOT NULL,
+                PRIMARY KEY (program, signature)
+            );
+            CREATE INDEX IF NOT EXISTS idx_signatures_seq ON signatures (program, seq);
+            CREATE TABLE IF NOT EXISTS coverage (
+                program TEXT PRIMARY KEY,
+                data TEXT NOT NULL
+            );
+        """)
+        self._total_bytes = conn.execute("SELECT COALESCE(SUM(size), 0) FROM transactions").fetchone()[0]
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_transactions(self, signatures: Sequence[str]) -> Dict[str, Dict]:
+        """
+        Return the cached subset of the requested transactions
+        """
+        conn = self._connection()
+        found = {}
+        for i in range(0, len(signatures), QUERY_CHUNK):
+            chunk = list(signatures[i:i + QUERY_CHUNK])
+            rows = conn.execute(
+                f"SELECT signature, data FROM transactions WHERE signature IN ({','.join('?' * len(chunk))})",
+                chunk
+            )
+            for signature, data in rows:
+                found[signature] = json.loads(zlib.decompress(data))
+
+        if found:
+            now = time.time()
+            conn.executemany(
+                "UPDATE transactions SET last_access = ? WHERE signature = ?",
+                [(now, signature) for signature in found]
+            )
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(signatures) - len(found)
+        return found
+
+    def put_transactions(self, transactions: Dict[str, Dict]) -> None:
+        if not transactions:
+            return
+
+        now = time.time()
+        rows = []
+        for signature, transaction in transactions.items():
+            data = zlib.compress(json.dumps(transaction, separators=(",", ":")).encode())
+            rows.append((signature, data, len(data), now))
+
+        conn = self._connection()
+        inserted = 0
+        conn.execute("BEGIN")
+        try:
+            for row in rows:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO transactions (signature, data, size, last_access) VALUES (?, ?, ?, ?)",
+                    row
+                )
+                # Rows already cached are ignored and must not count twice
+                if cursor.rowcount:
+                    inserted += row[2]
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._total_bytes += inserted
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self) -> None:
+        """
+        Drop least recently used transactions until under the byte budget
+        """
+        conn = self._connection()
+        target = self.max_bytes * EVICTION_TARGET
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM transactions").fetchone()[0]
+
+        while total > target:
+            rows = conn.execute(
+                "SELECT signature, size FROM transactions ORDER BY last_access LIMIT ?", (QUERY_CHUNK,)
+            ).fetchall()
+            if not rows:
+                break
+            victims = []
+            for signature, size in rows:
+                if total <= target:
+                    break
+                victims.append((signature,))
+                total -= size
+            conn.executemany("DELETE FROM transactions WHERE signature = ?", victims)
+            with self._lock:
+                self.evictions += len(victims)
+
+        with self._lock:
+            self._total_bytes = total
+
+    def get_coverage(self, program: str) -> Optional[Dict]:
+        """
+        Return the newest/oldest signatures of the fully indexed range for a program
+        """
+        row = self._connection().execute(
+            "SELECT data FROM coverage WHERE program = ?", (program,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_coverage(self, program: str, coverage: Dict) -> None:
+        self._connection().execute(
+            "INSERT OR REPLACE INTO coverage (program, data) VALUES (?, ?)",
+            (program, json.dumps(coverage))
+        )
+
+    def add_signatures(self, program: str, signatures: List[Dict], newer: bool = True) -> None:
+        """
+        Index a run of signatures given newest first, above the indexed
+        range when newer, otherwise below it
+        """
+        if not signatures:
+            return
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if newer:
+                top = conn.execute("SELECT MAX(seq) FROM signatures WHERE program = ?", (program,)).fetchone()[0]
+                first = (top or 0) + len(signatures)
+            else:
+                bottom = conn.execute("SELECT MIN(seq) FROM signatures WHERE program = ?", (program,)).fetchone()[0]
+                first = (bottom if bottom is not None else 1) - 1
+            conn.executemany(
+                "INSERT OR IGNORE INTO signatures (program, signature, slot, block_time, seq) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (program, sig["signature"], sig.get("slot"), sig.get("blockTime"), first - i)
+                    for i, sig in enumerate(signatures)
+                ]
+            )
+            conn.execute("COMMIT")
+        except:
+            conn.execute("ROLLBACK")
+            raise
+
+    def trim_signatures(self, program: str) -> Optional[Dict]:
+        """
+        Drop the oldest signatures beyond max_signatures; return the oldest
+        one kept if any were dropped
+        """
+        conn = self._connection()
+        top = conn.execute("SELECT MAX(seq) FROM signatures WHERE program = ?", (program,)).fetchone()[0]
+        if top is None:
+            return None
+        cursor = conn.execute(
+            "DELETE FROM signatures WHERE program = ? AND seq <= ?", (program, top - self.max_signatures)
+        )
+        if not cursor.rowcount:
+            return None
+        with self._lock:
+            self.signature_evictions += cursor.rowcount
+
+        row = conn.execute(
+            "SELECT signature, slot, block_time, seq FROM signatures WHERE program = ? ORDER BY seq LIMIT 1",
+            (program,)
+        ).fetchone()
+        return {"signature": row[0], "slot": row[1], "blockTime": row[2], "seq": row[3]}
+
+    def get_signature(self, program: str, signature: str) -> Optional[Dict]:
+        row = self._connection().execute(
+            "SELECT signature, slot, block_time, seq FROM signatures WHERE program = ? AND signature = ?",
+            (program, signature)
+        ).fetchone()
+        return {"signature": row[0], "slot": row[1], "blockTime": row[2], "seq": row[3]} if row else None
+
+    def iter_signatures(
+        self,
+        program: str,
+        start_timestamp: float,
+        end_timestamp: float,
+        before: Optional[Dict] = None
+    ) -> Iterator[Dict]:
+        """
+        Yield indexed signatures newest first, like paging the RPC: rows
+        newer than end_timestamp are skipped, rows without a block time are
+        kept, and the first row older than start_timestamp ends the scan
+        """
+        query = (
+            "SELECT signature, slot, block_time FROM signatures "
+            "WHERE program = ? AND (block_time IS NULL OR block_time <= ?)"
+        )
+        params = [program, end_timestamp]
+        if before is not None:
+            query += " AND seq < ?"
+            params.append(before["seq"])
+        query += " ORDER BY seq DESC"
+
+        cursor = self._connection().execute(query, params)
+        while True:
+            rows = cursor.fetchmany(QUERY_CHUNK)
+            if not rows:
+                return
+            for signature, slot, block_time in rows:
+                if block_time is not None and block_time < start_timestamp:
+                    return
+                yield {"signature": signature, "slot": slot, "blockTime": block_time}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "signature_evictions": self.signature_evictions,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes
+            }
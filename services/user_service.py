@@ -1,41 +1,25 @@
 from typing import Dict, Optional
-import json
-import os
-
-# In a production environment, this should be replaced with a proper database
-USERS_FILE = "data/users.json"
+import datetime
+from services.storage_service import get_storage
 
 def load_users() -> Dict:
     """
-    Load users from the JSON file
+    Load all users from storage
     """
-    if not os.path.exists(USERS_FILE):
-        os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
-        return {}
-    
-    try:
-        with open(USERS_FILE, 'r') as f:
-            return json.load(f)
-    except:
-        return {}
+    return get_storage().all("users")
 
 def save_users(users: Dict) -> None:
     """
-    Save users to the JSON file
+    Save users to storage
     """
-    os.makedirs(os.path.dirname(USERS_FILE), exist_ok=True)
-    with open(USERS_FILE, 'w') as f:
-        json.dump(users, f, indent=2)
+    storage = get_storage()
+    for wallet_address, user in users.items():
+        storage.put("users", wallet_address, user)
 
 def create_user(wallet_address: str) -> Dict:
     """
     Create a new user
     """
-    users = load_users()
-    
-    if wallet_address in users:
-        return users[wallet_address]
-    
     user = {
         "wallet_address": wallet_address,
         "created_at": str(datetime.datetime.now()),
@@ -43,28 +27,17 @@ def create_user(wallet_address: str) -> Dict:
         "datasets": []
     }
     
-    users[wallet_address] = user
-    save_users(users)
-    
-    return user
+    # Returns the existing user if another request created it first
+    return get_storage().insert("users", wallet_address, user)
 
 def get_user(wallet_address: str) -> Optional[Dict]:
     """
     Get user by wallet address
     """
-    users = load_users()
-    return users.get(wallet_address)
+    return get_storage().get("users", wallet_address)
 
 def update_user(wallet_address: str, updates: Dict) -> Optional[Dict]:
     """
     Update user information
     """
-    users = load_users()
-    
-    if wallet_address not in users:
-        return None
-    
-    users[wallet_address].update(updates)
-    save_users(users)
-    
-    return users[wallet_address]
+    return get_storage().update("users", wallet_address, lambda user: user.update(updates))
@@ -1,34 +1,79 @@
-from solana.rpc.api import Client
-from solana.publickey import PublicKey
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 import base58
 import nacl.signing
+import os
+from services.solana_service import get_solana_service
 
-def verify_wallet_signature(wallet_address: str, signature: bytes) -> bool:
+# Number of parsed wallet verify keys kept in memory
+WALLET_KEY_CACHE_SIZE = int(os.getenv("ZEPHYR_WALLET_KEY_CACHE_SIZE", 65536))
+
+# Signatures handled per worker task in batch verification
+BATCH_VERIFY_CHUNK = 256
+
+@lru_cache(maxsize=WALLET_KEY_CACHE_SIZE)
+def _verify_key(wallet_address: str) -> nacl.signing.VerifyKey:
+    """
+    Parse a base58 wallet address into an Ed25519 verify key
+    """
+    key_bytes = base58.b58decode(wallet_address)
+    if len(key_bytes) != 32:
+        raise ValueError(f"Invalid wallet address: {wallet_address}")
+    return nacl.signing.VerifyKey(key_bytes)
+
+def _to_bytes(value: Union[str, bytes]) -> bytes:
+    # JSON clients send signatures base58-encoded, as Solana wallets do
+    return base58.b58decode(value) if isinstance(value, str) else bytes(value)
+
+def verify_wallet_signature(wallet_address: str, signature: Union[str, bytes], message: Optional[Union[str, bytes]] = None) -> bool:
     """
-    Verify a wallet signature against the provided wallet address
+    Verify a wallet signature against the provided wallet address; without
+    a message the signature is taken to be a signed message
     """
     try:
-        # Convert wallet address to PublicKey
-        public_key = PublicKey(wallet_address)
-        
-        # Verify the signature
-        verifier = nacl.signing.VerifyKey(bytes(public_key))
-        verifier.verify(signature)
-        
+        verifier = _verify_key(wallet_address)
+        if message is None:
+            verifier.verify(_to_bytes(signature))
+        else:
+            message_bytes = message.encode() if isinstance(message, str) else bytes(message)
+            verifier.verify(message_bytes, _to_bytes(signature))
+
         return True
     except Exception as e:
         print(f"Error verifying signature: {str(e)}")
         return False
 
+def verify_wallet_signatures(items: Sequence[Tuple], max_workers: Optional[int] = None) -> List[bool]:
+    """
+    Verify many (wallet_address, signature[, message]) tuples; results keep
+    input order. Chunks run on a thread pool, since libsodium releases the GIL
+    """
+    def verify_chunk(chunk: Sequence[Tuple]) -> List[bool]:
+        return [verify_wallet_signature(*item) for item in chunk]
+
+    chunks = [items[i:i + BATCH_VERIFY_CHUNK] for i in range(0, len(items), BATCH_VERIFY_CHUNK)]
+    if len(chunks) <= 1:
+        return verify_chunk(items)
+
+    with ThreadPoolExecutor(max_workers=max_workers or min(len(chunks), os.cpu_count() or 1)) as executor:
+        results = []
+        for chunk_results in executor.map(verify_chunk, chunks):
+            results.extend(chunk_results)
+        return results
+
 def get_wallet_balance(wallet_address: str) -> float:
     """
     Get the SOL balance for a wallet address
     """
     try:
-        client = Client("https://api.mainnet-beta.solana.com")
-        public_key = PublicKey(wallet_address)
-        balance = client.get_balance(public_key)
-        return balance.value / 1e9  # Convert lamports to SOL
+        return get_wallet_balances([wallet_address])[wallet_address]
     except Exception as e:
         print(f"Error getting wallet balance: {str(e)}")
         return 0.0
+
+def get_wallet_balances(wallet_addresses: Sequence[str]) -> Dict[str, float]:
+    """
+    Get SOL balances for many wallets in a few batched RPC calls
+    """
+    return get_solana_service().get_balances(list(wallet_addresses))
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import storage_service
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    Run in an empty directory so data/ and models/ are created there, with a fresh storage backend
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage_service, "_storage", None)
+    yield tmp_path
+    monkeypatch.setattr(storage_service, "_storage", None)
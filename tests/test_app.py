@@ -0,0 +1,19 @@
+import os
+import subprocess
+import sys
+
+
+def test_importing_the_app_starts_no_background_services(tmp_path):
+    check = (
+        "import multiprocessing, threading\n"
+        "from app import app\n"
+        "from services import job_service\n"
+        "assert job_service._queue is None\n"
+        "assert not multiprocessing.active_children()\n"
+        "assert [thread.name for thread in threading.enumerate()] == ['MainThread']\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root}
+    result = subprocess.run([sys.executable, "-c", check], cwd=tmp_path, env=env, capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0, result.stderr
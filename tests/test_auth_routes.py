@@ -0,0 +1,104 @@
+import base58
+from flask import Flask
+import nacl.signing
+import pytest
+
+from routes import auth_routes
+from services import session_service
+from services.storage_service import get_storage
+
+
+def make_wallet():
+    key = nacl.signing.SigningKey.generate()
+    return key, base58.b58encode(bytes(key.verify_key)).decode()
+
+
+def sign(key, message):
+    return base58.b58encode(key.sign(message.encode()).signature).decode()
+
+
+@pytest.fixture
+def client(workdir):
+    app = Flask(__name__)
+    app.register_blueprint(auth_routes.bp)
+    return app.test_client()
+
+
+def signed_login(client, key, wallet_address):
+    challenge = client.post("/auth/challenge", json={"wallet_address": wallet_address}).get_json()["challenge"]
+    return {"wallet_address": wallet_address, "nonce": challenge["nonce"], "signature": sign(key, challenge["message"])}
+
+
+def test_signed_challenge_logs_in_once(client):
+    key, wallet_address = make_wallet()
+    login = signed_login(client, key, wallet_address)
+
+    response = client.post("/auth/connect-wallet", json=login)
+    assert response.status_code == 200
+    assert response.get_json()["session"]["token"]
+
+    replay = client.post("/auth/connect-wallet", json=login)
+    assert replay.status_code == 401 and "already used" in replay.get_json()["error"]
+
+
+def test_challenge_of_another_wallet_or_wrong_message_is_rejected(client):
+    key, wallet_address = make_wallet()
+    other_key, other_address = make_wallet()
+    login = signed_login(client, key, wallet_address)
+
+    stolen = {**login, "wallet_address": other_address, "signature": sign(other_key, "Sign in to Zephyr")}
+    assert client.post("/auth/connect-wallet", json=stolen).status_code == 401
+    forged = {**login, "signature": sign(key, "some other message")}
+    assert client.post("/auth/connect-wallet", json=forged).status_code == 401
+    # A rejected signature does not use up the challenge
+    assert client.post("/auth/connect-wallet", json=login).status_code == 200
+
+
+def test_expired_challenge_is_rejected(client, monkeypatch):
+    monkeypatch.setattr(session_service, "CHALLENGE_TTL", -1)
+    key, wallet_address = make_wallet()
+
+    response = client.post("/auth/connect-wallet", json=signed_login(client, key, wallet_address))
+
+    assert response.status_code == 401
+
+
+@pytest.mark.parametrize("wallets", [["not-a-dict"], [None], [{"wallet_address": "abc", "signature": "def"}], [{"wallet_address": 1, "signature": "x", "nonce": "y"}]])
+def test_connect_wallets_rejects_malformed_items(client, wallets):
+    response = client.post("/auth/connect-wallets", json={"wallets": wallets})
+
+    assert response.status_code == 400
+
+
+def test_connect_wallets_reports_each_wallet(client):
+    wallets = [make_wallet() for _ in range(3)]
+    logins = [signed_login(client, key, address) for key, address in wallets]
+    logins[1]["signature"] = sign(wallets[1][0], "wrong")
+
+    body = client.post("/auth/connect-wallets", json={"wallets": logins}).get_json()
+
+    assert [result["status"] for result in body["results"]] == ["success", "error", "success"]
+    assert body["failed"] == 1
+    again = client.post("/auth/connect-wallets", json={"wallets": [logins[0]]}).get_json()
+    assert again["results"][0]["status"] == "error"
+
+
+def test_production_entry_point_requires_a_session_secret(monkeypatch):
+    monkeypatch.delenv("ZEPHYR_SESSION_SECRET", raising=False)
+    with pytest.raises(RuntimeError):
+        session_service.require_session_secret()
+
+    monkeypatch.setenv("ZEPHYR_SESSION_SECRET", "secret")
+    session_service.require_session_secret()
+
+
+def test_login_purges_expired_challenges_without_reading_the_table(client, monkeypatch):
+    storage = get_storage()
+    for i in range(3):
+        storage.put(session_service.USED_CHALLENGES_COLLECTION, f"old-{i}", {"wallet_address": "w", "expires_at": 1})
+    monkeypatch.setattr(session_service, "_purged_at", 0.0)
+    monkeypatch.setattr(type(storage), "all", lambda *args: pytest.fail("login read the whole table"))
+    key, wallet_address = make_wallet()
+
+    assert client.post("/auth/connect-wallet", json=signed_login(client, key, wallet_address)).status_code == 200
+    assert storage.find(session_service.USED_CHALLENGES_COLLECTION, expires_at=1) == []
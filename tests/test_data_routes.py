@@ -0,0 +1,60 @@
+from flask import Flask
+import pytest
+
+from routes import data_routes
+
+
+def batches_of(total, size):
+    signatures = [{"signature": f"sig-{i}", "type": "transfer", "amount": i} for i in range(total)]
+    return [signatures[start:start + size] for start in range(0, total, size)]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def set_rows(total, size=3):
+        def iter_defi_data(data_type, start_time, end_time, before):
+            for batch in batches_of(total, size):
+                if before is not None:
+                    batch = [row for row in batch if int(row["signature"].split("-")[1]) > int(before.split("-")[1])]
+                yield batch
+        monkeypatch.setattr(data_routes, "iter_defi_data", iter_defi_data)
+
+    app = Flask(__name__)
+    app.register_blueprint(data_routes.bp)
+    test_client = app.test_client()
+    test_client.set_rows = set_rows
+    return test_client
+
+
+def page(client, **params):
+    response = client.get("/data/onchain-data", query_string=params)
+    return response.status_code, response.get_json()
+
+
+def test_exact_final_page_has_no_cursor(client):
+    client.set_rows(6)
+
+    status, first = page(client, limit=3)
+    assert status == 200 and len(first["data"]) == 3 and first["next_cursor"]
+
+    status, last = page(client, limit=3, cursor=first["next_cursor"])
+    assert status == 200 and len(last["data"]) == 3
+    assert last["next_cursor"] is None
+
+
+def test_page_within_a_batch_has_a_cursor(client):
+    client.set_rows(6)
+
+    status, first = page(client, limit=2)
+
+    assert len(first["data"]) == 2
+    assert data_routes.decode_cursor(first["next_cursor"]) == "sig-1"
+
+
+@pytest.mark.parametrize("limit", [0, -1])
+def test_non_positive_limit_is_rejected(client, limit):
+    client.set_rows(6)
+
+    status, body = page(client, limit=limit)
+
+    assert status == 400 and "limit" in body["error"]
@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from services import data_service
+from services.dataset_store import read_dataset, write_dataset
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_write_dataset_round_trips_column_types(tmp_path, compress):
+    frame = pd.DataFrame({
+        "aware": pd.to_datetime([1, 2, None], unit="s", utc=True).tz_convert("Europe/Berlin"),
+        "naive": pd.to_datetime([1, 2, None], unit="s"),
+        "int_category": pd.Categorical([3, 1, 3]),
+        "ordered_category": pd.Categorical(["b", "a", None], ordered=True),
+        "nullable_int": pd.array([1, None, 3], dtype="Int64"),
+        "nullable_bool": pd.array([True, None, False], dtype="boolean"),
+        "nullable_float": pd.array([1.5, None, 2.0], dtype="Float64"),
+    })
+
+    write_dataset(str(tmp_path / "dataset"), frame, compress=compress)
+
+    pd.testing.assert_frame_equal(read_dataset(str(tmp_path / "dataset")), frame)
+
+
+def test_concurrent_first_reads_convert_a_json_dataset_once(workdir, monkeypatch):
+    os.makedirs("data/datasets/user-1")
+    with open("data/datasets/user-1/legacy.json", "w") as f:
+        json.dump([{"amount": i} for i in range(10)], f)
+    conversions = []
+    write = data_service.write_dataset
+
+    def slow_write(*args):
+        conversions.append(args[0])
+        time.sleep(0.2)
+        return write(*args)
+
+    monkeypatch.setattr(data_service, "write_dataset", slow_write)
+    with ThreadPoolExecutor(4) as pool:
+        frames = list(pool.map(lambda _: data_service.load_dataset_frame("legacy", "user-1"), range(4)))
+
+    assert len(conversions) == 1
+    assert all(frame["amount"].tolist() == list(range(10)) for frame in frames)
+    assert not os.path.exists("data/datasets/user-1/legacy.json")
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.data_service import save_dataset
+from services.distributed_training import LocalNode, train_distributed
+
+
+class DyingNode(LocalNode):
+    """
+    Local node whose process is killed just before its Nth task is handed over
+    """
+
+    def __init__(self, name, die_on_call):
+        super().__init__(name)
+        self.die_on_call = die_on_call
+        self.calls = 0
+
+    def call(self, fn, *args):
+        self.calls += 1
+        if self.calls == self.die_on_call:
+            self.process.kill()
+            self.process.join()
+        return super().call(fn, *args)
+
+
+@pytest.fixture
+def dataset_id(workdir):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3_000, 5))
+    frame = pd.DataFrame(X, columns=[f"x{i}" for i in range(5)])
+    frame["label"] = (X @ rng.normal(size=5) > 0).astype(int)
+    return save_dataset(frame, "user-1")
+
+
+def train(dataset_id, workdir, nodes, name):
+    params = {
+        "task": "classification",
+        "target": "label",
+        "estimator": "sgd",
+        "distributed": {"rounds": 3, "patience": 0, "shards": 3}
+    }
+    try:
+        return train_distributed(dataset_id, "user-1", params, str(workdir / name / "model.joblib"), nodes=nodes)
+    finally:
+        for node in nodes:
+            node.close()
+
+
+def test_killed_node_work_is_reassigned_and_merged(workdir, dataset_id):
+    healthy = train(dataset_id, workdir, [LocalNode(f"node-{i}") for i in range(3)], "healthy")
+    # The third node dies on its second task: the first training round
+    nodes = [LocalNode("node-0"), LocalNode("node-1"), DyingNode("node-2", die_on_call=2)]
+    failover = train(dataset_id, workdir, nodes, "failover")
+
+    distributed = failover["distributed"]
+    assert distributed["failures"] == 1
+    assert distributed["reassigned"] == 1
+    dead = distributed["node_stats"]["node-2"]
+    assert (dead["tasks"], dead["failures"]) == (1, 1)
+    assert all(entry["rows"] == 3_000 for entry in distributed["rounds"])
+    # Shards are trained the same way whichever node runs them
+    assert failover["best_score"] == pytest.approx(healthy["best_score"], rel=1e-9)
+    assert healthy["distributed"]["failures"] == 0
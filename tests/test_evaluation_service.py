@@ -0,0 +1,67 @@
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import mean_squared_error, r2_score
+
+from services.data_service import append_to_dataset, save_dataset
+from services.evaluation_service import RegressionMetrics, build_vocabulary, evaluate_batches, to_feature_matrix
+from services.training_service import train_estimator
+
+
+class OffsetModel:
+    def predict(self, X):
+        return X[:, 0]
+
+
+def test_streaming_r2_matches_sklearn_for_large_offset_targets():
+    rng = np.random.default_rng(0)
+    # Targets around 1e9 with unit variance: naive sum-of-squares cancels to noise
+    y_true = 1e9 + rng.normal(0, 1, 100_000)
+    y_pred = y_true + rng.normal(0, 0.5, len(y_true))
+
+    metrics = RegressionMetrics()
+    for start in range(0, len(y_true), 7_000):
+        metrics.update(y_true[start:start + 7_000], y_pred[start:start + 7_000])
+    result = metrics.result()
+
+    np.testing.assert_allclose(result["r2"], r2_score(y_true, y_pred), rtol=1e-9)
+    np.testing.assert_allclose(result["mse"], mean_squared_error(y_true, y_pred), rtol=1e-9)
+
+
+def test_evaluate_batches_regression_matches_sklearn():
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({"x": 5e8 + rng.normal(0, 3, 10_000)})
+    frame["y"] = frame["x"] + rng.normal(0, 1, len(frame))
+    batches = [frame.iloc[start:start + 1_000] for start in range(0, len(frame), 1_000)]
+
+    result = evaluate_batches(OffsetModel(), batches, ["x"], "y", task="regression")
+
+    np.testing.assert_allclose(result["r2"], r2_score(frame["y"], frame["x"]), rtol=1e-9)
+    assert result["rows"] == len(frame)
+
+
+def test_categories_are_encoded_with_the_training_vocabulary():
+    vocabulary = build_vocabulary(pd.DataFrame({"kind": pd.Categorical(["transfer", "swap"])}), ["kind"])
+    first = pd.DataFrame({"kind": pd.Categorical(["transfer", "swap"])})
+    second = pd.DataFrame({"kind": pd.Series(["transfer", "zap", None], dtype="string")})
+
+    assert vocabulary == {"kind": ["swap", "transfer"]}
+    np.testing.assert_array_equal(to_feature_matrix(first, ["kind"], vocabulary)[:, 0], [1, 0])
+    np.testing.assert_array_equal(to_feature_matrix(second, ["kind"], vocabulary)[:, 0], [1, np.nan, np.nan])
+    with pytest.raises(ValueError, match="non-numeric"):
+        to_feature_matrix(second, ["kind"])
+
+
+def test_trained_model_scores_categories_from_other_partitions_and_json(workdir):
+    train = [{"kind": kind, "amount": float(i), "label": int(kind == "swap")} for i, kind in enumerate(["swap", "transfer"] * 20)]
+    dataset_id = save_dataset(pd.DataFrame(train[:20]).astype({"kind": "category"}), "user-1")
+    append_to_dataset(dataset_id, "user-1", pd.DataFrame(train[20:]).astype({"kind": "category"}))
+    params = {"task": "classification", "target": "label", "features": ["kind", "amount"], "estimator": "decision_tree"}
+
+    train_estimator(dataset_id, "user-1", params, "models/m1/model.joblib")
+    estimator = joblib.load("models/m1/model.joblib")
+    test = pd.DataFrame([{"kind": "transfer", "amount": 1.0, "label": 0}, {"kind": "swap", "amount": 2.0, "label": 1}])
+
+    assert estimator.feature_vocabulary_ == {"kind": ["swap", "transfer"]}
+    assert evaluate_batches(estimator, [test], ["kind", "amount"], "label")["accuracy"] == 1.0
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.feature_service import ROLLING_AGGREGATES, compute_features
+
+
+def make_frame(rows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    # Repeated timestamps, out of order, with a few missing
+    timestamps = 1_700_000_000 + rng.integers(0, 600, rows).astype(np.float64)
+    timestamps[rng.choice(rows, 5, replace=False)] = np.nan
+    return pd.DataFrame({
+        "amount": rng.normal(100, 10, rows),
+        "timestamp": timestamps,
+        "token": rng.choice(["SOL", "USDC", "BONK"], rows),
+    })
+
+
+def expected_per_group(frame, column, window, agg, time_column=None):
+    """
+    Reference result: the ungrouped rolling aggregate run on each group separately
+    """
+    expected = np.full(len(frame), np.nan)
+    for _, group in frame.groupby("token"):
+        if time_column:
+            group = group[group[time_column].notna()].sort_values(time_column, kind="stable")
+            work = pd.DataFrame({"v": group[column].to_numpy(), "t": pd.to_datetime(group[time_column].to_numpy(), unit="s")})
+            rolled = getattr(work.rolling(pd.Timedelta(seconds=window), min_periods=1, on="t")["v"], agg)()
+        else:
+            rolled = getattr(group[column].reset_index(drop=True).rolling(window, min_periods=1), agg)()
+        expected[group.index.to_numpy()] = rolled.to_numpy()
+    return expected
+
+
+@pytest.mark.parametrize("agg", ROLLING_AGGREGATES)
+def test_grouped_time_window_matches_per_group_loop(agg):
+    frame = make_frame()
+    spec = [{"name": "f", "op": "rolling", "column": "amount", "window": 60,
+             "time_column": "timestamp", "by": "token", "agg": agg}]
+
+    result = compute_features(frame, spec)["f"].to_numpy()
+
+    expected = expected_per_group(frame, "amount", 60, agg, time_column="timestamp")
+    np.testing.assert_allclose(result, expected, equal_nan=True)
+    assert np.isnan(result[frame["timestamp"].isna().to_numpy()]).all()
+
+
+@pytest.mark.parametrize("agg", ["sum", "std"])
+def test_grouped_row_window_matches_per_group_loop(agg):
+    frame = make_frame()
+    spec = [{"name": "f", "op": "rolling", "column": "amount", "window": 5, "by": "token", "agg": agg}]
+
+    result = compute_features(frame, spec)["f"].to_numpy()
+
+    np.testing.assert_allclose(result, expected_per_group(frame, "amount", 5, agg), equal_nan=True)
+
+
+def test_arithmetic_on_category_columns_is_rejected():
+    frame = pd.DataFrame({"token": pd.Categorical(["sol", "usdc"]), "amount": [1.0, 2.0]})
+    spec = [{"name": "bad", "op": "ratio", "numerator": "amount", "denominator": "token"}]
+
+    with pytest.raises(ValueError, match="token"):
+        compute_features(frame, spec)
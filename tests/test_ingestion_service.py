@@ -0,0 +1,120 @@
+import pytest
+
+from services.data_service import load_dataset_frame
+from services.ingestion_service import IngestionError, IngestionService
+
+
+class FakeSource:
+    """
+    In-memory stand-in for SolanaService: signatures sig-0..sig-n, oldest first
+    """
+
+    def __init__(self, count, fail=()):
+        self.signatures = [
+            {"signature": f"sig-{i}", "slot": i, "blockTime": 1_700_000_000 + i}
+            for i in range(count)
+        ]
+        self.fail = set(fail)
+        self.listed = 0
+
+    def add(self, count):
+        start = len(self.signatures)
+        self.signatures += [
+            {"signature": f"sig-{i}", "slot": i, "blockTime": 1_700_000_000 + i}
+            for i in range(start, start + count)
+        ]
+
+    def get_signatures_since(self, until=None, start_timestamp=None, before=None):
+        for sig in reversed(self.signatures):
+            if before is not None and sig["slot"] >= int(before.split("-")[1]):
+                continue
+            if until is not None and sig["signature"] == until:
+                return
+            if start_timestamp is not None and sig["blockTime"] < start_timestamp:
+                return
+            self.listed += 1
+            yield sig
+
+    def get_transactions(self, signatures):
+        return [
+            None if signature in self.fail else {
+                "timestamp": 1_700_000_000 + int(signature.split("-")[1]),
+                "type": "transfer",
+                "amount": float(signature.split("-")[1]),
+                "fee": 5000,
+                "success": True
+            }
+            for signature in signatures
+        ]
+
+
+def ingested_amounts(service):
+    return load_dataset_frame(service.dataset_id, service.user_id, ["amount"])["amount"].tolist()
+
+
+def make_service(source):
+    return IngestionService(source=source, program="test", user_id="tester", batch_size=4, lookback=10 ** 10)
+
+
+def test_ingests_backlog_oldest_first_in_batches(workdir):
+    source = FakeSource(10)
+    service = make_service(source)
+
+    result = service.run_once()
+
+    assert result["last_run"]["rows"] == 10
+    assert result["last_run"]["batches"] == 3
+    assert ingested_amounts(service) == [float(i) for i in range(10)]
+    assert service.checkpoint()["signature"] == "sig-9"
+
+
+def test_resumes_from_checkpoint_without_duplicates(workdir):
+    source = FakeSource(6)
+    service = make_service(source)
+    service.run_once()
+
+    source.add(5)
+    result = service.run_once()
+
+    assert result["last_run"]["rows"] == 5
+    assert ingested_amounts(service) == [float(i) for i in range(11)]
+
+
+def test_failed_fetch_stops_before_gap_and_is_retried(workdir):
+    source = FakeSource(10, fail={"sig-6"})
+    service = make_service(source)
+
+    with pytest.raises(IngestionError):
+        service.run_once()
+
+    # Everything before the failed transaction is in, nothing after it
+    assert ingested_amounts(service) == [float(i) for i in range(6)]
+    assert service.checkpoint()["signature"] == "sig-5"
+    assert service.status()["error"]
+
+    source.fail.clear()
+    result = service.run_once()
+
+    assert result["last_run"]["rows"] == 4
+    assert ingested_amounts(service) == [float(i) for i in range(10)]
+
+
+def test_transient_failure_is_retried_within_the_run(workdir):
+    source = FakeSource(5)
+    calls = []
+    fetch = source.get_transactions
+
+    def flaky(signatures):
+        calls.append(list(signatures))
+        records = fetch(signatures)
+        if len(calls) == 1:
+            records[0] = None
+        return records
+
+    source.get_transactions = flaky
+    service = make_service(source)
+
+    service.run_once()
+
+    assert calls[1] == calls[0]
+    assert ingested_amounts(service) == [float(i) for i in range(5)]
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+import os
+
+import pytest
+
+from services.ipfs_cache import IPFSContentCache
+
+
+class FakeIPFS:
+    """
+    Serves one object; stops returning data after `available` bytes, like a node that lost the content
+    """
+
+    def __init__(self, data, available=None):
+        self.data = data
+        self.available = len(data) if available is None else available
+        self.files = self
+
+    def stat(self, path):
+        return {"Size": len(self.data)}
+
+    def cat(self, ipfs_hash, offset=0, length=None):
+        end = min(self.available, len(self.data) if length is None else offset + length)
+        return self.data[offset:end]
+
+
+def make_cache(tmp_path, node):
+    @contextmanager
+    def client():
+        yield node
+    return IPFSContentCache(client, cache_dir=str(tmp_path / "cache"), small_object_bytes=10)
+
+
+def test_large_object_is_cached_on_disk(tmp_path):
+    cache = make_cache(tmp_path, FakeIPFS(b"x" * 100))
+
+    assert cache.get("cid") == b"x" * 100
+    assert len(os.listdir(tmp_path / "cache")) == 1
+
+
+def test_truncated_download_is_not_cached(tmp_path):
+    node = FakeIPFS(b"x" * 100, available=60)
+    cache = make_cache(tmp_path, node)
+
+    with pytest.raises(Exception, match="Truncated"):
+        cache.get("cid")
+    assert os.listdir(tmp_path / "cache") == []
+
+    node.available = 100
+    assert cache.get("cid") == b"x" * 100
@@ -0,0 +1,62 @@
+import os
+import time
+from datetime import datetime
+
+from services.job_service import JOBS_COLLECTION, TrainingJobQueue
+from services.storage_service import get_storage
+
+
+def crashing_runner(job_id):
+    if job_id.startswith("crash"):
+        # Simulates a worker killed by the OOM killer
+        os._exit(1)
+    return {"result": job_id}
+
+
+def wait_for(queue, job_ids, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        jobs = [queue.get(job_id) for job_id in job_ids]
+        if all(job["status"] in ("completed", "failed", "cancelled") for job in jobs):
+            return jobs
+        time.sleep(0.05)
+    raise AssertionError(f"Jobs did not finish: {[(job['id'], job['status']) for job in jobs]}")
+
+
+def submit(queue, job_id, user_id="user-1"):
+    return queue.submit({"id": job_id, "user_id": user_id, "created_at": str(datetime.now())})
+
+
+def test_dead_worker_process_is_replaced_and_its_job_retried_then_failed(workdir):
+    queue = TrainingJobQueue(workers=2, max_jobs_per_user=2, poll_interval=0.05, runner=crashing_runner)
+    try:
+        submit(queue, "crash-1")
+        crashed, = wait_for(queue, ["crash-1"])
+
+        submit(queue, "ok-1")
+        submit(queue, "ok-2", user_id="user-2")
+        ok_1, ok_2 = wait_for(queue, ["ok-1", "ok-2"])
+    finally:
+        queue.stop()
+
+    assert crashed["status"] == "failed"
+    assert crashed["worker_crashes"] == 2
+    assert (ok_1["status"], ok_1["result"]) == ("completed", "ok-1")
+    assert (ok_2["status"], ok_2["result"]) == ("completed", "ok-2")
+    assert queue._running == {}
+
+
+def test_orphan_check_leaves_jobs_that_changed_after_listing(workdir, monkeypatch):
+    storage = get_storage()
+    storage.put(JOBS_COLLECTION, "done", {"id": "done", "status": "completed", "progress": 1.0})
+    storage.put(JOBS_COLLECTION, "claimed", {"id": "claimed", "status": "training", "dispatcher_pid": os.getpid()})
+    storage.put(JOBS_COLLECTION, "orphan", {"id": "orphan", "status": "training", "dispatcher_pid": None})
+    # Listing taken before "done" finished and "claimed" was picked up by a live dispatcher
+    stale = [{"id": job_id, "status": "training", "dispatcher_pid": None} for job_id in ("done", "claimed", "orphan")]
+    monkeypatch.setattr(storage, "find", lambda collection, **filters: stale)
+
+    TrainingJobQueue(runner=crashing_runner)._requeue_orphaned()
+
+    assert storage.get(JOBS_COLLECTION, "done")["status"] == "completed"
+    assert storage.get(JOBS_COLLECTION, "claimed")["status"] == "training"
+    assert storage.get(JOBS_COLLECTION, "orphan")["status"] == "pending"
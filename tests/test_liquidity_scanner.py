@@ -0,0 +1,75 @@
+import base64
+
+import base58
+import numpy as np
+
+from services.liquidity_scanner import SWAP_LAYOUT, LiquidityScanner
+
+
+def key(name):
+    return name.encode().ljust(32, b"\0")
+
+
+def pool_account(mint_a, mint_b, fee=25):
+    pool = np.zeros(1, dtype=SWAP_LAYOUT)
+    pool["is_initialized"] = 1
+    pool["token_a"] = np.void(key(f"vault-a-{mint_a}{mint_b}"))
+    pool["token_b"] = np.void(key(f"vault-b-{mint_a}{mint_b}"))
+    pool["token_a_mint"] = np.void(key(mint_a))
+    pool["token_b_mint"] = np.void(key(mint_b))
+    pool["trade_fee_numerator"] = fee
+    pool["trade_fee_denominator"] = 10000
+    return pool.tobytes()
+
+
+class FakeRPC:
+    def __init__(self, pools):
+        self.pools = pools
+
+    def get_program_accounts(self, program_id, filters):
+        accounts = []
+        for address, data in self.pools.items():
+            matches = all(
+                data[f["memcmp"]["offset"]:].startswith(base58.b58decode(f["memcmp"]["bytes"]))
+                for f in filters if "memcmp" in f
+            )
+            if matches:
+                accounts.append({"pubkey": address, "account": {"data": [base64.b64encode(data).decode(), "base64"]}})
+        return accounts
+
+    def get_multiple_accounts(self, vaults, options):
+        return [{"data": [base64.b64encode(np.uint64(7).tobytes()).decode(), "base64"]} for _ in vaults]
+
+
+def mint_filter(mint):
+    offset = SWAP_LAYOUT.fields["token_a_mint"][1]
+    return [{"memcmp": {"offset": offset, "bytes": base58.b58encode(key(mint)).decode()}}]
+
+
+def test_filtered_discover_merges_into_the_snapshot():
+    rpc = FakeRPC({"pool-1": pool_account("sol", "usdc"), "pool-2": pool_account("bonk", "usdc")})
+    scanner = LiquidityScanner(rpc, parallel_threshold=10**9)
+    scanner.discover()
+    scanner.refresh_reserves()
+
+    rpc.pools["pool-1"] = pool_account("sol", "usdc", fee=30)
+    rpc.pools["pool-3"] = pool_account("sol", "bonk")
+    result = scanner.discover(mint_filter("sol"))
+    records = {record["pool_address"]: record for record in scanner.snapshot()}
+
+    assert result == {"pools": 3, "new": 1, "changed": 1, "removed": 0, "version": scanner.version}
+    assert sorted(records) == ["pool-1", "pool-2", "pool-3"]
+    assert records["pool-1"]["trade_fee_bps"] == 30.0
+    assert records["pool-2"]["reserve_a"] == 7
+    assert scanner.vaults[scanner._index["pool-2"] * 2] == base58.b58encode(key("vault-a-bonkusdc")).decode()
+
+
+def test_only_full_discover_removes_pools():
+    rpc = FakeRPC({"pool-1": pool_account("sol", "usdc"), "pool-2": pool_account("bonk", "usdc")})
+    scanner = LiquidityScanner(rpc, parallel_threshold=10**9)
+    scanner.discover()
+
+    del rpc.pools["pool-2"]
+    assert scanner.discover(mint_filter("sol"))["removed"] == 0
+    assert scanner.discover()["removed"] == 1
+    assert [record["pool_address"] for record in scanner.snapshot()] == ["pool-1"]
@@ -0,0 +1,106 @@
+from contextlib import contextmanager
+import hashlib
+import io
+
+import pytest
+
+from services import data_service
+
+
+class FakeMFS:
+    """
+    In-memory stand-in for the IPFS node's MFS; like Kubo it refuses writes past the end of a file
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.pinned = []
+
+    def mkdir(self, path, parents=False):
+        pass
+
+    def write(self, path, file, offset=0, create=False, truncate=False, count=None):
+        data = file if isinstance(file, bytes) else file.read()
+        if count is not None:
+            data = data[:count]
+        if path not in self.files:
+            assert create
+            self.files[path] = b""
+        current = b"" if truncate else self.files[path]
+        if offset > len(current):
+            raise RuntimeError("offset past end of file")
+        self.files[path] = current[:offset] + data + current[offset + len(data):]
+
+    def read(self, path, offset=0, count=None):
+        data = self.files[path][offset:]
+        return data if count is None else data[:count]
+
+    def stat(self, path):
+        return {"Hash": "cid-" + hashlib.sha256(self.files[path]).hexdigest()[:8]}
+
+    def rm(self, path, recursive=False):
+        for name in [name for name in self.files if name == path or name.startswith(path + "/")]:
+            del self.files[name]
+
+
+class FakeClient:
+    def __init__(self, mfs):
+        self.files = mfs
+        self.pin = self
+
+    def add(self, cid):
+        self.files.pinned.append(cid)
+
+
+class FakePool:
+    def __init__(self):
+        self.mfs = FakeMFS()
+
+    @contextmanager
+    def client(self):
+        yield FakeClient(self.mfs)
+
+
+@pytest.fixture
+def pool(workdir, monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(data_service, "get_ipfs_pool", lambda: pool)
+    return pool
+
+
+def test_parts_uploaded_out_of_order_assemble_to_the_file(pool):
+    content = bytes(range(256)) * 10
+    session = data_service.create_upload_session("user-1", "blob.bin", len(content), part_size=1000)
+
+    for part_number in (2, 0, 1):
+        part = content[part_number * 1000:(part_number + 1) * 1000]
+        data_service.upload_part(session["id"], part_number, io.BytesIO(part), len(part))
+    result = data_service.complete_upload(session["id"])
+
+    assert result["checksum"] == hashlib.sha256(content).hexdigest()
+    assert pool.mfs.pinned == [result["ipfs_hash"]]
+    assert pool.mfs.files == {}
+
+
+def test_part_with_wrong_size_is_rejected(pool):
+    session = data_service.create_upload_session("user-1", "blob.bin", 1500, part_size=1000)
+
+    with pytest.raises(ValueError):
+        data_service.upload_part(session["id"], 0, io.BytesIO(b"x" * 1000), 999)
+    with pytest.raises(ValueError):
+        # No declared length: checked after reading, and the part is discarded
+        data_service.upload_part(session["id"], 1, io.BytesIO(b"x" * 400))
+
+    assert pool.mfs.files == {}
+    assert data_service.get_upload_session(session["id"])["parts"] == {}
+
+
+def test_completed_upload_cannot_be_completed_again(pool):
+    session = data_service.create_upload_session("user-1", "blob.bin", 10, part_size=10)
+    data_service.upload_part(session["id"], 0, io.BytesIO(b"0123456789"), 10)
+    data_service.complete_upload(session["id"])
+
+    with pytest.raises(ValueError, match="completed"):
+        data_service.complete_upload(session["id"])
+    with pytest.raises(ValueError, match="completed"):
+        data_service.upload_part(session["id"], 0, io.BytesIO(b"0123456789"), 10)
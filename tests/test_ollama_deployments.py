@@ -0,0 +1,82 @@
+from services.ollama_deployments import OLLAMA_HOT_KEEP_ALIVE, OLLAMA_TRAFFIC_WINDOW, DeploymentManager
+
+
+class FakeResponse:
+    status_code = 200
+    text = ""
+
+    def __init__(self, payload=None):
+        self.payload = payload or {}
+
+    def json(self):
+        return self.payload
+
+
+class FakeOllama:
+    """
+    Records load requests; reports nothing as resident
+    """
+
+    base_url = "http://ollama"
+
+    def __init__(self):
+        self.loads = []
+        self.session = self
+
+    def post(self, url, json):
+        self.loads.append((json["model"], json["keep_alive"]))
+        return FakeResponse()
+
+    def get(self, url):
+        return FakeResponse({"models": []})
+
+
+def make_manager(workdir, service=None):
+    return DeploymentManager(service or FakeOllama(), flush_interval=0, lock_path=str(workdir / "manager.lock"))
+
+
+def test_traffic_is_shared_between_processes(workdir):
+    first, second = make_manager(workdir), make_manager(workdir)
+
+    for _ in range(10):
+        first.record_request("model-a")
+    for _ in range(20):
+        second.record_request("model-a")
+
+    expected = 30 * 60.0 / OLLAMA_TRAFFIC_WINDOW
+    assert first.request_rate("model-a") == expected
+    assert second.request_rate("model-a") == expected
+    assert first.keep_alive("model-a") == OLLAMA_HOT_KEEP_ALIVE
+
+
+def test_one_process_maintains_deployments_at_a_time(workdir):
+    first, second = make_manager(workdir), make_manager(workdir)
+
+    assert first.is_leader()
+    assert not second.is_leader()
+
+    first.stop()
+    assert second.is_leader()
+    second.stop()
+
+
+def test_maintenance_rewarms_models_hot_in_another_process(workdir):
+    service = FakeOllama()
+    web_worker, maintainer = make_manager(workdir), make_manager(workdir, service)
+    for _ in range(30):
+        web_worker.record_request("model-a")
+
+    maintainer.maintain()
+
+    assert [model for model, _ in service.loads] == ["zephyr_model-a"]
+
+
+def test_preload_runs_on_its_own_executor(workdir):
+    # FakeOllama has no prediction executor to borrow
+    service = FakeOllama()
+    manager = make_manager(workdir, service)
+
+    manager.preload_async("model-a")
+    manager._preload_executor.shutdown(wait=True)
+
+    assert service.loads and service.loads[0][0] == "zephyr_model-a"
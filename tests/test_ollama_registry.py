@@ -0,0 +1,46 @@
+import threading
+
+from services.ollama_registry import OllamaModelRegistry
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, models):
+        self.models = models
+
+    def json(self):
+        return {"models": self.models}
+
+
+class FakeService:
+    base_url = "http://ollama"
+
+    def __init__(self, names):
+        self.names = names
+        self.session = self
+        self.threads = []
+
+    def get(self, url):
+        self.threads.append(threading.current_thread().name)
+        return FakeResponse([{"name": name, "size": i} for i, name in enumerate(self.names)])
+
+
+def test_tags_of_one_model_are_kept_apart():
+    registry = OllamaModelRegistry(FakeService(["zephyr_m1:latest", "zephyr_m1:q4", "zephyr_m2", "llama2:7b"]))
+
+    assert registry.list_models() == ["zephyr_m1:latest", "zephyr_m1:q4", "zephyr_m2"]
+    assert registry.get_model("m1")["size"] == 0
+    assert registry.get_model("m1:q4")["size"] == 1
+    assert registry.get_model("m2")["name"] == "zephyr_m2"
+
+
+def test_background_refresh_runs_on_the_registry_thread():
+    service = FakeService(["zephyr_m1"])
+    registry = OllamaModelRegistry(service, ttl=-1)
+    registry.tags()
+
+    registry.tags()
+    registry._executor.shutdown(wait=True)
+
+    assert service.threads[1].startswith("ollama-registry")
@@ -0,0 +1,52 @@
+import os
+
+from services.ollama_service import OllamaService
+
+
+def deploy_modelfile(model_name, temperature, top_k=40):
+    os.makedirs(f"models/{model_name}", exist_ok=True)
+    with open(f"models/{model_name}/Modelfile", "w") as f:
+        f.write(f"FROM llama2\nPARAMETER temperature {temperature}\nPARAMETER top_k {top_k}")
+
+
+def make_service(monkeypatch):
+    service = OllamaService(namespace_refresh_interval=0)
+    service.cache_mode = "deterministic"
+    calls = []
+
+    def generate(model_name, input_data):
+        calls.append(input_data)
+        return {"response": f"answer {len(calls)}"}
+
+    monkeypatch.setattr(service, "_generate", generate)
+    return service, calls
+
+
+def test_cache_hits_count_as_traffic(workdir, monkeypatch):
+    deploy_modelfile("model-a", 0)
+    service, calls = make_service(monkeypatch)
+    recorded = []
+    monkeypatch.setattr(service.deployments, "record_request", recorded.append)
+
+    first = service.predict("model-a", {"x": 1})
+    second = service.predict("model-a", {"x": 1})
+
+    assert first == second and len(calls) == 1
+    assert recorded == ["model-a", "model-a"]
+
+
+def test_redeploy_by_another_process_invalidates_cached_results(workdir, monkeypatch):
+    deploy_modelfile("model-a", 0)
+    service, calls = make_service(monkeypatch)
+    monkeypatch.setattr(service.deployments, "record_request", lambda model_name: None)
+
+    assert service.predict("model-a", {"x": 1}) == {"response": "answer 1"}
+    # Another worker redeploys with different parameters
+    deploy_modelfile("model-a", 0, top_k=10)
+    assert service.predict("model-a", {"x": 1}) == {"response": "answer 2"}
+
+    # A non-deterministic redeploy stops caching altogether
+    deploy_modelfile("model-a", 0.7)
+    service.predict("model-a", {"x": 1})
+    service.predict("model-a", {"x": 1})
+    assert len(calls) == 4
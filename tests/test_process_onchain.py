@@ -0,0 +1,24 @@
+import pandas as pd
+
+from services.data_service import frame_to_records, process_onchain_columns, process_onchain_data
+
+
+RAW = [
+    {"timestamp": 1, "type": "transfer", "amount": 5, "fee": 1, "success": None},
+    {"timestamp": None, "type": "transfer", "amount": "2.5", "fee": 0},
+    {"timestamp": 3, "type": "swap", "amount": 1, "fee": 1, "success": False, "token_in": None, "token_out": "usdc"},
+    {"timestamp": 4, "type": "swap", "success": True, "token_in": "sol", "price_impact": 0.1},
+    {"timestamp": 5, "type": "liquidity", "amount": 7, "fee": 2, "pool_address": None},
+    {"type": None, "success": 0},
+]
+
+
+def test_columnar_processing_matches_row_processing_with_null_fields():
+    assert frame_to_records(process_onchain_columns(RAW)) == process_onchain_data(RAW)
+
+
+def test_explicit_null_success_is_false_and_absent_success_is_true():
+    frame = process_onchain_columns(RAW)
+
+    assert frame["success"].tolist() == [False, True, False, True, True, False]
+    assert process_onchain_columns(pd.DataFrame(RAW).drop(columns="success"))["success"].all()
@@ -0,0 +1,62 @@
+from flask import Flask
+import numpy as np
+import pytest
+
+from routes import model_routes
+from services.serving_service import ModelServer, ServedModel
+
+
+class SumModel:
+    def predict(self, X):
+        return X.sum(axis=1)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    server = ModelServer(refresh_interval=3600)
+    record = {"deployment": {"deployed_at": "v1"}, "features": ["a", "b"], "model_params": {}}
+    server._models["m1"] = ServedModel("m1", record, SumModel())
+    monkeypatch.setattr(model_routes, "get_model_server", lambda: server)
+    app = Flask(__name__)
+    app.register_blueprint(model_routes.bp)
+    yield app.test_client()
+    server.close()
+
+
+def test_list_and_object_rows_are_predicted(client):
+    rows = client.post("/model/predict", json={"model_id": "m1", "inputs": [[1, 2], [3, 4]]})
+    objects = client.post("/model/predict", json={"model_id": "m1", "inputs": [{"a": 1, "b": 2}, {"b": 5}]})
+
+    assert rows.get_json()["predictions"] == [3.0, 7.0]
+    assert objects.get_json()["predictions"][0] == 3.0
+    assert np.isnan(objects.get_json()["predictions"][1])
+
+
+@pytest.mark.parametrize("inputs", [
+    [[1, 2], [3]],
+    [[1, {"x": 1}]],
+    [[1, "two"]],
+    [{"a": 1, "b": 2}, [3, 4]],
+    [[1, 2], {"a": 1, "b": 2}],
+    [[1, 2, 3]],
+])
+def test_malformed_rows_are_client_errors(client, inputs):
+    response = client.post("/model/predict", json={"model_id": "m1", "inputs": inputs})
+
+    assert response.status_code == 400
+
+
+def test_category_features_use_the_model_vocabulary(client):
+    model = SumModel()
+    model.feature_vocabulary_ = {"kind": ["swap", "transfer"]}
+    server = model_routes.get_model_server()
+    record = {"deployment": {"deployed_at": "v1"}, "features": ["kind", "a"], "model_params": {}}
+    server._models["m2"] = ServedModel("m2", record, model)
+
+    objects = client.post("/model/predict", json={"model_id": "m2", "inputs": [{"kind": "transfer", "a": 1}]})
+    rows = client.post("/model/predict", json={"model_id": "m2", "inputs": [["swap", 1], ["zap", 1]]})
+    unknown = client.post("/model/predict", json={"model_id": "m1", "inputs": [{"a": "swap", "b": 1}]})
+
+    assert objects.get_json()["predictions"] == [2.0]
+    assert rows.get_json()["predictions"][0] == 1.0 and np.isnan(rows.get_json()["predictions"][1])
+    assert unknown.status_code == 400
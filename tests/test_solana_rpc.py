@@ -0,0 +1,110 @@
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+import pytest
+
+from services import solana_rpc
+from services.solana_rpc import RPCError, SolanaRPCClient, parse_retry_after
+
+
+class StubRPCServer:
+    """
+    Local JSON-RPC node that answers the first `rate_limited` requests with
+    429 and the given Retry-After header, then echoes each call's params
+    """
+
+    def __init__(self, rate_limited=0, retry_after=None):
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests += 1
+                if stub.requests <= stub.rate_limited:
+                    self.send_response(429)
+                    if stub.retry_after is not None:
+                        self.send_header("Retry-After", stub.retry_after)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = json.dumps([
+                    {"jsonrpc": "2.0", "id": call["id"], "result": call["params"]} for call in payload
+                ]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(solana_rpc.time, "sleep", delays.append)
+    return delays
+
+
+def make_client(stub):
+    return SolanaRPCClient(stub.url, max_retries=3, backoff=0.01, timeout=5)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(formatdate(time.time() - 60, usegmt=True)) == 0.0
+    assert 50 < parse_retry_after(formatdate(time.time() + 60, usegmt=True)) <= 60
+
+
+def test_retry_after_in_seconds_is_honoured(sleeps):
+    stub = StubRPCServer(rate_limited=1, retry_after="2")
+    try:
+        assert make_client(stub).call("getSlot", [1]) == [1]
+    finally:
+        stub.close()
+    assert sleeps == [2.0]
+
+
+def test_retry_after_as_http_date_is_honoured(sleeps):
+    stub = StubRPCServer(rate_limited=1, retry_after=formatdate(time.time() + 30, usegmt=True))
+    try:
+        assert make_client(stub).call("getSlot", [1]) == [1]
+    finally:
+        stub.close()
+    assert len(sleeps) == 1 and 20 < sleeps[0] <= 30
+
+
+def test_unparseable_retry_after_falls_back_to_backoff(sleeps):
+    stub = StubRPCServer(rate_limited=2, retry_after="later")
+    try:
+        assert make_client(stub).call("getSlot", [1]) == [1]
+    finally:
+        stub.close()
+    assert len(sleeps) == 2 and all(0.01 <= delay <= 0.04 for delay in sleeps)
+
+
+def test_gives_up_after_max_retries(sleeps):
+    stub = StubRPCServer(rate_limited=10)
+    try:
+        with pytest.raises(RPCError):
+            make_client(stub).call("getSlot", [1])
+    finally:
+        stub.close()
+    assert stub.requests == 4
@@ -0,0 +1,82 @@
+import json
+import os
+
+import pytest
+
+from services import storage_service
+from services.storage_service import JSONStorageBackend, SQLiteStorageBackend, StorageBackend
+
+
+@pytest.fixture
+def legacy_users(workdir):
+    os.makedirs("data")
+    users = {f"u{i}": {"id": f"u{i}", "wallet_address": f"w{i}"} for i in range(3)}
+    with open("data/users.json", "w") as f:
+        json.dump(users, f)
+    return users
+
+
+def test_interrupted_json_migration_is_retried(legacy_users, monkeypatch):
+    insert = SQLiteStorageBackend.insert
+
+    def crash_on_u1(self, collection, key, record):
+        if key == "u1":
+            raise RuntimeError("killed")
+        return insert(self, collection, key, record)
+
+    monkeypatch.setattr(SQLiteStorageBackend, "insert", crash_on_u1)
+    with pytest.raises(RuntimeError):
+        SQLiteStorageBackend("data/zephyr.db")
+    monkeypatch.setattr(SQLiteStorageBackend, "insert", insert)
+
+    storage = SQLiteStorageBackend("data/zephyr.db")
+
+    assert storage.all("users") == legacy_users
+    assert storage.get(storage_service.META_COLLECTION, storage_service.JSON_MIGRATION_KEY)["records"]["users"] == 3
+
+
+def test_completed_migration_is_not_repeated(legacy_users):
+    SQLiteStorageBackend("data/zephyr.db").delete("users", "u0")
+
+    storage = SQLiteStorageBackend("data/zephyr.db")
+
+    assert sorted(storage.all("users")) == ["u1", "u2"]
+
+
+def test_backends_must_implement_every_operation():
+    class GetOnly(StorageBackend):
+        def get(self, collection, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+    JSONStorageBackend()
+
+
+@pytest.mark.parametrize("backend", [lambda: JSONStorageBackend(), lambda: SQLiteStorageBackend("data/zephyr.db")])
+def test_delete_before_removes_only_expired_records(workdir, backend):
+    storage = backend()
+    for key, expires_at in [("a", 10), ("b", 20), ("c", 30)]:
+        storage.put("used_challenges", key, {"expires_at": expires_at})
+
+    assert storage.delete_before("used_challenges", "expires_at", 25) == 2
+    assert list(storage.all("used_challenges")) == ["c"]
+
+
+def test_newly_indexed_field_is_filled_from_existing_records(workdir):
+    storage = SQLiteStorageBackend("data/zephyr.db", indexed_fields={"used_challenges": []})
+    storage.put("used_challenges", "a", {"expires_at": 10})
+
+    storage = SQLiteStorageBackend("data/zephyr.db")
+
+    assert storage.delete_before("used_challenges", "expires_at", 25) == 1
+
+
+@pytest.mark.parametrize("backend", [lambda: JSONStorageBackend(), lambda: SQLiteStorageBackend("data/zephyr.db")])
+def test_find_on_unindexed_fields_fails_on_every_backend(workdir, backend):
+    storage = backend()
+    storage.put("models", "m1", {"user_id": "u1", "status": "pending", "task": "regression"})
+
+    assert [record["task"] for record in storage.find("models", user_id="u1", status="pending")] == ["regression"]
+    with pytest.raises(ValueError, match="task"):
+        storage.find("models", task="regression")
@@ -0,0 +1,21 @@
+import pytest
+
+from services.training_service import search_candidates
+
+
+def test_grid_search_expands_stepped_ranges():
+    search = {"method": "grid", "space": {"max_depth": {"low": 2, "high": 6, "step": 2, "type": "int"}, "alpha": {"low": 0.1, "high": 0.3, "step": 0.1}}}
+
+    candidates = search_candidates({"random_state": 0}, search, 0)
+
+    assert sorted((c["max_depth"], c["alpha"]) for c in candidates) == [
+        (depth, alpha) for depth in (2, 4, 6) for alpha in (0.1, 0.2, 0.3)
+    ]
+    assert all(c["random_state"] == 0 for c in candidates)
+
+
+def test_grid_search_rejects_ranges_without_a_step():
+    search = {"method": "grid", "space": {"min_samples_leaf": {"low": 1, "high": 50, "type": "int"}}}
+
+    with pytest.raises(ValueError, match="min_samples_leaf"):
+        search_candidates({}, search, 0)
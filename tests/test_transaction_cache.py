@@ -0,0 +1,83 @@
+from services import solana_service
+from services.solana_service import SolanaService
+from services.transaction_cache import TransactionCache
+
+
+def test_reinserting_cached_transactions_does_not_grow_the_byte_count(tmp_path):
+    cache = TransactionCache(str(tmp_path / "tx.db"), max_bytes=10 ** 9)
+    transactions = {f"sig-{i}": {"slot": i, "meta": {"fee": 5000}} for i in range(50)}
+
+    cache.put_transactions(transactions)
+    size = cache._total_bytes
+    cache.put_transactions(transactions)
+    cache.put_transactions({**transactions, "sig-new": {"slot": 99}})
+
+    stored = cache._connection().execute("SELECT SUM(size) FROM transactions").fetchone()[0]
+    assert size > 0
+    assert cache._total_bytes == stored
+    assert cache.get_transactions(["sig-0", "sig-new"]).keys() == {"sig-0", "sig-new"}
+
+
+class FakeRPC:
+    """
+    getSignaturesForAddress over a fixed history, newest first, in block
+    order rather than signature order
+    """
+
+    def __init__(self, history):
+        self.history = history
+
+    def get_signatures_for_address(self, address, before=None, until=None, limit=1000):
+        signatures = [sig["signature"] for sig in self.history]
+        start = signatures.index(before) + 1 if before else 0
+        stop = signatures.index(until) if until else len(signatures)
+        return [dict(sig) for sig in self.history[start:stop][:limit]]
+
+
+def make_history(count, start_slot=1000):
+    history = []
+    for i in range(count):
+        slot = start_slot - i // 3
+        # Signatures within a slot deliberately run against block order
+        history.append({"signature": f"sig-{slot}-{'cba'[i % 3]}", "slot": slot, "blockTime": None if i % 7 == 3 else 10 * slot})
+    return history
+
+
+def make_service(history, cache):
+    service = SolanaService.__new__(SolanaService)
+    service.rpc = FakeRPC(history)
+    service.cache = cache
+    return service
+
+
+def test_cached_signatures_match_the_rpc(tmp_path, monkeypatch):
+    monkeypatch.setattr(solana_service, "SIGNATURE_PAGE_SIZE", 7)
+    history = make_history(120)
+    uncached = make_service(history, None)
+    cached = make_service(history, TransactionCache(str(tmp_path / "tx.db")))
+
+    for start, end, before in [(9_800, 9_950, None), (9_700, 9_990, None), (9_700, 9_990, history[40]["signature"])]:
+        expected = list(uncached._iter_signatures(start, end, before))
+        assert list(cached._iter_signatures(start, end, before)) == expected
+        assert any(sig["blockTime"] is None for sig in expected)
+
+
+def test_signature_index_is_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(solana_service, "SIGNATURE_PAGE_SIZE", 7)
+    history = make_history(120)
+    cache = TransactionCache(str(tmp_path / "tx.db"), max_signatures=50)
+    uncached = make_service(history[30:], None)
+    service = make_service(history[30:], cache)
+
+    # Newer signatures arrive and push the oldest out of the index
+    list(service._iter_signatures(9_750, 9_950))
+    service.rpc.history = history
+    recent = list(service._iter_signatures(9_950, 10_000))
+    wide = list(service._iter_signatures(9_700, 10_000))
+    uncached.rpc.history = history
+
+    rows = cache._connection().execute("SELECT COUNT(*) FROM signatures").fetchone()[0]
+    assert rows <= 50 and cache.stats()["signature_evictions"] > 0
+    assert recent == list(uncached._iter_signatures(9_950, 10_000))
+    # Wider than the index holds: served from the RPC instead
+    assert wide == list(uncached._iter_signatures(9_700, 10_000))
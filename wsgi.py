@@ -0,0 +1,11 @@
+"""
+Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from services.session_service import require_session_secret
+
+# Workers and restarts must agree on session tokens, so fail before serving
+require_session_secret()
+
+from app import app
+
+application = app